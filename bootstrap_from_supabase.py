@@ -0,0 +1,132 @@
+# bootstrap_from_supabase.py - Supabase 데이터로 로컬 SQLite(reminder.db) 채우기
+# 새 웹훅 인스턴스나 GitHub Actions 실행이 커밋된 DB 파일 대신 최신 데이터로 시작하도록
+# 사용자/업무/최근 완료 기록을 페이지 단위로 받아 임시 파일에 한 트랜잭션으로 적재하고,
+# 인덱스와 통계 트리거는 적재가 끝난 뒤 만든 다음 원래 DB 파일과 교체한다.
+# 원격에 없는 로컬 상태(예약 작업/실행 기록, 가져오기 기록, 임대, 체크포인트 등)는 교체 전에 옮겨 둔다.
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+import db
+from db import INDEX_SCHEMA, ensure_stats_schema, set_state, kst_now
+from supabase_client import get_supabase_manager
+
+LOG_DAYS = int(os.getenv("BOOTSTRAP_LOG_DAYS", "30"))
+
+TASK_COLUMNS = ("id", "title", "assignee_email", "frequency", "due_date", "status",
+                "hmac_token", "last_completed_at", "updated_at")
+LOG_COLUMNS = ("id", "task_id", "completed_at", "completion_method", "notes")
+
+# Supabase 에서 다시 받는 테이블 (통계 카운터는 ensure_stats_schema 가 새로 계산) - 나머지는 기존 DB 에서 복사
+SYNCED_TABLES = {"users", "tasks", "completion_logs", "task_counters", "task_daily_completions"}
+
+def _kst(value):
+    """Supabase timestamptz -> 한국 시간 ISO 문자열 (로컬 주기 비교와 같은 형식)"""
+    if not value:
+        return value
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(db.KST).isoformat()
+    except ValueError:
+        return value
+
+def _rows(records, columns, timestamps=()):
+    for r in records:
+        yield tuple(_kst(r.get(c)) if c in timestamps else r.get(c) for c in columns)
+
+def _insert_sql(table, columns):
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+def _carry_local_tables(conn, db_path: str) -> list:
+    """기존 DB 에만 있는 테이블을 임시 DB 로 복사하고 복사한 테이블 이름을 반환"""
+    if not os.path.exists(db_path):
+        return []
+    conn.execute("ATTACH DATABASE ? AS old", (db_path,))
+    try:
+        tables = conn.execute(
+            "SELECT name, sql FROM old.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        carried = []
+        conn.execute("BEGIN")
+        for name, sql in tables:
+            if name in SYNCED_TABLES:
+                continue
+            exists = conn.execute(
+                "SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?", (name,)
+            ).fetchone()
+            if not exists:
+                conn.execute(sql)
+                for (index_sql,) in conn.execute(
+                    "SELECT sql FROM old.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                    (name,)
+                ).fetchall():
+                    conn.execute(index_sql)
+            columns = ", ".join(f'"{r[1]}"' for r in conn.execute(f'PRAGMA old.table_info("{name}")'))
+            conn.execute(f'INSERT OR IGNORE INTO main."{name}" ({columns}) SELECT {columns} FROM old."{name}"')
+            carried.append(name)
+        conn.commit()
+    finally:
+        conn.execute("DETACH DATABASE old")
+    return carried
+
+def bootstrap(db_path: str = None, log_days: int = LOG_DAYS, page_size: int = None) -> dict:
+    """Supabase -> SQLite 대량 적재 후 db_path 와 교체하고 행 수를 반환"""
+    db_path = db_path or db.DB_PATH
+    manager = get_supabase_manager(use_service_key=True)
+    tmp_path = db_path + ".bootstrap"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with open("schema.sql", "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+        # 새 파일이라 잃을 것이 없으므로 적재 중에는 저널/동기화를 끈다
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+
+        # 페이지 단위 스트리밍 -> executemany (전체를 메모리에 올리지 않음), 한 트랜잭션
+        since = (kst_now() - timedelta(days=log_days)).isoformat()
+        conn.execute("BEGIN")
+        users = conn.executemany(
+            _insert_sql("users", ("email", "name")),
+            _rows(manager.iter_users(columns="email,name", page_size=page_size), ("email", "name"))).rowcount
+        tasks = conn.executemany(
+            _insert_sql("tasks", TASK_COLUMNS),
+            _rows(manager.iter_tasks(columns=",".join(TASK_COLUMNS), page_size=page_size), TASK_COLUMNS,
+                  timestamps=("last_completed_at", "updated_at"))).rowcount
+        logs = conn.executemany(
+            _insert_sql("completion_logs", LOG_COLUMNS),
+            _rows(manager.iter_completion_logs(columns=",".join(LOG_COLUMNS), page_size=page_size, since=since),
+                  LOG_COLUMNS, timestamps=("completed_at",))).rowcount
+        conn.commit()
+        carried = _carry_local_tables(conn, db_path)
+
+        # 인덱스/통계 카운터는 적재 후 한 번에
+        conn.executescript(INDEX_SCHEMA)
+        ensure_stats_schema(conn)
+        set_state(conn, "last_bootstrap_at", kst_now().isoformat())
+        set_state(conn, "last_sync_at", kst_now().isoformat())
+        conn.commit()
+    except Exception:
+        conn.close()
+        os.remove(tmp_path)
+        raise
+    conn.close()
+
+    os.replace(tmp_path, db_path)
+    elapsed = time.perf_counter() - started
+    print(f"✅ 부트스트랩 완료 ({elapsed:.1f}초): 사용자 {users}명, 업무 {tasks}개, 완료 기록 {logs}건 → {db_path}")
+    if carried:
+        print(f"   ↪️ 로컬 테이블 유지: {', '.join(carried)}")
+    return {"users": users, "tasks": tasks, "completion_logs": logs, "carried": carried,
+            "seconds": round(elapsed, 2)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Supabase 데이터로 로컬 SQLite 초기화")
+    parser.add_argument("--db", default=db.DB_PATH, help="교체할 SQLite 파일")
+    parser.add_argument("--log-days", type=int, default=LOG_DAYS, help="가져올 완료 기록 기간(일)")
+    parser.add_argument("--page-size", type=int, default=None, help="요청당 행 수 (기본 SUPABASE_PAGE_SIZE)")
+    args = parser.parse_args()
+    bootstrap(args.db, args.log_days, args.page_size)
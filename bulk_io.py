@@ -0,0 +1,314 @@
+# bulk_io.py - 사용자/업무/완료 기록 CSV·JSON Lines 대량 가져오기/내보내기
+# 양방향 모두 스트리밍: 내보내기는 키 순서로 BATCH_ROWS 행씩 (묶음마다 짧은 연결로) 읽어 바로 쓰고
+# (파일 또는 HTTP 응답), 가져오기는 파일을 한 줄씩 읽어 검증한 뒤 BATCH_ROWS 행마다 한 트랜잭션으로
+# upsert 한다. 파일에 있는 컬럼만 갱신하고(기존 hmac_token 은 유지), 제약에 걸린 묶음은
+# 한 행씩 다시 넣어 문제 행만 errors 에 남긴다.
+#
+#   python bulk_io.py export tasks --format csv -o tasks.csv
+#   python bulk_io.py export completion_logs --format jsonl --since 2026-10-01
+#   python bulk_io.py import users users.csv
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+from db import get_conn
+from mailer import make_row_token
+
+BATCH_ROWS = int(os.getenv("BULK_BATCH_ROWS", "5000"))
+FORMATS = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+
+# 테이블별 컬럼, 키(정렬/upsert 기준), 필수 컬럼, 기간 필터 컬럼
+TABLES = {
+    "users": {
+        "columns": ("email", "name"),
+        "key": "email",
+        "required": ("email",),
+        "since": None,
+    },
+    "tasks": {
+        "columns": ("id", "title", "assignee_email", "frequency", "due_date", "status",
+                    "hmac_token", "last_completed_at", "updated_at", "assignee"),
+        "key": "id",
+        "required": ("title", "frequency"),
+        "since": "updated_at",
+    },
+    "completion_logs": {
+        "columns": ("id", "task_id", "completed_at", "completion_method", "notes"),
+        "key": "id",
+        "required": ("task_id", "completed_at"),
+        "since": "completed_at",
+    },
+}
+
+FREQUENCIES = {"daily", "weekly", "monthly", "quarterly"}
+STATUSES = {"pending", "done"}
+
+def _spec(table: str) -> dict:
+    if table not in TABLES:
+        raise ValueError(f"지원하지 않는 테이블: {table} (가능: {', '.join(TABLES)})")
+    return TABLES[table]
+
+# ========== 내보내기 ==========
+
+def iter_export(table: str, fmt: str = "csv", since: str = None, batch_rows: int = BATCH_ROWS):
+    """테이블을 키 순서로 읽어 CSV/JSONL 텍스트 조각을 반환 (BATCH_ROWS 행 단위)
+
+    StreamingResponse 나 파일 쓰기에 그대로 넘길 수 있다. 응답을 보내는 동안 읽기 트랜잭션을
+    잡고 있으면 (WAL 이 아닌) SQLite 쓰기가 막히므로, 묶음마다 마지막 키 다음부터 새 연결로 읽는다."""
+    spec = _spec(table)
+    if fmt not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식: {fmt}")
+    columns, key = spec["columns"], spec["key"]
+    filters, params = [], []
+    if since and spec["since"]:
+        filters.append(f"{spec['since']} >= ?")
+        params.append(since)
+
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n") if fmt == "csv" else None
+    if writer:
+        writer.writerow(columns)
+    last = None
+    while True:
+        where = filters + ([f"{key} > ?"] if last is not None else [])
+        sql = f"SELECT {', '.join(columns)} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {key} LIMIT ?"
+        with get_conn() as conn:
+            rows = conn.execute(sql, params + ([last] if last is not None else []) + [batch_rows]).fetchall()
+        if not rows:
+            break
+        if writer:
+            writer.writerows(tuple(r) for r in rows)
+        else:
+            buf.writelines(json.dumps(dict(r), ensure_ascii=False) + "\n" for r in rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        if len(rows) < batch_rows:
+            break
+        last = rows[-1][key]
+    if buf.tell():
+        yield buf.getvalue()
+
+def export_table(table: str, path: str = "-", fmt: str = None, since: str = None) -> int:
+    """테이블을 파일(또는 '-' 이면 표준 출력)로 내보내고 쓴 글자 수를 반환"""
+    fmt = fmt or _format_for(path)
+    out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+    written = 0
+    try:
+        for text in iter_export(table, fmt, since):
+            out.write(text)
+            written += len(text)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return written
+
+def _format_for(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return {".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl"}.get(ext, "csv")
+
+# ========== 가져오기 ==========
+
+def _bad_row(item):
+    line_no, reason = item
+    return line_no, None, reason
+
+def _decoded_lines(f, bad: list):
+    """바이너리 파일을 줄 단위로 UTF-8 디코딩 - 깨진 줄은 (줄 번호, 오류) 를 bad 에 넣고 빈 줄로 대신"""
+    for line_no, raw in enumerate(f, 1):
+        try:
+            yield raw.decode("utf-8-sig" if line_no == 1 else "utf-8")
+        except UnicodeDecodeError as e:
+            bad.append((line_no, f"인코딩 오류: {e}"))
+            yield "\n"
+
+def _read_rows(path: str, fmt: str):
+    """(줄 번호, dict, 오류) 를 한 행씩 반환 - 빈 값은 키째 빼고, 읽을 수 없는 줄은 dict 대신 오류
+
+    빈 값을 빼 두면 파일에 없는 컬럼과 같이 취급되어 upsert 가 기존 값을 지우지 않는다."""
+    bad = []
+    with open(path, "rb") as f:
+        lines = _decoded_lines(f, bad)
+        if fmt == "csv":
+            reader = csv.DictReader(lines)
+            for row in reader:
+                while bad:
+                    yield _bad_row(bad.pop(0))
+                yield reader.line_num, {k: v for k, v in row.items() if k and v not in (None, "")}, None
+        else:
+            for line_no, line in enumerate(lines, 1):
+                while bad:
+                    yield _bad_row(bad.pop(0))
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, None, f"JSON 오류: {e}"
+                    continue
+                if isinstance(row, dict):
+                    yield line_no, {k: v for k, v in row.items() if v is not None}, None
+                else:
+                    yield line_no, None, "JSON 객체가 아님"
+    while bad:
+        yield _bad_row(bad.pop(0))
+
+def _validate(table: str, row: dict) -> str:
+    """행 검증 - 문제가 있으면 이유를, 없으면 None"""
+    spec = TABLES[table]
+    missing = [c for c in spec["required"] if row.get(c) in (None, "")]
+    if missing:
+        return f"필수 값 없음: {missing}"
+    if table == "tasks":
+        if row["frequency"] not in FREQUENCIES:
+            return f"잘못된 주기: {row['frequency']}"
+        if row.get("status") and row["status"] not in STATUSES:
+            return f"잘못된 상태: {row['status']}"
+    if table == "users" and "@" not in row["email"]:
+        return f"잘못된 이메일: {row['email']}"
+    return None
+
+def _row_columns(table: str, row: dict) -> tuple:
+    """행에 실제로 있는 컬럼만 (파일에 없는 컬럼은 넣지도 덮어쓰지도 않음)"""
+    return tuple(c for c in TABLES[table]["columns"] if c in row)
+
+def _upsert_sql(table: str, columns) -> str:
+    """columns 만 넣고 갱신하는 upsert - 이미 있는 hmac_token 은 보낸 메일 링크가 깨지지 않도록 유지"""
+    key = TABLES[table]["key"]
+    updates = ", ".join(
+        f"{c} = COALESCE({table}.{c}, excluded.{c})" if c == "hmac_token" else f"{c} = excluded.{c}"
+        for c in columns if c != key
+    )
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    return f"""
+        INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+        ON CONFLICT({key}) {action}
+    """
+
+def _prepare_tasks(conn, rows: list):
+    """ID 가 없는 업무는 새 ID 를 미리 잡고, 토큰이 없으면 새로 만든다 (기존 업무의 토큰은 upsert 가 유지)"""
+    next_id = conn.execute("""
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tasks'), 0),
+                   COALESCE((SELECT MAX(id) FROM tasks), 0)) + 1
+    """).fetchone()[0]
+    for row in rows:
+        if row.get("id") is not None:
+            row["id"] = int(row["id"])
+            next_id = max(next_id, row["id"] + 1)
+    for row in rows:
+        if row.get("id") is None:
+            row["id"] = next_id
+            next_id += 1
+        row["hmac_token"] = row.get("hmac_token") or make_row_token(row["id"])
+
+def _upsert(conn, table: str, rows: list):
+    """컬럼 구성이 같은 행끼리 묶어 executemany"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(_row_columns(table, row), []).append(row)
+    for columns, group in groups.items():
+        conn.executemany(_upsert_sql(table, columns), ([row[c] for c in columns] for row in group))
+
+def _write_batch(conn, table: str, batch: list) -> int:
+    """검증된 (줄 번호, 행) 묶음을 한 트랜잭션으로 upsert (실패 시 롤백 후 예외)"""
+    rows = [row for _, row in batch]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if table == "tasks":
+            _prepare_tasks(conn, rows)
+        _upsert(conn, table, rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
+
+def _write_rows(conn, table: str, batch: list, report: dict) -> int:
+    """묶음 upsert 가 실패했을 때 한 행씩 (행마다 SAVEPOINT) 다시 넣고 실패한 행은 report 에 기록"""
+    written = 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for line_no, row in batch:
+            conn.execute("SAVEPOINT bulk_row")
+            try:
+                if table == "tasks":
+                    _prepare_tasks(conn, [row])
+                _upsert(conn, table, [row])
+                written += 1
+            except (sqlite3.DatabaseError, ValueError, TypeError) as e:
+                conn.execute("ROLLBACK TO bulk_row")
+                _record_error(report, "failed", line_no, str(e))
+            conn.execute("RELEASE bulk_row")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return written
+
+def _record_error(report: dict, kind: str, line_no: int, reason: str):
+    report[kind] += 1
+    if len(report["errors"]) < 100:
+        report["errors"].append({"line": line_no, "error": reason})
+
+def _flush(conn, table: str, batch: list, report: dict):
+    try:
+        report["written"] += _write_batch(conn, table, batch)
+    except (sqlite3.DatabaseError, ValueError, TypeError) as e:
+        print(f"   ⚠️ {batch[0][0]}~{batch[-1][0]}행 묶음 실패, 한 행씩 다시 시도: {e}")
+        report["written"] += _write_rows(conn, table, batch, report)
+
+def import_file(table: str, path: str, fmt: str = None, batch_rows: int = BATCH_ROWS) -> dict:
+    """CSV/JSONL 파일을 스트리밍으로 읽어 upsert 하고 결과 요약을 반환
+
+    읽을 수 없거나 검증에 걸린 행(invalid)과 DB 제약에 걸린 행(failed)은 건너뛰고
+    줄 번호와 이유를 errors 에 남긴다 (처음 100건)."""
+    _spec(table)
+    fmt = fmt or _format_for(path)
+    report = {"table": table, "rows": 0, "written": 0, "invalid": 0, "failed": 0, "errors": []}
+    batch = []
+    with get_conn() as conn:
+        for line_no, row, error in _read_rows(path, fmt):
+            report["rows"] += 1
+            reason = error or _validate(table, row)
+            if reason:
+                _record_error(report, "invalid", line_no, reason)
+                continue
+            batch.append((line_no, row))
+            if len(batch) >= batch_rows:
+                _flush(conn, table, batch, report)
+                batch = []
+        if batch:
+            _flush(conn, table, batch, report)
+
+    print(f"✅ {table} 가져오기 완료: {report['rows']}행 중 {report['written']}행 반영, "
+          f"잘못된 행 {report['invalid']}개, 반영 실패 {report['failed']}개")
+    for err in report["errors"][:10]:
+        print(f"   ⚠️ {err['line']}행: {err['error']}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV/JSON Lines 대량 가져오기/내보내기")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="테이블 내보내기")
+    exp.add_argument("table", choices=list(TABLES))
+    exp.add_argument("-o", "--output", default="-", help="출력 파일 (기본: 표준 출력)")
+    exp.add_argument("--format", choices=list(FORMATS), help="기본: 파일 확장자, 없으면 csv")
+    exp.add_argument("--since", help="이 시각 이후 행만 (tasks: updated_at, completion_logs: completed_at)")
+    imp = sub.add_parser("import", help="파일 가져오기 (upsert)")
+    imp.add_argument("table", choices=list(TABLES))
+    imp.add_argument("path")
+    imp.add_argument("--format", choices=list(FORMATS), help="기본: 파일 확장자")
+    imp.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="트랜잭션당 행 수")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_table(args.table, args.output, args.format, args.since)
+    else:
+        result = import_file(args.table, args.path, args.format, args.batch_rows)
+        raise SystemExit(1 if result["invalid"] or result["failed"] else 0)
@@ -0,0 +1,113 @@
+# circuit_breaker.py - 원격 백엔드(Supabase) 장애 시 빠른 전환용 회로 차단기
+# 연속 실패가 쌓이면 회로를 열어(open) 일정 시간 동안 요청을 바로 거절하고,
+# 호출하는 쪽은 네트워크 타임아웃을 기다리지 않고 즉시 SQLite 로 넘어간다.
+# reset_timeout 이 지나면 반열림(half-open) 상태에서 요청 하나로 복구 여부를 확인한다.
+import random
+import threading
+import time
+import logging
+from metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_state = Gauge(
+    "circuit_breaker_state", "회로 차단기 상태 (0=closed, 1=half_open, 2=open)", ("name",))
+circuit_transitions = Counter(
+    "circuit_breaker_transitions_total", "회로 차단기 상태 전환 수", ("name", "state"))
+circuit_rejections = Counter(
+    "circuit_breaker_rejections_total", "회로가 열려 바로 거절된 요청 수", ("name",))
+
+class CircuitOpen(RuntimeError):
+    """회로가 열려 있어 원격 호출을 하지 않고 거절할 때 발생"""
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30,
+                 is_failure=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        # 예외가 장애로 볼 만한 것인지 판단 (기본: 모든 예외)
+        self.is_failure = is_failure or (lambda exc: True)
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        circuit_state.set_function(lambda: _STATE_VALUES[self.state], name=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == OPEN
+
+    def _transition(self, state: str):
+        # self._lock 을 잡은 상태에서 호출
+        if state == self._state:
+            return
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state != HALF_OPEN:
+            self._probing = False
+        circuit_transitions.inc(name=self.name, state=state)
+        logger.warning(f"🔌 회로 차단기 {self.name}: {state}")
+
+    def allow(self) -> bool:
+        """지금 원격 호출을 해도 되는지 (반열림 상태에서는 확인 요청 하나만 허용)"""
+        state = self.state
+        with self._lock:
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        circuit_rejections.inc(name=self.name)
+        return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._transition(OPEN)
+
+    def call(self, fn, *args, retries: int = 0, backoff: float = 0.2, **kwargs):
+        """fn 을 회로 차단기 아래에서 실행
+
+        retries 는 멱등 읽기에만 지정한다. 장애성 예외가 나면 지터를 준
+        지수 백오프(backoff * 2^n * [0.5, 1.5)) 후 다시 시도한다."""
+        attempt = 0
+        while True:
+            if not self.allow():
+                raise CircuitOpen(f"{self.name} 회로가 열려 있습니다")
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                if not self.is_failure(exc):
+                    # 서버가 응답한 오류(제약 조건 위반 등)는 장애가 아님
+                    self.record_success()
+                    raise
+                self.record_failure()
+                if attempt >= retries or self.is_open:
+                    raise
+                time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+                attempt += 1
+                continue
+            self.record_success()
+            return result
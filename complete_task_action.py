@@ -1,8 +1,8 @@
 # complete_task_action.py - GitHub Actions로 업무 완료 처리
 import os
 import sqlite3
-from datetime import datetime
 import sys
+from db import kst_now
 
 def complete_task_by_token(token):
     """토큰으로 업무 완료 처리"""
@@ -21,11 +21,11 @@ def complete_task_by_token(token):
             print(f"❌ 토큰에 해당하는 업무를 찾을 수 없습니다: {token}")
             return False
         
-        # 업무 완료 처리
-        now = datetime.now().isoformat()
+        # 업무 완료 처리 (Actions 러너는 UTC 이므로 KST 시각을 시간대와 함께 기록)
+        now = kst_now().isoformat()
         conn.execute(
-            "UPDATE tasks SET status = 'done', last_completed_at = ? WHERE id = ?",
-            (now, task['id'])
+            "UPDATE tasks SET status = 'done', last_completed_at = ?, updated_at = ? WHERE id = ?",
+            (now, now, task['id'])
         )
         conn.commit()
         conn.close()
@@ -3,13 +3,14 @@ import sqlite3
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
+from metrics import TimedConnection
 
 DB_PATH = "reminder.db"
 KST = ZoneInfo("Asia/Seoul")
 
 @contextmanager
 def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
@@ -30,6 +31,15 @@ def cycle_start(frequency: str, now: datetime) -> datetime:
         return d0.replace(day=1)
     return d0
 
+def next_cycle_start(frequency: str, now: datetime) -> datetime:
+    """다음 주기의 시작 시각 (주기 전환 시점)"""
+    start = cycle_start(frequency, now)
+    if frequency == "weekly":
+        return start + timedelta(days=7)
+    elif frequency == "monthly":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
 def active_tasks_for_today(email: str):
     now = kst_now()
     cs_daily   = cycle_start("daily",   now).isoformat()
@@ -52,28 +62,264 @@ def active_tasks_for_today(email: str):
     with get_conn() as conn:
         return conn.execute(q, (email, cs_daily, cs_weekly, cs_monthly)).fetchall()
 
+def find_task(conn, token: str, pending_only: bool = False):
+    """토큰으로 업무 조회
+
+    자체 검증 토큰(v1./v2.)은 서명 확인 후 find_task_by_id 로 조회하고,
+    기존 토큰은 hmac_token 컬럼으로 조회한다."""
+    from mailer import is_signed_token, verify_task_token
+    if is_signed_token(token):
+        claims = verify_task_token(token)
+        if claims is None:
+            return None
+        return find_task_by_id(conn, claims["task_id"], claims["row_key"], pending_only)
+    status_clause = " AND status = 'pending'" if pending_only else ""
+    return conn.execute(
+        "SELECT * FROM tasks WHERE hmac_token = ?" + status_clause, (token,)
+    ).fetchone()
+
+def find_task_by_id(conn, task_id: int, key: str = None, pending_only: bool = False):
+    """토큰에 담긴 업무 ID 로 조회
+
+    토큰은 Supabase 의 업무 ID 로 만들어질 수 있고 SQLite 의 ID 와 같다는 보장이 없으므로,
+    행 키(hmac_token 앞부분)가 있으면 같은 업무인지 확인하고 다르면 행 키로 다시 찾는다.
+    행 키로 찾은 업무가 하나가 아니면 None."""
+    status_clause = " AND status = 'pending'" if pending_only else ""
+    task = conn.execute("SELECT * FROM tasks WHERE id = ?" + status_clause, (task_id,)).fetchone()
+    if not key or (task is not None and (task["hmac_token"] or "").startswith(key)):
+        return task
+    # GLOB 접두어 검색은 hmac_token UNIQUE 인덱스를 탄다
+    rows = conn.execute(
+        "SELECT * FROM tasks WHERE hmac_token GLOB ?" + status_clause + " LIMIT 2", (key + "*",)
+    ).fetchall()
+    return rows[0] if len(rows) == 1 else None
+
 def mark_done_by_token(token: str) -> bool:
     now_iso = kst_now().isoformat()
     with get_conn() as conn:
+        task = find_task(conn, token)
+        if task is None:
+            return False
         cur = conn.execute(
-            "UPDATE tasks SET status='done', last_completed_at=?, updated_at=? WHERE hmac_token=?",
-            (now_iso, now_iso, token)
+            "UPDATE tasks SET status='done', last_completed_at=?, updated_at=? WHERE id=?",
+            (now_iso, now_iso, task["id"])
         )
         return cur.rowcount == 1
 
 def get_task_by_token(token: str):
     with get_conn() as conn:
-        return conn.execute("SELECT * FROM tasks WHERE hmac_token=?", (token,)).fetchone()
+        return find_task(conn, token)
 
 def all_recipients():
     with get_conn() as conn:
         return [r["email"] for r in conn.execute("SELECT email FROM users")]
 
+# 조회용 인덱스 - 대량 적재(bootstrap_from_supabase.py) 때는 적재 후에 만든다
+INDEX_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee_due ON tasks(assignee_email, frequency, last_completed_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_completion_logs_task_id ON completion_logs(task_id);
+"""
+
+# 삭제 기록(툼스톤) - 양방향 동기화(reconcile.py)에서 삭제를 상대 저장소로 전파할 때 사용
+TOMBSTONE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_tombstones (
+  id INTEGER PRIMARY KEY,
+  deleted_at TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS trg_task_tombstone AFTER DELETE ON tasks
+BEGIN
+  INSERT OR REPLACE INTO task_tombstones (id, deleted_at)
+  VALUES (OLD.id, strftime('%Y-%m-%dT%H:%M:%S+09:00', 'now', '+9 hours'));
+END;
+"""
+
 def init_schema():
     with open("schema.sql", "r", encoding="utf-8") as f:
         sql = f.read()
     with get_conn() as conn:
-        for stmt in sql.split(";"):
-            s = stmt.strip()
-            if s:
-                conn.execute(s + ";")
+        # 트리거 본문(BEGIN ... END)에 ';'가 들어가므로 executescript 사용
+        conn.executescript(sql)
+        conn.executescript(INDEX_SCHEMA)
+        conn.executescript(TOMBSTONE_SCHEMA)
+        conn.execute(STATE_SCHEMA)
+        ensure_stats_schema(conn)
+
+# ========== 통계 카운터 (트리거로 증분 유지) ==========
+# tasks 변경 시 트리거가 카운터를 갱신하므로 통계 조회는 단일 행 읽기로 끝난다.
+# task_daily_completions 는 last_completed_at 의 날짜(앞 10자리, KST)별 업무 수.
+# Supabase 의 get_task_statistics 도 같은 정의(마지막 완료가 그날인 업무 수)를 쓴다.
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_counters (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  total INTEGER NOT NULL DEFAULT 0,
+  done INTEGER NOT NULL DEFAULT 0,
+  pending INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS task_daily_completions (
+  day TEXT PRIMARY KEY,
+  count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS trg_task_counters_insert AFTER INSERT ON tasks
+BEGIN
+  UPDATE task_counters
+     SET total = total + 1,
+         done = done + (NEW.status = 'done'),
+         pending = pending + (NEW.status = 'pending')
+   WHERE id = 1;
+  INSERT INTO task_daily_completions (day, count)
+  SELECT substr(NEW.last_completed_at, 1, 10), 1 WHERE NEW.last_completed_at IS NOT NULL
+  ON CONFLICT(day) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_task_counters_update AFTER UPDATE OF status, last_completed_at ON tasks
+BEGIN
+  UPDATE task_counters
+     SET done = done + (NEW.status = 'done') - (OLD.status = 'done'),
+         pending = pending + (NEW.status = 'pending') - (OLD.status = 'pending')
+   WHERE id = 1;
+  UPDATE task_daily_completions SET count = count - 1
+   WHERE OLD.last_completed_at IS NOT NULL AND day = substr(OLD.last_completed_at, 1, 10);
+  INSERT INTO task_daily_completions (day, count)
+  SELECT substr(NEW.last_completed_at, 1, 10), 1 WHERE NEW.last_completed_at IS NOT NULL
+  ON CONFLICT(day) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_task_counters_delete AFTER DELETE ON tasks
+BEGIN
+  UPDATE task_counters
+     SET total = total - 1,
+         done = done - (OLD.status = 'done'),
+         pending = pending - (OLD.status = 'pending')
+   WHERE id = 1;
+  UPDATE task_daily_completions SET count = count - 1
+   WHERE OLD.last_completed_at IS NOT NULL AND day = substr(OLD.last_completed_at, 1, 10);
+END;
+"""
+
+_stats_ready = set()
+
+def _db_key(conn) -> str:
+    """스키마 준비 여부를 기억할 키 - 연결이 연 DB 파일 경로 (메모리 DB 는 연결마다 따로)"""
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return path or f"memory:{id(conn)}"
+
+def ensure_stats_schema(conn):
+    """카운터 테이블/트리거 생성 후, 처음 한 번만 기존 tasks 로 초기값을 채운다."""
+    conn.executescript(STATS_SCHEMA)
+    seeded = conn.execute("SELECT 1 FROM task_counters WHERE id = 1").fetchone()
+    if not seeded:
+        conn.execute("""
+            INSERT INTO task_counters (id, total, done, pending)
+            SELECT 1, COUNT(*),
+                   COALESCE(SUM(status = 'done'), 0),
+                   COALESCE(SUM(status = 'pending'), 0)
+            FROM tasks
+        """)
+        conn.execute("DELETE FROM task_daily_completions")
+        conn.execute("""
+            INSERT INTO task_daily_completions (day, count)
+            SELECT substr(last_completed_at, 1, 10), COUNT(*)
+            FROM tasks WHERE last_completed_at IS NOT NULL
+            GROUP BY substr(last_completed_at, 1, 10)
+        """)
+        conn.commit()
+    _stats_ready.add(_db_key(conn))
+
+def get_task_stats(conn, day: str = None) -> dict:
+    """전체/완료/진행 중/오늘 완료 업무 수 - 카운터 테이블 단일 행 조회"""
+    if _db_key(conn) not in _stats_ready:
+        ensure_stats_schema(conn)
+    if day is None:
+        day = kst_now().strftime('%Y-%m-%d')
+    row = conn.execute("SELECT total, done, pending FROM task_counters WHERE id = 1").fetchone()
+    today = conn.execute(
+        "SELECT count FROM task_daily_completions WHERE day = ?", (day,)
+    ).fetchone()
+    return {
+        'total_tasks': row[0],
+        'completed_tasks': row[1],
+        'pending_tasks': row[2],
+        'today_completed': today[0] if today else 0
+    }
+
+# ========== 시스템 상태 (마지막 발송/동기화 시각 등) ==========
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS system_settings (
+  key TEXT PRIMARY KEY,
+  value TEXT,
+  updated_at TEXT
+);
+"""
+
+_state_ready = set()
+
+def _ensure_state(conn):
+    # /readyz 가 자주 부르므로 테이블 생성은 DB 파일마다 한 번만
+    key = _db_key(conn)
+    if key not in _state_ready:
+        conn.execute(STATE_SCHEMA)
+        _state_ready.add(key)
+
+def set_state(conn, key: str, value: str):
+    _ensure_state(conn)
+    conn.execute(
+        """INSERT INTO system_settings (key, value, updated_at) VALUES (?, ?, ?)
+           ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at""",
+        (key, value, kst_now().isoformat())
+    )
+
+def get_state(conn, key: str):
+    _ensure_state(conn)
+    row = conn.execute("SELECT value FROM system_settings WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+# ========== 스케줄러 실행 기록 ==========
+# scheduler.py 가 예약 작업을 실행할 때마다(또는 놓쳤을 때) 한 행씩 남긴다
+# executescript 는 열린 트랜잭션을 먼저 커밋하므로 문장마다 execute 로 실행
+SCHEDULER_RUN_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS scheduler_runs (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      job_id TEXT NOT NULL,
+      scheduled_at TEXT,
+      started_at TEXT,
+      finished_at TEXT,
+      duration_ms INTEGER,
+      outcome TEXT NOT NULL,
+      done INTEGER,
+      total INTEGER,
+      message TEXT,
+      error TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_scheduler_runs_job ON scheduler_runs(job_id, id)",
+)
+
+_scheduler_runs_ready = set()
+
+def _ensure_scheduler_runs(conn):
+    key = _db_key(conn)
+    if key not in _scheduler_runs_ready:
+        for statement in SCHEDULER_RUN_SCHEMA:
+            conn.execute(statement)
+        # 호출한 쪽 트랜잭션 안에서 만들었으면 롤백될 수 있으므로 준비 완료로 기억하지 않음
+        if not conn.in_transaction:
+            _scheduler_runs_ready.add(key)
+
+def record_scheduler_run(conn, job_id: str, outcome: str, **fields) -> int:
+    _ensure_scheduler_runs(conn)
+    columns = ["job_id", "outcome"] + list(fields)
+    cur = conn.execute(
+        f"INSERT INTO scheduler_runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        [job_id, outcome] + list(fields.values())
+    )
+    return cur.lastrowid
+
+def recent_scheduler_runs(conn, limit: int = 50, job_id: str = None) -> list:
+    _ensure_scheduler_runs(conn)
+    sql = "SELECT * FROM scheduler_runs"
+    params = []
+    if job_id:
+        sql += " WHERE job_id = ?"
+        params.append(job_id)
+    sql += " ORDER BY id DESC LIMIT ?"
+    return [dict(r) for r in conn.execute(sql, params + [limit])]
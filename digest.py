@@ -2,8 +2,11 @@
 from datetime import datetime
 from zoneinfo import ZoneInfo
 import yaml
-from supabase_client import supabase_manager
-from mailer import make_token, build_task_url, send_email
+from supabase_client import get_supabase_manager
+from mailer import make_task_token, make_row_token, row_key, make_batch_token, build_task_url, build_batch_url, send_email, DigestFailed
+from db import get_conn, set_state, next_cycle_start
+from metrics import digest_run_duration, digest_emails, queue_depth
+from jobs import JobCancelled
 
 KST = ZoneInfo("Asia/Seoul")
 
@@ -11,16 +14,29 @@ def _load_cfg():
     with open("config.yaml", "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
+def backfill_tokens(tasks, supabase_manager):
+    """hmac_token 이 없는 업무에 새 토큰을 저장
+
+    링크의 행 키가 없으면 업무 ID 만으로 찾게 되어, 다른 저장소의 같은 ID 업무가 완료될 수 있다.
+    저장에 실패한 업무는 hmac_token 없이 남고 html_for_tasks 가 링크를 만들지 않는다."""
+    for t in tasks:
+        if t.get("hmac_token"):
+            continue
+        token = make_row_token(t["id"])
+        if supabase_manager.update_task_token(t["id"], token):
+            t["hmac_token"] = token
+        else:
+            print(f"[WARNING] ⚠️ 업무 {t['id']} 토큰 저장 실패 - 이번 메일에서 제외")
+
 def html_for_tasks(tasks, base_url, dashboard_url=None):
+    # 행 키 없는 링크는 만들지 않는다 (backfill_tokens 참고)
+    tasks = [t for t in tasks if t.get("hmac_token")]
     if not tasks:
         return None
     rows = []
     for t in tasks:
-        token = t.get("hmac_token")
-        if not token:
-            token = make_token(t["id"])
-            # Supabase로 토큰 업데이트
-            supabase_manager.update_task_token(t["id"], token)
+        # 업무 ID 와 행 키(hmac_token 앞부분)를 담은 자체 검증 토큰 - 미리 저장해 둘 필요 없음
+        token = make_task_token(t["id"], t["frequency"], key=row_key(t.get("hmac_token")))
         url = build_task_url(base_url, token)
         if dashboard_url:
             sep = "&" if "?" in url else "?"
@@ -41,7 +57,11 @@ def html_for_tasks(tasks, base_url, dashboard_url=None):
           </tr>
         """)
     # GET 링크(메일 클라이언트가 form post를 막는 경우 대비)
-    get_link = f"{base_url}/complete-tasks" + "" + ("".join(["&task="+t.get("hmac_token") if i>0 else "?task="+t.get("hmac_token") for i,t in enumerate(tasks) if t.get("hmac_token")]))
+    # 전체 업무를 담은 일괄 완료 토큰 하나 (주기가 가장 먼저 끝나는 업무 기준으로 만료)
+    now = datetime.now(KST)
+    expires_at = min(next_cycle_start(t["frequency"], now) for t in tasks)
+    get_link = build_batch_url(base_url, make_batch_token(
+        [t["id"] for t in tasks], expires_at, {t["id"]: row_key(t.get("hmac_token")) for t in tasks}))
 
     table = f"""
       <form action="{base_url}/complete-tasks" method="post">
@@ -79,7 +99,14 @@ def html_for_tasks(tasks, base_url, dashboard_url=None):
       </div>
     """
 
-def run_daily_digest():
+def run_daily_digest(job=None):
+    """job(jobs.Job) 이 주어지면 진행 상황을 기록하고 취소 요청 시 중단
+
+    대상자/발송/실패 건수를 dict 로 반환하고, 한 통도 보내지 못했으면 DigestFailed 를 던진다."""
+    with digest_run_duration.time():
+        return _run_daily_digest(job)
+
+def _run_daily_digest(job=None):
     try:
         cfg = _load_cfg()
         base_url = cfg["base_url"]
@@ -87,14 +114,21 @@ def run_daily_digest():
         mail_cfg = cfg["smtp"]
 
         # Supabase에서 이메일 수신자 목록 가져오기
+        supabase_manager = get_supabase_manager()
         recipients = supabase_manager.get_all_recipients()
-        sent_count = 0
+        # 수신자별 오늘 업무를 묶어서 한 번에 조회
+        tasks_by_email = supabase_manager.active_tasks_for_emails(recipients)
+        sent_count = failed_count = 0
         
         print(f"[INFO] 📧 이메일 발송 시작 - 대상자: {len(recipients)}명")
         
-        for r in recipients:
-            # Supabase에서 오늘 할 업무 가져오기
-            tasks = supabase_manager.active_tasks_for_today(r)
+        for i, r in enumerate(recipients):
+            if job:
+                job.check_cancelled()
+                job.set_progress(i, len(recipients), r)
+            queue_depth.set(len(recipients) - i - 1, queue="digest")
+            tasks = tasks_by_email.get(r, [])
+            backfill_tokens(tasks, supabase_manager)
             print(f"[DEBUG] {r}의 오늘 업무: {len(tasks)}개")
             
             if tasks:
@@ -117,27 +151,43 @@ def run_daily_digest():
                         html_body=html
                     )
                     sent_count += 1
+                    digest_emails.inc(status="sent")
                     print(f"[SUCCESS] ✅ {r}에게 이메일 발송 성공")
                     
                     # Supabase에 이메일 발송 기록 저장
                     log_email_sent(r, len(tasks))
                     
                 except Exception as e:
+                    failed_count += 1
+                    digest_emails.inc(status="failed")
                     print(f"[ERROR] ❌ {r}에게 이메일 발송 실패: {e}")
                     log_email_sent(r, len(tasks), "failed", str(e))
             else:
                 print(f"[DEBUG] {r}: 오늘 할 업무가 없음")
         
-        print(f"[SUCCESS] 🎉 총 {sent_count}명에게 이메일 발송 완료")
-        return sent_count > 0
+        print(f"[SUCCESS] 🎉 총 {sent_count}명에게 이메일 발송 완료 (실패 {failed_count}명)")
+        if job:
+            job.set_progress(len(recipients), len(recipients), f"{sent_count}명 발송, {failed_count}명 실패")
+        if failed_count and not sent_count:
+            raise DigestFailed(f"{failed_count}명 모두 발송 실패")
+        try:
+            with get_conn() as conn:
+                set_state(conn, "last_digest_at", datetime.now(KST).isoformat())
+        except Exception as e:
+            print(f"[WARNING] 발송 시각 기록 실패: {e}")
+        return {"recipients": len(recipients), "sent": sent_count, "failed": failed_count}
         
+    except JobCancelled:
+        print("[INFO] 이메일 발송 작업이 취소되었습니다")
+        raise
     except Exception as e:
         print(f"[CRITICAL ERROR] ❌ Digest execution failed: {e}")
-        return False
+        raise
 
 def log_email_sent(recipient_email, task_count, status="sent", error_message=None):
     """이메일 발송 기록을 Supabase에 저장"""
     try:
+        supabase_manager = get_supabase_manager()
         data = {
             'recipient_email': recipient_email,
             'subject': '[일일 알림] 오늘의 해야할 일 📋',
@@ -146,14 +196,15 @@ def log_email_sent(recipient_email, task_count, status="sent", error_message=Non
             'error_message': error_message,
             'sent_at': supabase_manager.kst_now().isoformat()
         }
-        supabase_manager.supabase.table('email_logs').insert(data).execute()
+        supabase_manager.add_email_log(data)
     except Exception as e:
         print(f"[WARNING] 이메일 발송 기록 저장 실패: {e}")
 
 if __name__ == "__main__":
     print("🚀 일일 알림 이메일 발송 시작...")
-    success = run_daily_digest()
-    if success:
-        print("✅ 이메일 발송 완료!")
-    else:
+    try:
+        result = run_daily_digest()
+    except Exception:
         print("❌ 이메일 발송 실패!")
+        raise SystemExit(1)
+    print(f"✅ 이메일 발송 완료! ({result['sent']}명 발송, {result['failed']}명 실패)")
@@ -1,6 +1,9 @@
 import sqlite3
 from jinja2 import Template
 from datetime import datetime
+from static_assets import asset_url
+
+CHART_JS_CDN = "https://cdn.jsdelivr.net/npm/chart.js"
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -9,7 +12,7 @@ HTML_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>업무 대시보드</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+    <script src="{{ chart_js_src }}"></script>
     <style>
         body {
             font-family: Arial, sans-serif;
@@ -231,7 +234,9 @@ def generate_dashboard():
         overall_completed=overall_completed,
         overall_pending=overall_pending,
         assignee_data=assignee_data,
-        tasks=tasks
+        tasks=tasks,
+        # static/vendor 에 내려받은 Chart.js 가 있으면 CDN 대신 사용
+        chart_js_src=asset_url("vendor/chart.umd.min.js", fallback=CHART_JS_CDN)
     )
 
     with open("dashboard.html", "w", encoding="utf-8") as f:
@@ -1,10 +1,11 @@
 # import_from_excel.py - 엑셀 파일에서 데이터 가져오기
-import pandas as pd
 import sqlite3
 import os
 import glob
+import hashlib
 from contextlib import contextmanager
 from mailer import make_token
+from db import kst_now
 
 @contextmanager
 def get_conn():
@@ -55,6 +56,7 @@ def select_excel_file():
 
 def analyze_excel_structure(file_path):
     """엑셀 파일 구조 분석"""
+    import pandas as pd  # 무거운 모듈이므로 실제 가져오기 시에만 로드
     try:
         # 첫 번째 시트 읽기
         df = pd.read_excel(file_path)
@@ -69,8 +71,433 @@ def analyze_excel_structure(file_path):
         print(f"❌ 엑셀 파일 읽기 오류: {e}")
         return None
 
-def import_tasks_from_excel(file_path, title_col="제목", assignee_col="담당자", frequency_col="주기", email_col="이메일"):
-    """엑셀 파일에서 업무 데이터를 가져와 데이터베이스에 저장"""
+def normalize_frequency(values):
+    """주기 컬럼 정규화 (daily/weekly/monthly, 알 수 없으면 daily) - 벡터 연산"""
+    import numpy as np
+    text = values.astype(str).str.lower()
+    return np.select(
+        [text.str.contains('daily|일'), text.str.contains('weekly|주'), text.str.contains('monthly|월')],
+        ['daily', 'weekly', 'monthly'],
+        default='daily')
+
+def default_email(names):
+    """이메일이 없는 담당자의 기본 주소 (이름.소문자@company.com)"""
+    return names.str.lower().str.replace(' ', '.', regex=False) + '@company.com'
+
+def normalize_tasks(df, title_col="제목", assignee_col="담당자", frequency_col="주기", email_col="이메일"):
+    """엑셀 DataFrame -> title, assignee, frequency, email 컬럼의 정규화된 DataFrame (DB 접근 없음)
+
+    필수 값이 빠진 행은 버리고, email 은 시트에 적힌 값(없으면 NA)이다."""
+    import pandas as pd
+    frame = df[[title_col, assignee_col, frequency_col]].copy()
+    frame.columns = ['title', 'assignee', 'frequency']
+    frame['email'] = df[email_col] if email_col in df.columns else pd.NA
+    frame = frame.dropna(subset=['title', 'assignee', 'frequency'])
+    frame['title'] = frame['title'].astype(str)
+    frame['assignee'] = frame['assignee'].astype(str)
+    frame['frequency'] = normalize_frequency(frame['frequency'])
+    frame['email'] = frame['email'].where(frame['email'].notna(), None)
+    return frame.reset_index(drop=True)
+
+def _load_users(conn):
+    import pandas as pd
+    return pd.DataFrame(conn.execute("SELECT email, name FROM users").fetchall(), columns=['email', 'name'])
+
+def load_snapshot(conn) -> dict:
+    """중복 검사/이메일 매칭용 사용자와 기존 (제목, 이메일) 목록"""
+    return {
+        "users": _load_users(conn),
+        "existing": {tuple(r) for r in conn.execute("SELECT title, assignee_email FROM tasks")},
+    }
+
+def _resolve_emails(conn, frame, snapshot: dict):
+    """담당자 이메일을 정하고 새 담당자를 users 에 등록 -> (assignee_email 컬럼이 붙은 frame, 담당자 수)
+
+    호출하는 쪽의 트랜잭션 안에서 실행하며, snapshot["users"] 도 함께 갱신한다."""
+    import pandas as pd
+    users = snapshot["users"]
+    # 담당자별 이메일: 시트에 처음 적힌 이메일, 없으면 기본 주소
+    assignees = frame.groupby('assignee', sort=False)['email'].first().reset_index()
+    assignees['email'] = assignees['email'].fillna(default_email(assignees['assignee']))
+    new_users = assignees[~assignees['email'].isin(users['email'])]
+    conn.executemany("INSERT OR IGNORE INTO users (email, name) VALUES (?, ?)",
+                     new_users[['email', 'assignee']].itertuples(index=False, name=None))
+
+    # 업무 이메일: 행의 이메일 -> 같은 이름의 사용자 -> 기본 주소
+    by_name = pd.concat([users.rename(columns={'name': 'assignee'}), new_users]) \
+        .drop_duplicates('assignee').set_index('assignee')['email']
+    emails = frame['email'].fillna(frame['assignee'].map(by_name)).fillna(default_email(frame['assignee']))
+    snapshot["users"] = pd.concat([users, new_users.rename(columns={'assignee': 'name'})], ignore_index=True)
+    return frame.assign(assignee_email=emails), len(assignees)
+
+def _next_task_id(conn) -> int:
+    return conn.execute("""
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tasks'), 0),
+                   COALESCE((SELECT MAX(id) FROM tasks), 0)) + 1
+    """).fetchone()[0]
+
+def _insert_tasks(conn, tasks) -> tuple:
+    """ID/토큰을 미리 계산해 업무를 넣고 (ID 목록, 실제로 들어간 행 수) 반환"""
+    next_id = _next_task_id(conn)
+    ids = range(next_id, next_id + len(tasks))
+    cur = conn.executemany("""
+        INSERT OR IGNORE INTO tasks (id, title, assignee_email, frequency, status, assignee, hmac_token)
+        VALUES (?, ?, ?, ?, 'pending', ?, ?)
+    """, zip(ids, tasks['title'], tasks['assignee_email'], tasks['frequency'], tasks['assignee'],
+             (make_token(i) for i in ids)))
+    return list(ids), cur.rowcount
+
+def write_tasks(conn, frame, snapshot: dict = None) -> dict:
+    """정규화된 업무를 한 트랜잭션으로 저장
+
+    사용자/기존 업무는 한 번씩만 읽어 메모리에서 이메일 매칭과 중복 제거를 하고,
+    업무 ID 와 토큰을 미리 계산해 executemany 로 넣는다.
+    청크 단위로 여러 번 부를 때는 같은 snapshot 을 넘기면 DB 를 다시 읽지 않는다."""
+    import pandas as pd
+    if frame.empty:
+        return {"imported": 0, "duplicates": 0, "users": 0}
+
+    conn.execute("BEGIN IMMEDIATE")   # ID 를 미리 계산하므로 쓰기 잠금부터 잡음
+    try:
+        if snapshot is None:
+            snapshot = load_snapshot(conn)
+        existing = snapshot["existing"]
+        tasks, assignee_count = _resolve_emails(conn, frame, snapshot)
+
+        # 중복 제거: 이미 있는 (제목, 이메일) + 시트 안에서 반복된 행
+        keys = list(zip(tasks['title'], tasks['assignee_email']))
+        duplicate = pd.Series([k in existing for k in keys], index=tasks.index) \
+            | pd.Series(keys, index=tasks.index).duplicated()
+        tasks = tasks[~duplicate]
+
+        _, imported = _insert_tasks(conn, tasks)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    # 다음 청크가 방금 넣은 업무를 중복으로 보도록 스냅샷 갱신
+    existing.update(zip(tasks['title'], tasks['assignee_email']))
+    return {"imported": imported, "duplicates": int(duplicate.sum()) + len(tasks) - imported,
+            "users": assignee_count}
+
+# ========== 대용량 통합 문서 스트리밍 ==========
+# 이 크기 이상의 .xlsx 는 시트 전체를 DataFrame 으로 올리지 않고 행 단위로 읽는다
+STREAMING_THRESHOLD = int(os.getenv("EXCEL_STREAMING_BYTES", str(5 * 1024 * 1024)))
+CHUNK_ROWS = int(os.getenv("EXCEL_CHUNK_ROWS", "5000"))
+
+def iter_sheet_chunks(file_path, chunk_size: int = CHUNK_ROWS):
+    """모든 시트를 (시트 이름, DataFrame 청크) 로 chunk_size 행씩 반환
+
+    .xlsx 는 openpyxl read-only 모드로 행을 순회하므로 메모리는 청크 크기만큼만 쓴다.
+    각 시트의 첫 번째 비어 있지 않은 행을 헤더로 본다."""
+    import pandas as pd
+    if file_path.lower().endswith('.xls'):
+        # openpyxl 은 .xls 를 읽지 못하므로 시트 단위로 읽어서 나눔
+        for sheet, df in pd.read_excel(file_path, sheet_name=None).items():
+            for start in range(0, len(df), chunk_size):
+                yield sheet, df.iloc[start:start + chunk_size]
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            header, rows = None, []
+            for values in ws.iter_rows(values_only=True):
+                if header is None:
+                    if any(v is not None for v in values):
+                        header = [str(v).strip() if v is not None else f"col{i}" for i, v in enumerate(values)]
+                    continue
+                if not any(v is not None for v in values):
+                    continue
+                # read-only 모드는 끝의 빈 셀을 잘라 줄 수 있으므로 헤더 길이에 맞춤
+                rows.append((tuple(values) + (None,) * len(header))[:len(header)])
+                if len(rows) >= chunk_size:
+                    yield ws.title, pd.DataFrame(rows, columns=header)
+                    rows = []
+            if rows:
+                yield ws.title, pd.DataFrame(rows, columns=header)
+    finally:
+        wb.close()
+
+def import_tasks_streaming(file_path, title_col="제목", assignee_col="담당자", frequency_col="주기",
+                           email_col="이메일", chunk_size: int = CHUNK_ROWS) -> dict:
+    """모든 시트를 청크 단위로 읽고 정규화/저장 (청크마다 한 트랜잭션)"""
+    required = [title_col, assignee_col, frequency_col]
+    total = {"imported": 0, "duplicates": 0, "rows": 0, "sheets": [], "skipped_sheets": []}
+    assignees = set()
+    with get_conn() as conn:
+        snapshot = load_snapshot(conn)
+        for sheet, chunk in iter_sheet_chunks(file_path, chunk_size):
+            missing = [c for c in required if c not in chunk.columns]
+            if missing:
+                if sheet not in total["skipped_sheets"]:
+                    total["skipped_sheets"].append(sheet)
+                    print(f"   ⚠️ 시트 '{sheet}' 건너뜀 - 필수 컬럼 없음: {missing}")
+                continue
+            if sheet not in total["sheets"]:
+                total["sheets"].append(sheet)
+            frame = normalize_tasks(chunk, title_col, assignee_col, frequency_col, email_col)
+            result = write_tasks(conn, frame, snapshot)
+            assignees.update(frame['assignee'].unique())
+            total["rows"] += len(chunk)
+            total["imported"] += result["imported"]
+            total["duplicates"] += result["duplicates"]
+            print(f"   📦 {sheet}: {total['rows']}행 처리 (가져옴 {total['imported']}개)")
+    total["users"] = len(assignees)
+    return total
+
+# ========== 여러 통합 문서 일괄 가져오기 ==========
+IMPORT_WORKERS = int(os.getenv("EXCEL_IMPORT_WORKERS", "0")) or None   # None: CPU 수
+
+def _iter_workbook(file_path, title_col, assignee_col, frequency_col, email_col, chunk_size, info):
+    """통합 문서 하나를 chunk_size 행씩 정규화해서 반환 (DB 접근 없음)
+
+    읽은 행/시트와 필수 컬럼이 없어 건너뛴 시트는 info 에 채운다."""
+    required = [title_col, assignee_col, frequency_col]
+    for sheet, chunk in iter_sheet_chunks(file_path, chunk_size):
+        if any(c not in chunk.columns for c in required):
+            if sheet not in info["skipped_sheets"]:
+                info["skipped_sheets"].append(sheet)
+            continue
+        if sheet not in info["sheets"]:
+            info["sheets"].append(sheet)
+        info["rows"] += len(chunk)
+        yield normalize_tasks(chunk, title_col, assignee_col, frequency_col, email_col)
+
+def _new_parse_info(file_path) -> dict:
+    return {"file": file_path, "rows": 0, "sheets": [], "skipped_sheets": [], "error": None}
+
+def _parse_workbook(file_path, title_col, assignee_col, frequency_col, email_col, chunk_size):
+    """통합 문서 하나를 읽어 정규화된 DataFrame(frame) 과 시트 정보를 반환 (시트 동기화용)"""
+    import pandas as pd
+    result = _new_parse_info(file_path)
+    try:
+        frames = list(_iter_workbook(file_path, title_col, assignee_col, frequency_col, email_col,
+                                     chunk_size, result))
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    result["frame"] = pd.concat(frames, ignore_index=True) if frames else None
+    return result
+
+def _parse_workbook_to_queue(queue, file_path, title_col, assignee_col, frequency_col, email_col, chunk_size):
+    """작업 프로세스에서 실행: 정규화한 청크를 읽는 대로 queue 로 보내고 마지막에 시트 정보를 보냄
+
+    통합 문서 전체를 모아 한 번에 돌려보내지 않으므로 파일 크기와 상관없이 메모리는 청크 몇 개 분량."""
+    info = _new_parse_info(file_path)
+    try:
+        for frame in _iter_workbook(file_path, title_col, assignee_col, frequency_col, email_col,
+                                    chunk_size, info):
+            queue.put(("chunk", file_path, frame))
+    except Exception as e:
+        info["error"] = str(e)
+    queue.put(("done", file_path, info))
+
+def import_all_excel(files=None, title_col="제목", assignee_col="담당자", frequency_col="주기", email_col="이메일",
+                     workers: int = IMPORT_WORKERS, chunk_size: int = CHUNK_ROWS, job=None) -> dict:
+    """찾은 모든 엑셀 파일을 묻지 않고 가져와 통합 결과를 반환
+
+    파싱/정규화는 프로세스 풀에서 파일별로 병렬 실행하고, 작업 프로세스가 보내는 청크를
+    이 프로세스 하나가 받는 대로 커밋한다 (SQLite 쓰기 잠금 경쟁 없음).
+    큐 크기를 제한해 쓰기가 밀리면 파싱도 기다린다. 웹훅 스레드에서 불려도 안전하도록
+    spawn 방식으로 프로세스를 만든다."""
+    import multiprocessing
+    from queue import Empty
+    from concurrent.futures import ProcessPoolExecutor
+    files = list(files if files is not None else find_excel_files())
+    report = {"files": [], "imported": 0, "duplicates": 0, "rows": 0, "failed": []}
+    if not files:
+        print("❌ 가져올 엑셀 파일이 없습니다.")
+        return report
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = workers or os.cpu_count() or 1
+    args = (title_col, assignee_col, frequency_col, email_col, chunk_size)
+    entries = {path: {"imported": 0, "duplicates": 0} for path in files}
+    # 빠져나갈 때 큐 관리자가 먼저 닫혀야 (역순) 큐에서 기다리던 작업 프로세스도 끝나고 풀이 정리된다
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool, get_conn() as conn, \
+            ctx.Manager() as manager:
+        queue = manager.Queue(maxsize=workers * 2)
+        snapshot = load_snapshot(conn)
+        futures = {pool.submit(_parse_workbook_to_queue, queue, path, *args): path for path in files}
+        remaining = set(files)
+        while remaining:
+            try:
+                kind, path, payload = queue.get(timeout=1)
+            except Empty:
+                # 작업 프로세스가 비정상 종료하면 done 이 오지 않으므로 future 로 확인
+                crashed = [(path, future.exception()) for future, path in futures.items()
+                           if path in remaining and future.done() and future.exception() is not None]
+                if not crashed:
+                    continue
+                (path, error), kind = crashed[0], "done"
+                payload = {**_new_parse_info(path), "error": str(error)}
+            entry = entries[path]
+            if kind == "chunk":
+                result = write_tasks(conn, payload, snapshot)
+                entry["imported"] += result["imported"]
+                entry["duplicates"] += result["duplicates"]
+                continue
+            remaining.discard(path)
+            entry = {**payload, **entry}
+            if payload["error"]:
+                report["failed"].append(path)
+                print(f"   ❌ {path}: {payload['error']}")
+            else:
+                print(f"   📄 {path}: {payload['rows']}행, 가져옴 {entry['imported']}개, "
+                      f"중복 {entry['duplicates']}개")
+            report["files"].append(entry)
+            report["rows"] += entry["rows"]
+            report["imported"] += entry["imported"]
+            report["duplicates"] += entry["duplicates"]
+            if job:
+                job.check_cancelled()
+                job.set_progress(len(files) - len(remaining), len(files), path)
+
+    print(f"\n✅ 일괄 가져오기 완료: 파일 {len(files)}개 (실패 {len(report['failed'])}개), "
+          f"{report['rows']}행 중 {report['imported']}개 가져옴, 중복 {report['duplicates']}개")
+    return report
+
+# ========== 시트 기준 증분 동기화 ==========
+# 가져온 행마다 (원본 파일, 행 키) -> (업무 ID, 내용 해시) 를 기록해 두고,
+# 다시 가져올 때는 해시가 바뀐 행만 갱신하고 새 행은 추가, 시트에서 사라진 행은 삭제한다.
+IMPORT_ROW_SCHEMA = """
+CREATE TABLE IF NOT EXISTS import_rows (
+  source TEXT NOT NULL,
+  row_key TEXT NOT NULL,
+  task_id INTEGER NOT NULL,
+  row_hash TEXT NOT NULL,
+  synced_at TEXT,
+  PRIMARY KEY (source, row_key)
+);
+"""
+
+def row_keys(frame):
+    """행 키 = 제목 (같은 시트에서 제목이 반복되면 '#2', '#3' … 을 붙임)
+
+    담당자/주기는 키에 넣지 않으므로 바뀌면 같은 업무의 변경으로 처리된다."""
+    title = frame['title'].str.strip()
+    nth = title.groupby(title).cumcount()
+    return title.where(nth == 0, title + '#' + (nth + 1).astype(str))
+
+def row_hashes(frame):
+    """행 내용 해시 (제목|담당자|주기|이메일)"""
+    text = frame['title'] + '|' + frame['assignee'] + '|' + frame['frequency'] + '|' + frame['email'].fillna('')
+    return text.map(lambda t: hashlib.sha1(t.encode('utf-8')).hexdigest())
+
+def sync_tasks_from_excel(file_path, source: str = None, title_col="제목", assignee_col="담당자",
+                          frequency_col="주기", email_col="이메일", retire: bool = False) -> dict:
+    """엑셀 파일을 기준으로 업무를 맞춤 (여러 번 실행해도 결과가 같음, 한 트랜잭션)
+
+    - 처음 보는 키: 같은 (제목, 이메일) 의 기존 업무가 있으면 그 업무로 연결, 없으면 추가
+    - 해시가 바뀐 키: 제목/담당자/주기 갱신
+    - 시트에서 사라진 키: retire=True 일 때만 업무 삭제 (task_tombstones 로 Supabase 에도 전파)
+      필수 컬럼이 없어 건너뛴 시트가 있거나 읽은 시트가 없으면 삭제하지 않는다 (빈 결과로 전부 지우지 않도록)"""
+    import pandas as pd
+    source = source or os.path.basename(file_path)
+    parsed = _parse_workbook(file_path, title_col, assignee_col, frequency_col, email_col, CHUNK_ROWS)
+    if parsed["error"]:
+        print(f"❌ 엑셀 파일 읽기 오류: {parsed['error']}")
+        return {"source": source, "error": parsed["error"]}
+    frame = parsed["frame"]
+    if frame is None:
+        frame = pd.DataFrame(columns=['title', 'assignee', 'frequency', 'email'], dtype=object)
+    frame = frame.assign(row_key=row_keys(frame), row_hash=row_hashes(frame))
+    report = {"source": source, "rows": len(frame), "inserted": 0, "adopted": 0, "updated": 0,
+              "unchanged": 0, "retired": 0}
+    if retire and (not parsed["sheets"] or parsed["skipped_sheets"]):
+        retire = False
+        report["retire_skipped"] = parsed["skipped_sheets"] or "읽은 시트 없음"
+        print(f"⚠️ 읽지 못한 시트가 있어 사라진 업무를 삭제하지 않습니다: {report['retire_skipped']}")
+    now = kst_now().isoformat()
+
+    with get_conn() as conn:
+        conn.executescript(IMPORT_ROW_SCHEMA)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 이전 동기화 기록 (다른 경로로 삭제된 업무는 새 행으로 취급)
+            known = pd.DataFrame(conn.execute("""
+                SELECT r.row_key, r.task_id, r.row_hash, t.id IS NOT NULL AS alive
+                FROM import_rows r LEFT JOIN tasks t ON t.id = r.task_id
+                WHERE r.source = ?
+            """, (source,)).fetchall(), columns=['row_key', 'task_id', 'old_hash', 'alive'])
+            known = known[known['alive'].astype(bool)].set_index('row_key')
+
+            frame = frame.join(known[['task_id', 'old_hash']], on='row_key')
+            unchanged = frame['old_hash'] == frame['row_hash']
+            report["unchanged"] = int(unchanged.sum())
+            work = frame[~unchanged]
+
+            if not work.empty:
+                work, _ = _resolve_emails(conn, work, {"users": _load_users(conn)})
+                to_update = work['old_hash'].notna()
+                new = work[work['task_id'].isna()]
+                if not new.empty:
+                    # 이전 방식으로 가져온(기록 없는) 같은 (제목, 이메일) 업무가 있으면 새로 만들지 않고 연결
+                    untracked = {(r["title"], r["assignee_email"]): r["id"] for r in conn.execute(
+                        "SELECT id, title, assignee_email FROM tasks WHERE id NOT IN (SELECT task_id FROM import_rows)")}
+                    adopted = pd.Series([untracked.pop((t, e), None) for t, e in
+                                         zip(new['title'], new['assignee_email'])], index=new.index, dtype=object)
+                    adopted = adopted.dropna()
+                    work.loc[adopted.index, 'task_id'] = adopted
+                    to_update |= work.index.isin(adopted.index)
+                    report["adopted"] = len(adopted)
+
+                    fresh = work[work['task_id'].isna()]
+                    ids, inserted = _insert_tasks(conn, fresh)
+                    work.loc[fresh.index, 'task_id'] = ids
+                    report["inserted"] = inserted
+
+                changed = work[to_update]
+                conn.executemany("""
+                    UPDATE tasks SET title = ?, assignee = ?, assignee_email = ?, frequency = ?, updated_at = ?
+                    WHERE id = ?
+                """, zip(changed['title'], changed['assignee'], changed['assignee_email'], changed['frequency'],
+                         [now] * len(changed), changed['task_id'].astype(int).tolist()))
+                report["updated"] = int(work['old_hash'].notna().sum())
+
+                conn.executemany("""
+                    INSERT INTO import_rows (source, row_key, task_id, row_hash, synced_at) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(source, row_key) DO UPDATE SET
+                        task_id = excluded.task_id, row_hash = excluded.row_hash, synced_at = excluded.synced_at
+                """, zip([source] * len(work), work['row_key'], work['task_id'].astype(int).tolist(),
+                         work['row_hash'], [now] * len(work)))
+
+            # 시트에서 사라진 행
+            gone = known[~known.index.isin(frame['row_key'])]
+            if retire and not gone.empty:
+                conn.executemany("DELETE FROM tasks WHERE id = ?", ((int(i),) for i in gone['task_id']))
+                report["retired"] = len(gone)
+            conn.execute("""
+                DELETE FROM import_rows WHERE source = ? AND task_id NOT IN (SELECT id FROM tasks)
+            """, (source,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    print(f"✅ 시트 동기화 완료 ({source}): {report['rows']}행 - 추가 {report['inserted']}, 연결 {report['adopted']}, "
+          f"변경 {report['updated']}, 그대로 {report['unchanged']}, 삭제 {report['retired']}")
+    return report
+
+def import_tasks_from_excel(file_path, title_col="제목", assignee_col="담당자", frequency_col="주기", email_col="이메일",
+                            streaming: bool = None):
+    """엑셀 파일에서 업무 데이터를 가져와 데이터베이스에 저장
+
+    streaming=None 이면 파일 크기(STREAMING_THRESHOLD)로 자동 선택한다.
+    스트리밍 모드는 첫 시트만이 아니라 모든 시트를 가져온다."""
+    if streaming is None:
+        streaming = os.path.getsize(file_path) >= STREAMING_THRESHOLD
+    if streaming:
+        print(f"📊 스트리밍 가져오기: {file_path} ({CHUNK_ROWS}행 단위, 모든 시트)")
+        result = import_tasks_streaming(file_path, title_col, assignee_col, frequency_col, email_col)
+        print(f"\n✅ 데이터 가져오기 완료!")
+        print(f"   - 시트: {result['sheets']}")
+        print(f"   - 가져온 업무 수: {result['imported']}개")
+        print(f"   - 중복 스킵: {result['duplicates']}개")
+        print(f"   - 등록된 사용자 수: {result['users']}개")
+        return bool(result["sheets"])
     
     df = analyze_excel_structure(file_path)
     if df is None:
@@ -92,103 +519,37 @@ def import_tasks_from_excel(file_path, title_col="제목", assignee_col="담당
         print(f"사용 가능한 컬럼: {list(df.columns)}")
         return False
     
-    # 기존 데이터 확인
-    with get_conn() as conn:
-        backup_count = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
-        print(f"\n💾 기존 업무 수: {backup_count}개")
-        
-        if backup_count > 0:
-            print("⚠️ 기존 데이터가 있습니다. 기존 데이터를 유지하고 새 데이터를 추가합니다.")
-        else:
-            print("✅ 새로운 데이터를 추가합니다.")
-    
-    # 사용자 정보 수집
-    unique_assignees = df[assignee_col].dropna().unique()
-    print(f"\n👥 담당자 목록: {list(unique_assignees)}")
+    frame = normalize_tasks(df, title_col, assignee_col, frequency_col, email_col)
+    print(f"\n👥 담당자 목록: {list(frame['assignee'].unique())}")
     
-    # 사용자 등록
-    with get_conn() as conn:
-        for assignee in unique_assignees:
-            if pd.isna(assignee):
-                continue
-            
-            # 이메일 찾기
-            assignee_email = None
-            if email_col in df.columns:
-                email_row = df[df[assignee_col] == assignee][email_col].iloc[0]
-                if not pd.isna(email_row):
-                    assignee_email = email_row
-            
-            if not assignee_email:
-                assignee_email = f"{assignee.lower().replace(' ', '.')}@company.com"
-            
-            conn.execute("INSERT OR IGNORE INTO users (email, name) VALUES (?, ?)", 
-                        (assignee_email, assignee))
-            print(f"   📧 {assignee} → {assignee_email}")
-    
-    # 업무 데이터 가져오기
-    imported_count = 0
     with get_conn() as conn:
-        for idx, row in df.iterrows():
-            title = row[title_col]
-            assignee = row[assignee_col]
-            frequency = row[frequency_col]
-            
-            # 빈 데이터 스킵
-            if pd.isna(title) or pd.isna(assignee) or pd.isna(frequency):
-                continue
-            
-            # 주기 정규화
-            frequency = str(frequency).lower()
-            if 'daily' in frequency or '일' in frequency:
-                frequency = 'daily'
-            elif 'weekly' in frequency or '주' in frequency:
-                frequency = 'weekly'
-            elif 'monthly' in frequency or '월' in frequency:
-                frequency = 'monthly'
-            else:
-                frequency = 'daily'  # 기본값
-            
-            # 담당자 이메일 찾기
-            if email_col in df.columns and not pd.isna(row[email_col]):
-                assignee_email = row[email_col]
-            else:
-                # users 테이블에서 찾기
-                user = conn.execute("SELECT email FROM users WHERE name = ?", (assignee,)).fetchone()
-                assignee_email = user[0] if user else f"{assignee.lower().replace(' ', '.')}@company.com"
-            
-            # 업무 추가 (중복 체크)
-            existing = conn.execute("""
-                SELECT id FROM tasks WHERE title = ? AND assignee_email = ?
-            """, (title, assignee_email)).fetchone()
-            
-            if existing:
-                print(f"   ⚠️ 중복 업무 스킵: {title}")
-                continue
-            
-            conn.execute("""
-                INSERT INTO tasks (title, assignee_email, frequency, status, assignee)
-                VALUES (?, ?, ?, 'pending', ?)
-            """, (title, assignee_email, frequency, assignee))
-            
-            imported_count += 1
-    
-    # 토큰 생성
-    with get_conn() as conn:
-        tasks = conn.execute("SELECT id FROM tasks WHERE hmac_token IS NULL").fetchall()
-        for task in tasks:
-            token = make_token(task[0])
-            conn.execute("UPDATE tasks SET hmac_token = ? WHERE id = ?", (token, task[0]))
+        result = write_tasks(conn, frame)
     
     print(f"\n✅ 데이터 가져오기 완료!")
-    print(f"   - 가져온 업무 수: {imported_count}개")
-    print(f"   - 등록된 사용자 수: {len(unique_assignees)}개")
+    print(f"   - 가져온 업무 수: {result['imported']}개")
+    print(f"   - 중복 스킵: {result['duplicates']}개")
+    print(f"   - 등록된 사용자 수: {result['users']}개")
     
     return True
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="엑셀 업무 데이터 가져오기")
+    parser.add_argument("--all", action="store_true", help="현재 폴더의 모든 엑셀 파일을 묻지 않고 가져오기")
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS, help="파싱 프로세스 수 (기본 CPU 수)")
+    parser.add_argument("--sync", metavar="FILE", help="이 파일을 기준으로 증분 동기화 (변경된 행만 반영)")
+    parser.add_argument("--retire-missing", action="store_true", help="--sync 에서 시트에 없는 업무를 삭제")
+    cli = parser.parse_args()
+
     print("🚀 엑셀 업무 데이터 가져오기")
     print("=" * 30)
+
+    if cli.sync:
+        report = sync_tasks_from_excel(cli.sync, retire=cli.retire_missing)
+        raise SystemExit(1 if report.get("error") else 0)
+    if cli.all:
+        report = import_all_excel(workers=cli.workers)
+        raise SystemExit(1 if report["failed"] else 0)
     
     # 자동으로 엑셀 파일 찾기
     file_path = select_excel_file()
@@ -0,0 +1,143 @@
+# jobs.py - 백그라운드 작업 실행기
+# 메일 발송, 엑셀 재가져오기, Supabase 동기화처럼 오래 걸리는 작업을
+# 웹 요청 스레드 밖의 제한된 작업자 풀에서 실행하고 진행 상황을 조회/취소한다.
+import os
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import logging
+from metrics import queue_depth
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class JobCancelled(Exception):
+    """작업 함수가 취소 요청을 확인하고 중단할 때 발생"""
+
+class JobQueueFull(RuntimeError):
+    """대기 작업이 너무 많을 때 발생"""
+
+class Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = QUEUED
+        self.done = 0
+        self.total = None
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def cancelled(self) -> bool:
+        """취소 요청 여부 - 작업 함수가 반복문마다 확인"""
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def set_progress(self, done: int, total: int = None, message: str = None):
+        self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+class JobRunner:
+    """작업자 수(max_workers)와 대기 작업 수(max_queued)가 제한된 작업 실행기"""
+
+    def __init__(self, max_workers: int = 2, max_queued: int = 20, max_history: int = 100):
+        self.max_queued = max_queued
+        self.max_history = max_history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        queue_depth.set_function(self.pending_count, queue="jobs")
+
+    def submit(self, kind: str, fn, *args, **kwargs) -> Job:
+        """fn(job, *args, **kwargs) 를 백그라운드에서 실행"""
+        job = Job(kind)
+        with self._lock:
+            if self.pending_count() >= self.max_queued:
+                raise JobQueueFull(f"대기 중인 작업이 너무 많습니다 ({self.max_queued}개)")
+            self._jobs[job.id] = job
+            self._trim_history()
+        job._future = self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"📥 작업 등록: {kind} ({job.id})")
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs):
+        if job.cancelled:
+            job.status = CANCELLED
+            job.finished_at = datetime.now().isoformat()
+            return
+        job.status = RUNNING
+        job.started_at = datetime.now().isoformat()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = SUCCEEDED
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            logger.error(f"❌ 작업 실패: {job.kind} ({job.id}): {e}\n{traceback.format_exc()}")
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            logger.info(f"📤 작업 종료: {job.kind} ({job.id}) - {job.status}")
+
+    def _trim_history(self):
+        # 끝난 작업만 오래된 순으로 정리
+        finished = [j.id for j in self._jobs.values() if j.status in (SUCCEEDED, FAILED, CANCELLED)]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.status in (SUCCEEDED, FAILED, CANCELLED):
+            return False
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            job.status = CANCELLED
+            job.finished_at = datetime.now().isoformat()
+        return True
+
+    def pending_count(self) -> int:
+        return sum(1 for j in list(self._jobs.values()) if j.status == QUEUED)
+
+# 웹훅 프로세스 공용 실행기
+job_runner = JobRunner(max_workers=int(os.getenv("JOB_WORKERS", "2")))
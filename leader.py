@@ -0,0 +1,203 @@
+# leader.py - 여러 웹훅 인스턴스 중 예약 작업을 실행할 리더 하나를 임대(lease)로 선출
+# 각 인스턴스가 LEASE_TTL/3 마다 공유 DB 의 임대를 잡거나 연장하고, 잡은 인스턴스만 스케줄러를 돌린다.
+# 리더가 죽으면 임대가 LEASE_TTL 안에 만료되어 다른 인스턴스가 넘겨받는다.
+# 연장에 실패하면 리더는 마지막 성공 + TTL 시점에 스스로 물러난다 (두 리더가 겹치지 않도록).
+#
+# 예약 작업은 실행 전에 같은 공유 DB 에 그날 실행 표시(daily_runs)를 잡아, 리더가 바뀌어도 하루 한 번만 돈다.
+#
+# 공유 DB: Supabase 가 설정돼 있으면 try_acquire_lease RPC, 아니면 같은 호스트의 reminder.db
+# (LEADER_BACKEND=supabase|sqlite 로 고정 가능)
+import os
+import socket
+import threading
+import time
+import uuid
+import logging
+from db import get_conn
+from metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = os.getenv("LEADER_LEASE_NAME", "scheduler")
+LEASE_TTL = int(os.getenv("LEADER_LEASE_TTL", "30"))
+LEADER_BACKEND = os.getenv("LEADER_BACKEND", "")
+
+# 이 프로세스를 나타내는 이름 - 리더 임대와 하루 한 번 실행 표시에 같이 쓴다
+HOLDER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+leader_gauge = Gauge("leader_is_leader", "이 인스턴스가 리더인지 (1=리더)", ("name",))
+
+# ========== SQLite 임대 (local_postgrest.py 의 RPC 도 사용) ==========
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+  name TEXT PRIMARY KEY,
+  holder TEXT NOT NULL,
+  expires_at REAL NOT NULL,
+  acquired_at REAL NOT NULL
+);
+"""
+
+def sqlite_try_acquire(conn, name: str, holder: str, ttl: float) -> bool:
+    """비어 있거나 만료됐거나 이미 내 것이면 임대를 잡거나 연장 (한 문장이라 원자적)"""
+    conn.execute(LEASE_SCHEMA)
+    now = time.time()
+    cur = conn.execute("""
+        INSERT INTO leases (name, holder, expires_at, acquired_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET
+            holder = excluded.holder,
+            expires_at = excluded.expires_at,
+            acquired_at = CASE WHEN leases.holder = excluded.holder THEN leases.acquired_at
+                               ELSE excluded.acquired_at END
+        WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+    """, (name, holder, now + ttl, now, now))
+    return cur.rowcount == 1
+
+def sqlite_release(conn, name: str, holder: str) -> bool:
+    conn.execute(LEASE_SCHEMA)
+    return conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder)).rowcount == 1
+
+# ========== 하루 한 번 실행 표시 ==========
+# 예약 작업 저장소는 인스턴스마다 따로라서, 리더가 바뀌면 (놓친 실행 유예 + coalesce 로) 같은 날 작업이
+# 두 번 돌 수 있다. 실행 전에 임대와 같은 공유 DB 에 (작업, 날짜) 행을 먼저 넣은 인스턴스만 실행한다.
+DAILY_RUN_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_runs (
+  name TEXT NOT NULL,
+  day TEXT NOT NULL,
+  holder TEXT NOT NULL,
+  claimed_at REAL NOT NULL,
+  PRIMARY KEY (name, day)
+);
+"""
+
+def sqlite_claim_daily_run(conn, name: str, day: str, holder: str) -> bool:
+    """그날 실행 표시가 없거나 이미 내 것이면 True (한 문장이라 원자적)"""
+    conn.execute(DAILY_RUN_SCHEMA)
+    cur = conn.execute("""
+        INSERT INTO daily_runs (name, day, holder, claimed_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(name, day) DO UPDATE SET claimed_at = excluded.claimed_at
+        WHERE daily_runs.holder = excluded.holder
+    """, (name, day, holder, time.time()))
+    return cur.rowcount == 1
+
+def sqlite_release_daily_run(conn, name: str, day: str, holder: str) -> bool:
+    conn.execute(DAILY_RUN_SCHEMA)
+    return conn.execute("DELETE FROM daily_runs WHERE name = ? AND day = ? AND holder = ?",
+                        (name, day, holder)).rowcount == 1
+
+class SqliteLeases:
+    """SupabaseManager 의 임대/실행 표시 메서드와 같은 모양의 SQLite 백엔드"""
+
+    def try_acquire_lease(self, name: str, holder: str, ttl_seconds: int) -> bool:
+        with get_conn() as conn:
+            return sqlite_try_acquire(conn, name, holder, ttl_seconds)
+
+    def release_lease(self, name: str, holder: str) -> bool:
+        with get_conn() as conn:
+            return sqlite_release(conn, name, holder)
+
+    def claim_daily_run(self, name: str, day: str, holder: str) -> bool:
+        with get_conn() as conn:
+            return sqlite_claim_daily_run(conn, name, day, holder)
+
+    def release_daily_run(self, name: str, day: str, holder: str) -> bool:
+        with get_conn() as conn:
+            return sqlite_release_daily_run(conn, name, day, holder)
+
+def lease_backend():
+    from supabase_client import is_configured
+    if LEADER_BACKEND == "sqlite" or (LEADER_BACKEND != "supabase" and not is_configured()):
+        return SqliteLeases()
+    from supabase_client import get_supabase_manager
+    return get_supabase_manager(use_service_key=True)
+
+# ========== 선출 ==========
+class LeaderElector:
+    def __init__(self, name: str = LEASE_NAME, ttl: int = LEASE_TTL, on_elected=None, on_revoked=None,
+                 backend=None, holder: str = None):
+        self.name = name
+        self.ttl = ttl
+        self.renew_interval = max(ttl / 3, 0.1)
+        self.on_elected = on_elected
+        self.on_revoked = on_revoked
+        self.backend = backend
+        self.holder = holder or HOLDER
+        self._leader = False
+        self._valid_until = 0.0   # 마지막 연장 요청 시작 + ttl (monotonic)
+        self._stop = threading.Event()
+        self._thread = None
+        leader_gauge.set_function(lambda: 1 if self.is_leader else 0, name=name)
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader and time.monotonic() < self._valid_until
+
+    def tick(self):
+        """임대를 한 번 잡거나 연장하고 리더 상태를 맞춤"""
+        if self.backend is None:
+            self.backend = lease_backend()
+        started = time.monotonic()
+        try:
+            acquired = self.backend.try_acquire_lease(self.name, self.holder, self.ttl)
+        except Exception as e:
+            # 일시적 오류: 이미 잡은 임대가 유효한 동안은 리더 유지
+            logger.warning(f"⚠️ 임대 연장 실패 ({self.name}): {e}")
+            acquired = None
+        if acquired:
+            self._valid_until = started + self.ttl
+            if not self._leader:
+                self._leader = True
+                logger.info(f"👑 리더 선출됨: {self.name} ({self.holder})")
+                self._callback(self.on_elected)
+        elif self._leader and (acquired is False or started >= self._valid_until):
+            self._step_down()
+
+    def _step_down(self):
+        self._leader = False
+        logger.warning(f"🔻 리더에서 물러남: {self.name} ({self.holder})")
+        self._callback(self.on_revoked)
+
+    def _callback(self, fn):
+        if fn is None:
+            return
+        try:
+            fn()
+        except Exception as e:
+            logger.error(f"❌ 리더 전환 처리 실패 ({self.name}): {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.tick()
+            timeout = self.renew_interval
+            if self._leader:
+                # 연장이 계속 실패하면 임대 만료 시점에 맞춰 바로 물러나도록
+                timeout = min(timeout, max(self._valid_until - time.monotonic(), 0))
+            self._stop.wait(timeout)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"leader-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, release: bool = True):
+        """선출 중단 - 리더였다면 물러나고 임대를 반납해 다른 인스턴스가 바로 넘겨받게 함"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.renew_interval + 5)
+            self._thread = None
+        if self._leader:
+            self._step_down()
+            if release:
+                try:
+                    self.backend.release_lease(self.name, self.holder)
+                except Exception as e:
+                    logger.warning(f"⚠️ 임대 반납 실패 ({self.name}): {e}")
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "holder": self.holder,
+            "is_leader": self.is_leader,
+            "ttl": self.ttl,
+            "backend": type(self.backend).__name__ if self.backend else None,
+        }
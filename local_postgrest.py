@@ -0,0 +1,602 @@
+# local_postgrest.py - 오프라인 테스트/벤치마크용 PostgREST 대역 서버 (SQLite 기반)
+# SupabaseManager 가 쓰는 PostgREST 기능만 흉내낸다:
+#   select(컬럼/임베드), eq/neq/gt/gte/lt/lte/like/ilike/is/in, not., or/and 트리,
+#   order, limit/offset, count=exact, insert/upsert, update, delete, rpc
+# 응답마다 지연(--latency-ms, --jitter-ms)을 넣어 호스팅 DB 의 왕복 시간을 재현할 수 있다.
+#
+# 사용법:
+#   python local_postgrest.py --port 54321 --latency-ms 80 --seed-from reminder.db
+#   SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=local.anon.key python send_digest_supabase.py
+# (supabase-py 는 키 형식만 확인하므로 점으로 구분된 아무 문자열이나 사용 가능)
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+KST = timezone(timedelta(hours=9))
+DEFAULT_DB = "local_supabase.db"
+# PostgREST 의 db-max-rows - Supabase 기본값과 같이 한 응답을 1000행으로 제한
+MAX_ROWS = int(os.getenv("LOCAL_POSTGREST_MAX_ROWS", "1000"))
+
+# supabase_schema.sql 의 테이블을 SQLite 로 옮긴 것
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    created_at TEXT DEFAULT (datetime('now')),
+    updated_at TEXT DEFAULT (datetime('now'))
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    assignee_email TEXT NOT NULL,
+    frequency TEXT NOT NULL CHECK (frequency IN ('daily', 'weekly', 'monthly')),
+    status TEXT DEFAULT 'pending' CHECK (status IN ('pending', 'done')),
+    creator_name TEXT,
+    due_date TEXT,
+    hmac_token TEXT UNIQUE,
+    last_completed_at TEXT,
+    created_at TEXT DEFAULT (datetime('now')),
+    updated_at TEXT DEFAULT (datetime('now'))
+);
+CREATE TABLE IF NOT EXISTS completion_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    completed_at TEXT NOT NULL,
+    completion_method TEXT DEFAULT 'email',
+    user_agent TEXT,
+    ip_address TEXT,
+    notes TEXT,
+    created_at TEXT DEFAULT (datetime('now'))
+);
+CREATE TABLE IF NOT EXISTS email_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    task_count INTEGER DEFAULT 0,
+    sent_at TEXT DEFAULT (datetime('now')),
+    status TEXT DEFAULT 'sent',
+    error_message TEXT
+);
+CREATE TABLE IF NOT EXISTS system_settings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT UNIQUE NOT NULL,
+    value TEXT,
+    description TEXT,
+    updated_at TEXT DEFAULT (datetime('now'))
+);
+CREATE TABLE IF NOT EXISTS task_tombstones (
+    id INTEGER PRIMARY KEY,
+    deleted_at TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS record_task_tombstone AFTER DELETE ON tasks
+BEGIN
+    INSERT OR REPLACE INTO task_tombstones (id, deleted_at)
+    VALUES (OLD.id, strftime('%Y-%m-%dT%H:%M:%S+09:00', 'now', '+9 hours'));
+END;
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee_due ON tasks(assignee_email, frequency, last_completed_at);
+CREATE INDEX IF NOT EXISTS idx_completion_logs_task_id ON completion_logs(task_id);
+"""
+
+# 임베드 관계: (테이블, 임베드 이름) -> (외래키 컬럼, 대상 컬럼) - 다대일만 지원
+EMBEDS = {
+    ("completion_logs", "tasks"): ("task_id", "id"),
+    ("tasks", "users"): ("assignee_email", "email"),
+}
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_COMPARE = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+class PostgrestError(Exception):
+    def __init__(self, message: str, status: int = 400, code: str = "PGRST100"):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+def _ident(name: str) -> str:
+    if not _IDENT.match(name):
+        raise PostgrestError(f"잘못된 식별자: {name}")
+    # "name" 은 없는 컬럼이면 SQLite 가 문자열로 바꿔 버리므로 [name] 으로 감싸 오류가 나게 함
+    return f"[{name}]"
+
+def _kst_now() -> str:
+    return datetime.now(KST).isoformat()
+
+# ========== 필터 파싱 ==========
+def _split_top(text: str):
+    """괄호/따옴표 밖의 쉼표로 나누기"""
+    parts, depth, quoted, current = [], 0, False, []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\" and quoted and i + 1 < len(text):
+            current.append(text[i:i + 2])
+            i += 2
+            continue
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    if current:
+        parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+def _condition(column: str, expr: str):
+    """column + 'op.value' -> (SQL, 파라미터)"""
+    negate = expr.startswith("not.")
+    if negate:
+        expr = expr[4:]
+    op, _, value = expr.partition(".")
+    col = _ident(column)
+    if op in _COMPARE:
+        sql, params = f"{col} {_COMPARE[op]} ?", [_unquote(value)]
+    elif op in ("like", "ilike"):
+        pattern = _unquote(value).replace("*", "%")
+        if op == "like":
+            sql, params = f"{col} GLOB ?", [pattern.replace("%", "*").replace("_", "?")]
+        else:
+            sql, params = f"{col} LIKE ?", [pattern]
+    elif op == "is":
+        literal = {"null": "NULL", "true": "1", "false": "0", "unknown": "NULL"}.get(value.lower())
+        if literal is None:
+            raise PostgrestError(f"is 연산자 값 오류: {value}")
+        sql, params = (f"{col} IS NULL" if literal == "NULL" else f"{col} = {literal}"), []
+    elif op == "in":
+        if not (value.startswith("(") and value.endswith(")")):
+            raise PostgrestError(f"in 연산자 값 오류: {value}")
+        items = [_unquote(v) for v in _split_top(value[1:-1])]
+        if not items:
+            sql, params = "0", []
+        else:
+            sql, params = f"{col} IN ({','.join('?' * len(items))})", items
+    else:
+        raise PostgrestError(f"지원하지 않는 연산자: {op}")
+    return (f"NOT ({sql})", params) if negate else (sql, params)
+
+_LOGIC = re.compile(r"^(not\.)?(and|or)\((.*)\)$", re.S)
+
+def _logic(kind: str, body: str, negate: bool = False):
+    """and/or 트리 -> (SQL, 파라미터)"""
+    clauses, params = [], []
+    for item in _split_top(body):
+        m = _LOGIC.match(item)
+        if m:
+            sql, p = _logic(m.group(2), m.group(3), bool(m.group(1)))
+        else:
+            column, _, expr = item.partition(".")
+            sql, p = _condition(column, expr)
+        clauses.append(f"({sql})")
+        params.extend(p)
+    if not clauses:
+        return "1", []
+    sql = f" {kind.upper()} ".join(clauses)
+    return (f"NOT ({sql})", params) if negate else (sql, params)
+
+def build_where(query_params):
+    clauses, params = [], []
+    for key, value in query_params:
+        if key in RESERVED_PARAMS:
+            continue
+        if key in ("or", "and", "not.or", "not.and"):
+            body = value[1:-1] if value.startswith("(") and value.endswith(")") else value
+            sql, p = _logic(key.split(".")[-1], body, key.startswith("not."))
+        else:
+            sql, p = _condition(key, value)
+        clauses.append(f"({sql})")
+        params.extend(p)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def build_order(value: str) -> str:
+    if not value:
+        return ""
+    terms = []
+    for term in _split_top(value):
+        parts = term.split(".")
+        sql = _ident(parts[0])
+        for modifier in parts[1:]:
+            if modifier in ("asc", "desc"):
+                sql += f" {modifier.upper()}"
+            elif modifier in ("nullsfirst", "nullslast"):
+                sql += " NULLS " + modifier[5:].upper()
+            else:
+                raise PostgrestError(f"정렬 옵션 오류: {term}")
+        terms.append(sql)
+    return " ORDER BY " + ", ".join(terms)
+
+def parse_select(value: str):
+    """'id,title,tasks(id,title)' -> (컬럼 목록 또는 None(*), {임베드: 하위 select})"""
+    columns, embeds = [], {}
+    for item in _split_top(value or "*"):
+        m = re.match(r"^([A-Za-z_][A-Za-z0-9_]*)(?:!\w+)?\((.*)\)$", item, re.S)
+        if m:
+            embeds[m.group(1)] = m.group(2)
+        elif item == "*":
+            columns = None
+        elif columns is not None:
+            columns.append(_ident(item.split("::")[0])[1:-1])
+    return columns, embeds
+
+# ========== 요청 처리 ==========
+class LocalPostgrest:
+    """SQLite 파일 하나를 PostgREST 처럼 제공"""
+
+    def __init__(self, db_path: str = DEFAULT_DB, latency: float = 0.0, jitter: float = 0.0,
+                 max_rows: int = MAX_ROWS):
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self.latency = latency
+        self.jitter = jitter
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        with self.connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def delay(self):
+        with self._count_lock:
+            self.request_count += 1
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def _tables(self, conn):
+        return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+    def _project(self, conn, table, rows, columns, embeds):
+        result = []
+        for row in rows:
+            if columns is None:
+                item = dict(row)
+            else:
+                missing = [c for c in columns if c not in row.keys()]
+                if missing:
+                    raise PostgrestError(f"column {table}.{missing[0]} does not exist", code="42703")
+                item = {c: row[c] for c in columns}
+            for name, sub_select in embeds.items():
+                relation = EMBEDS.get((table, name))
+                if relation is None:
+                    raise PostgrestError(f"{table} 와 {name} 사이의 관계를 찾을 수 없습니다", code="PGRST200")
+                fk, target = relation
+                sub_columns, sub_embeds = parse_select(sub_select)
+                found = conn.execute(
+                    f"SELECT * FROM {_ident(name)} WHERE {_ident(target)} = ?", (row[fk],)).fetchall()
+                projected = self._project(conn, name, found, sub_columns, sub_embeds)
+                item[name] = projected[0] if projected else None
+            result.append(item)
+        return result
+
+    def select(self, table, params, prefer):
+        p = dict(params)
+        columns, embeds = parse_select(p.get("select", "*"))
+        where, args = build_where(params)
+        sql = f"SELECT * FROM {_ident(table)}{where}{build_order(p.get('order'))}"
+        limit, offset = p.get("limit"), p.get("offset")
+        # limit 이 없거나 더 커도 max_rows 행까지만 (호스팅 PostgREST 와 같이 잘린 결과를 돌려줌)
+        limit = min(int(limit), self.max_rows) if limit is not None else self.max_rows
+        sql += f" LIMIT {limit} OFFSET {int(offset or 0)}"
+        with self.connect() as conn:
+            self._check_table(conn, table)
+            rows = conn.execute(sql, args).fetchall()
+            data = self._project(conn, table, rows, columns, embeds)
+            total = None
+            if "count=exact" in prefer:
+                total = conn.execute(f"SELECT COUNT(*) FROM {_ident(table)}{where}", args).fetchone()[0]
+        return data, total, int(offset or 0)
+
+    def _check_table(self, conn, table):
+        if table not in self._tables(conn):
+            raise PostgrestError(f'relation "public.{table}" does not exist', status=404, code="42P01")
+
+    def insert(self, table, params, prefer, body):
+        rows = body if isinstance(body, list) else [body]
+        if not rows:
+            return []
+        columns = sorted({k for row in rows for k in row})
+        cols_sql = ", ".join(_ident(c) for c in columns)
+        sql = f"INSERT INTO {_ident(table)} ({cols_sql}) VALUES ({', '.join('?' * len(columns))})"
+        if "resolution=" in prefer:
+            conflict = dict(params).get("on_conflict") or "id"
+            targets = ", ".join(_ident(c.strip()) for c in conflict.split(","))
+            if "resolution=ignore-duplicates" in prefer:
+                sql += f" ON CONFLICT ({targets}) DO NOTHING"
+            else:
+                updates = ", ".join(f"{_ident(c)} = excluded.{_ident(c)}" for c in columns)
+                sql += f" ON CONFLICT ({targets}) DO UPDATE SET {updates}"
+        sql += " RETURNING *"
+        with self.connect() as conn:
+            self._check_table(conn, table)
+            result = []
+            for row in rows:
+                found = conn.execute(sql, [row.get(c) for c in columns]).fetchone()
+                if found is not None:
+                    result.append(dict(found))
+        return result
+
+    def update(self, table, params, body):
+        if not body:
+            raise PostgrestError("변경할 값이 없습니다")
+        where, args = build_where(params)
+        sets = ", ".join(f"{_ident(c)} = ?" for c in body)
+        with self.connect() as conn:
+            self._check_table(conn, table)
+            rows = conn.execute(
+                f"UPDATE {_ident(table)} SET {sets}{where} RETURNING *", list(body.values()) + args).fetchall()
+        return [dict(r) for r in rows]
+
+    def delete(self, table, params):
+        where, args = build_where(params)
+        with self.connect() as conn:
+            self._check_table(conn, table)
+            rows = conn.execute(f"DELETE FROM {_ident(table)}{where} RETURNING *", args).fetchall()
+        return [dict(r) for r in rows]
+
+    def rpc(self, name, body):
+        fn = RPCS.get(name)
+        if fn is None:
+            raise PostgrestError(f"함수 public.{name} 을 찾을 수 없습니다", status=404, code="PGRST202")
+        with self.connect() as conn:
+            return fn(conn, body or {})
+
+# ========== RPC (supabase_schema.sql 의 함수와 같은 결과) ==========
+RPCS = {}
+
+def rpc(name):
+    def register(fn):
+        RPCS[name] = fn
+        return fn
+    return register
+
+@rpc("get_task_statistics")
+def _rpc_get_task_statistics(conn, params):
+    day = params.get("p_day") or datetime.now(KST).date().isoformat()
+    row = conn.execute("""
+        SELECT COUNT(*) AS total,
+               COALESCE(SUM(status = 'done'), 0) AS done,
+               COALESCE(SUM(status = 'pending'), 0) AS pending
+        FROM tasks
+    """).fetchone()
+    today = conn.execute(
+        "SELECT COUNT(*) FROM tasks WHERE substr(last_completed_at, 1, 10) = ?", (day,)).fetchone()[0]
+    return {"total_tasks": row["total"], "completed_tasks": row["done"],
+            "pending_tasks": row["pending"], "today_completed": today}
+
+@rpc("complete_tasks")
+def _rpc_complete_tasks(conn, params):
+    ids = list(params.get("p_task_ids") or [])
+    tokens = list(params.get("p_tokens") or [])
+    if not ids and not tokens:
+        return []
+    now = _kst_now()
+    rows = conn.execute(f"""
+        UPDATE tasks SET status = 'done', last_completed_at = ?, updated_at = ?
+        WHERE status = 'pending'
+          AND (id IN ({','.join('?' * len(ids)) or 'NULL'})
+               OR hmac_token IN ({','.join('?' * len(tokens)) or 'NULL'}))
+        RETURNING *
+    """, [now, now] + ids + tokens).fetchall()
+    conn.executemany(
+        "INSERT INTO completion_logs (task_id, completed_at, completion_method, notes) VALUES (?, ?, ?, ?)",
+        [(r["id"], now, params.get("p_method", "email"), params.get("p_notes")) for r in rows])
+    return [dict(r) for r in rows]
+
+@rpc("sync_task_id_sequence")
+def _rpc_sync_task_id_sequence(conn, params):
+    # SQLite AUTOINCREMENT 는 명시적 ID 이후로 알아서 이어짐
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+
+@rpc("task_range_digests")
+def _rpc_task_range_digests(conn, params):
+    from reconcile import task_row_hash, range_digest
+    result = []
+    for lo, hi in zip(params.get("p_lo") or [], params.get("p_hi") or []):
+        rows = conn.execute("SELECT * FROM tasks WHERE id >= ? AND id < ? ORDER BY id", (lo, hi)).fetchall()
+        result.append({"lo": lo, "hi": hi, "row_count": len(rows),
+                       "digest": range_digest([task_row_hash(r) for r in rows])})
+    return result
+
+@rpc("try_acquire_lease")
+def _rpc_try_acquire_lease(conn, params):
+    from leader import sqlite_try_acquire
+    return sqlite_try_acquire(conn, params["p_name"], params["p_holder"], params["p_ttl_seconds"])
+
+@rpc("release_lease")
+def _rpc_release_lease(conn, params):
+    from leader import sqlite_release
+    return sqlite_release(conn, params["p_name"], params["p_holder"])
+
+@rpc("claim_daily_run")
+def _rpc_claim_daily_run(conn, params):
+    from leader import sqlite_claim_daily_run
+    return sqlite_claim_daily_run(conn, params["p_name"], params["p_day"], params["p_holder"])
+
+@rpc("release_daily_run")
+def _rpc_release_daily_run(conn, params):
+    from leader import sqlite_release_daily_run
+    return sqlite_release_daily_run(conn, params["p_name"], params["p_day"], params["p_holder"])
+
+# ========== HTTP ==========
+class Handler(BaseHTTPRequestHandler):
+    server_version = "LocalPostgREST/0.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, payload=None, headers=None):
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null") if length else None
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        path = parts.path
+        if path.startswith("/rest/v1"):
+            path = path[len("/rest/v1"):]
+        return path.strip("/"), parse_qsl(parts.query, keep_blank_values=True)
+
+    def _respond_rows(self, rows, status=200, total=None, offset=0):
+        prefer = self.headers.get("Prefer", "")
+        headers = {}
+        if total is not None or self.command in ("GET", "HEAD"):
+            end = offset + len(rows) - 1
+            span = f"{offset}-{end}" if rows else "*"
+            headers["Content-Range"] = f"{span}/{total if total is not None else '*'}"
+        if "application/vnd.pgrst.object+json" in self.headers.get("Accept", ""):
+            if len(rows) != 1:
+                raise PostgrestError("JSON object requested, multiple (or no) rows returned",
+                                     status=406, code="PGRST116")
+            return self._send(status, rows[0], headers)
+        if self.command in ("POST", "PATCH", "DELETE") and "return=representation" not in prefer:
+            return self._send(201 if self.command == "POST" else 204, None, headers)
+        self._send(status, rows, headers)
+
+    def _handle(self, method):
+        api = self.server.api
+        api.delay()
+        try:
+            path, params = self._route()
+            prefer = self.headers.get("Prefer", "")
+            if path.startswith("rpc/"):
+                body = self._body() if method == "POST" else dict(params)
+                return self._send(200, api.rpc(path[4:], body))
+            if not _IDENT.match(path or "-"):
+                raise PostgrestError(f"잘못된 경로: {self.path}", status=404, code="PGRST125")
+            if method in ("GET", "HEAD"):
+                rows, total, offset = api.select(path, params, prefer)
+                return self._respond_rows(rows, 200, total, offset)
+            if method == "POST":
+                return self._respond_rows(api.insert(path, params, prefer, self._body()), 201)
+            if method == "PATCH":
+                return self._respond_rows(api.update(path, params, self._body()), 200)
+            if method == "DELETE":
+                return self._respond_rows(api.delete(path, params), 200)
+        except PostgrestError as e:
+            self._send(e.status, {"code": e.code, "message": str(e), "details": None, "hint": None})
+        except sqlite3.IntegrityError as e:
+            self._send(409, {"code": "23505", "message": str(e), "details": None, "hint": None})
+        except sqlite3.OperationalError as e:
+            # 필터/정렬/본문의 없는 컬럼은 PostgreSQL 의 undefined_column 으로
+            code = "42703" if "no such column" in str(e) or "has no column" in str(e) else "PGRST100"
+            self._send(400, {"code": code, "message": str(e), "details": None, "hint": None})
+        except (sqlite3.Error, ValueError) as e:
+            self._send(400, {"code": "PGRST100", "message": str(e), "details": None, "hint": None})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_HEAD(self):
+        self._handle("HEAD")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+def make_server(db_path: str = DEFAULT_DB, host: str = "127.0.0.1", port: int = 54321,
+                latency: float = 0.0, jitter: float = 0.0, verbose: bool = False,
+                max_rows: int = MAX_ROWS):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.api = LocalPostgrest(db_path, latency, jitter, max_rows)
+    server.verbose = verbose
+    server.url = f"http://{host}:{server.server_address[1]}"
+    return server
+
+def start_background(db_path: str = DEFAULT_DB, port: int = 0, latency: float = 0.0, jitter: float = 0.0):
+    """벤치마크/부하 테스트용 - 별도 스레드에서 서버 실행 (port=0 이면 빈 포트)"""
+    server = make_server(db_path, port=port, latency=latency, jitter=jitter)
+    threading.Thread(target=server.serve_forever, name="local-postgrest", daemon=True).start()
+    return server
+
+def seed_from_sqlite(db_path: str, source: str = "reminder.db"):
+    """로컬 reminder.db 의 사용자/업무를 대역 DB 로 복사 (이미 있는 행은 건너뜀)"""
+    api = LocalPostgrest(db_path)
+    src = sqlite3.connect(source)
+    src.row_factory = sqlite3.Row
+    try:
+        users = src.execute("SELECT email, name FROM users").fetchall()
+        tasks = src.execute("SELECT * FROM tasks").fetchall()
+    finally:
+        src.close()
+    with api.connect() as conn:
+        conn.executemany("INSERT OR IGNORE INTO users (email, name) VALUES (?, ?)",
+                         [(u["email"], u["name"]) for u in users])
+        conn.executemany("""
+            INSERT OR IGNORE INTO tasks (id, title, assignee_email, frequency, status, due_date,
+                                         hmac_token, last_completed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(t["id"], t["title"], t["assignee_email"], t["frequency"], t["status"] or "pending",
+               t["due_date"], t["hmac_token"], t["last_completed_at"]) for t in tasks])
+    print(f"✅ 시드 완료: 사용자 {len(users)}명, 업무 {len(tasks)}개")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite 기반 로컬 PostgREST 대역 서버")
+    parser.add_argument("--db", default=os.getenv("LOCAL_POSTGREST_DB", DEFAULT_DB))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=float(os.getenv("LOCAL_POSTGREST_LATENCY_MS", "0")),
+                        help="요청마다 넣을 지연 시간")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="0~N ms 의 무작위 추가 지연")
+    parser.add_argument("--seed-from", help="사용자/업무를 복사해 올 SQLite 파일 (예: reminder.db)")
+    parser.add_argument("--max-rows", type=int, default=MAX_ROWS, help="한 응답의 최대 행 수 (db-max-rows)")
+    parser.add_argument("--verbose", action="store_true", help="요청 로그 출력")
+    args = parser.parse_args()
+
+    if args.seed_from:
+        seed_from_sqlite(args.db, args.seed_from)
+    server = make_server(args.db, args.host, args.port,
+                         args.latency_ms / 1000, args.jitter_ms / 1000, args.verbose, args.max_rows)
+    print(f"🚀 로컬 PostgREST 실행: {server.url}/rest/v1 (DB: {args.db}, 지연 {args.latency_ms}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,31 +1,194 @@
 # mailer.py
-import smtplib, hmac, hashlib, base64, yaml
+import smtplib, hmac, hashlib, base64, secrets, yaml
+from functools import lru_cache
 from email.mime.text import MIMEText
 from email.utils import formataddr
+from metrics import smtp_send_duration, smtp_errors
+from db import kst_now, cycle_start, next_cycle_start
 
-def _load_secret() -> bytes:
+def _load_cfg() -> dict:
     try:
         with open("config.yaml", "r", encoding="utf-8") as f:
-            cfg = yaml.safe_load(f)
-            sec = cfg.get("secret", "CHANGE_ME_SECRET")
-            return sec.encode()
+            return yaml.safe_load(f) or {}
     except Exception:
-        return b"CHANGE_ME_SECRET"
+        return {}
+
+@lru_cache(maxsize=1)
+def _load_secret() -> bytes:
+    sec = _load_cfg().get("secret", "CHANGE_ME_SECRET")
+    return str(sec).encode()
+
+@lru_cache(maxsize=1)
+def _load_keys():
+    """서명 키 목록 (키 교체용)
+
+    config.yaml 의 secret 은 키 ID "0", token_keys 에 추가 키를 두고
+    token_key_id 로 새 토큰에 쓸 키를 고른다. 이전 키로 서명된 토큰도 계속 검증된다."""
+    cfg = _load_cfg()
+    keys = {"0": _load_secret()}
+    for kid, sec in (cfg.get("token_keys") or {}).items():
+        keys[str(kid)] = str(sec).encode()
+    active = str(cfg.get("token_key_id", "0"))
+    if active not in keys:
+        active = "0"
+    return active, keys
 
 def make_token(task_id: int) -> str:
+    """기존 형식 토큰 (tasks.hmac_token 에 저장되는 값)"""
     secret = _load_secret()
     digest = hmac.new(secret, str(task_id).encode(), hashlib.sha256).digest()
     return base64.urlsafe_b64encode(digest).decode().rstrip("=")
 
+def make_row_token(task_id: int) -> str:
+    """토큰이 없는 업무에 새로 저장할 hmac_token - ID 에 난수를 섞어 다른 저장소의 같은 ID 업무와 겹치지 않음"""
+    secret = _load_secret()
+    digest = hmac.new(secret, f"{task_id}:{secrets.token_hex(16)}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+# ========== 자체 검증 토큰 ==========
+# 형식: v2.<키ID>.<업무ID>.<행 키>.<주기 시작>.<만료>.<서명>  (v1 은 행 키 없음)
+#   - 주기 시작/만료는 36진수 epoch 초 (만료 = 다음 주기 시작)
+#   - 행 키는 업무의 hmac_token 앞 ROW_KEY_LEN 자리 - SQLite 와 Supabase 에서 같은 값
+#   - 서명은 HMAC-SHA256 앞 16바이트 (urlsafe base64)
+# 업무 ID 로 먼저 조회하고, 두 저장소의 ID 가 어긋나 행 키가 다르면 hmac_token 으로 다시 찾는다.
+# 지난 주기의 링크는 DB 조회 없이 만료로 거부된다.
+TOKEN_VERSION = "v1"
+KEYED_TOKEN_VERSION = "v2"
+ROW_KEY_LEN = 12
+
+def row_key(hmac_token) -> str:
+    """저장소 간 같은 업무를 가리키는 행 키 (hmac_token 이 없으면 빈 문자열)"""
+    return (hmac_token or "")[:ROW_KEY_LEN]
+
+def _b36(n: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+        if n == 0:
+            return out
+
+def _sign(key: bytes, payload: str) -> str:
+    digest = hmac.new(key, payload.encode(), hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+def is_signed_token(token: str) -> bool:
+    return token.startswith((TOKEN_VERSION + ".", KEYED_TOKEN_VERSION + "."))
+
+def make_task_token(task_id: int, frequency: str = "daily", now=None, key: str = "") -> str:
+    """현재 주기 동안만 유효한 업무 완료 토큰 (key: row_key(hmac_token))"""
+    now = now or kst_now()
+    kid, keys = _load_keys()
+    cs = int(cycle_start(frequency, now).timestamp())
+    exp = int(next_cycle_start(frequency, now).timestamp())
+    if key:
+        payload = f"{KEYED_TOKEN_VERSION}.{kid}.{int(task_id)}.{key}.{_b36(cs)}.{_b36(exp)}"
+    else:
+        payload = f"{TOKEN_VERSION}.{kid}.{int(task_id)}.{_b36(cs)}.{_b36(exp)}"
+    return f"{payload}.{_sign(keys[kid], payload)}"
+
+def verify_task_token(token: str, now=None):
+    """서명/만료 확인 후 {'task_id', 'row_key', 'cycle_start', 'expires_at'} 반환 (실패 시 None)
+
+    v1 토큰의 row_key 는 None."""
+    parts = token.split(".")
+    if len(parts) == 7 and parts[0] == KEYED_TOKEN_VERSION:
+        _, kid, task_id, key, cs, exp, sig = parts
+    elif len(parts) == 6 and parts[0] == TOKEN_VERSION:
+        _, kid, task_id, cs, exp, sig = parts
+        key = None
+    else:
+        return None
+    secret = _load_keys()[1].get(kid)
+    if secret is None:
+        return None
+    payload = token[:-(len(sig) + 1)]
+    if not hmac.compare_digest(_sign(secret, payload), sig):
+        return None
+    try:
+        claims = {"task_id": int(task_id), "row_key": key or None,
+                  "cycle_start": int(cs, 36), "expires_at": int(exp, 36)}
+    except ValueError:
+        return None
+    now = now or kst_now()
+    if now.timestamp() >= claims["expires_at"]:
+        return None
+    return claims
+
+# ========== 일괄 완료 토큰 ==========
+# 형식: b2.<키ID>.<업무ID 목록>.<행 키 목록>.<만료>.<서명>  (b1 은 행 키 목록 없음)
+#   - 업무 ID 는 정렬 후 차이값을 36진수로 '-' 연결 (100,101,105 -> 2s-1-4)
+#   - 행 키는 같은 순서로 '~' 연결 (hmac_token 에 '-' 가 들어갈 수 있으므로)
+BATCH_TOKEN_VERSION = "b1"
+KEYED_BATCH_TOKEN_VERSION = "b2"
+
+def make_batch_token(task_ids, expires_at, row_keys=None) -> str:
+    """여러 업무를 한 번에 완료하는 서명 토큰 (expires_at: datetime, row_keys: {업무ID: 행 키})"""
+    kid, keys = _load_keys()
+    ids = sorted(set(int(i) for i in task_ids))
+    deltas = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])] if ids else []
+    encoded = "-".join(_b36(d) for d in deltas)
+    exp = _b36(int(expires_at.timestamp()))
+    if row_keys:
+        keyed = "~".join(row_keys.get(i, "") for i in ids)
+        payload = f"{KEYED_BATCH_TOKEN_VERSION}.{kid}.{encoded}.{keyed}.{exp}"
+    else:
+        payload = f"{BATCH_TOKEN_VERSION}.{kid}.{encoded}.{exp}"
+    return f"{payload}.{_sign(keys[kid], payload)}"
+
+def verify_batch_token(token: str, now=None):
+    """서명/만료 확인 후 (업무 ID, 행 키) 목록 반환 (실패 시 None, b1 토큰의 행 키는 None)"""
+    parts = token.split(".")
+    if len(parts) == 6 and parts[0] == KEYED_BATCH_TOKEN_VERSION:
+        _, kid, encoded, keyed, exp, sig = parts
+    elif len(parts) == 5 and parts[0] == BATCH_TOKEN_VERSION:
+        _, kid, encoded, exp, sig = parts
+        keyed = None
+    else:
+        return None
+    secret = _load_keys()[1].get(kid)
+    if secret is None:
+        return None
+    payload = token[:-(len(sig) + 1)]
+    if not hmac.compare_digest(_sign(secret, payload), sig):
+        return None
+    try:
+        expires_at = int(exp, 36)
+        ids, total = [], 0
+        for part in encoded.split("-") if encoded else []:
+            total += int(part, 36)
+            ids.append(total)
+    except ValueError:
+        return None
+    row_keys = keyed.split("~") if keyed is not None else [None] * len(ids)
+    if len(row_keys) != len(ids):
+        return None
+    now = now or kst_now()
+    if now.timestamp() >= expires_at:
+        return None
+    return [(task_id, key or None) for task_id, key in zip(ids, row_keys)]
+
 def build_task_url(base_url: str, token: str):
     return f"{base_url}/complete?token={token}"
 
+def build_batch_url(base_url: str, token: str):
+    return f"{base_url}/complete-batch?t={token}"
+
+class DigestFailed(RuntimeError):
+    """보낼 메일이 있었지만 한 통도 보내지 못했을 때 발생"""
+
 def send_email(smtp_host, smtp_port, smtp_id, smtp_pw, sender_name, sender_email, to_email, subject, html_body):
     msg = MIMEText(html_body, "html", "utf-8")
     msg["Subject"] = subject
     msg["From"] = formataddr((sender_name, sender_email))
     msg["To"] = to_email
 
-    with smtplib.SMTP_SSL(smtp_host, smtp_port) as s:
-        s.login(smtp_id, smtp_pw)
-        s.sendmail(sender_email, [to_email], msg.as_string())
+    with smtp_send_duration.time():
+        try:
+            with smtplib.SMTP_SSL(smtp_host, smtp_port) as s:
+                s.login(smtp_id, smtp_pw)
+                s.sendmail(sender_email, [to_email], msg.as_string())
+        except Exception:
+            smtp_errors.inc()
+            raise
@@ -0,0 +1,180 @@
+# metrics.py - Prometheus 텍스트 형식 메트릭 (외부 패키지 없이 동작)
+# webhook.py 의 /metrics 엔드포인트가 render() 결과를 그대로 반환한다.
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict):
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {v}" for k, v in items]
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels=()):
+        super().__init__(name, help, labels)
+        self._functions = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn, **labels):
+        """수집 시점에 fn() 값을 읽는 게이지 (큐 길이 등)"""
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def _samples(self):
+        with self._lock:
+            items = dict(self._values)
+            functions = list(self._functions.items())
+        for key, fn in functions:
+            try:
+                items[key] = fn()
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.label_names, k)} {v}" for k, v in items.items()]
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += 1
+            state[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        lines = []
+        for key, (counts, count, total) in items:
+            for bound, c in zip(self.buckets, counts):
+                labels = _format_labels(self.label_names, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {c}")
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+def render() -> str:
+    return "\n".join(m.render() for m in _registry) + "\n"
+
+# ========== 공용 메트릭 ==========
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간", ("method", "route", "status"))
+sqlite_query_duration = Histogram(
+    "sqlite_query_duration_seconds", "SQLite 쿼리 실행 시간", ("op",))
+sqlite_errors = Counter(
+    "sqlite_errors_total", "SQLite 쿼리 오류 수", ("op",))
+supabase_request_duration = Histogram(
+    "supabase_request_duration_seconds", "Supabase 요청 시간", ("op",))
+supabase_errors = Counter(
+    "supabase_errors_total", "Supabase 요청 오류 수", ("op",))
+smtp_send_duration = Histogram(
+    "smtp_send_duration_seconds", "SMTP 메일 발송 시간")
+smtp_errors = Counter(
+    "smtp_errors_total", "SMTP 발송 오류 수")
+digest_run_duration = Histogram(
+    "digest_run_duration_seconds", "일일 알림 발송 전체 실행 시간",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800))
+digest_emails = Counter(
+    "digest_emails_total", "일일 알림 메일 발송 결과", ("status",))
+queue_depth = Gauge(
+    "queue_depth", "대기 중인 작업 수", ("queue",))
+
+class TimedConnection(sqlite3.Connection):
+    """execute/executemany 시간을 sqlite_query_duration 에 기록하는 연결
+
+    sqlite3.connect(path, factory=TimedConnection) 으로 사용한다.
+    op 라벨은 SQL 첫 단어(SELECT/INSERT/UPDATE ...)로 카디널리티를 제한한다."""
+
+    def _observe(self, method, sql, *args):
+        op = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "EMPTY"
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        except Exception:
+            sqlite_errors.inc(op=op)
+            raise
+        finally:
+            sqlite_query_duration.observe(time.perf_counter() - start, op=op)
+
+    def execute(self, sql, *args):
+        return self._observe(super().execute, sql, *args)
+
+    def executemany(self, sql, *args):
+        return self._observe(super().executemany, sql, *args)
@@ -1,11 +1,235 @@
 # migrate_to_supabase.py - SQLite 데이터를 Supabase로 마이그레이션
-import sqlite3
-from supabase_client import SupabaseManager
-from mailer import make_token
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from supabase_client import SupabaseManager, get_supabase_manager
+from mailer import make_row_token
+from db import get_conn, set_state, get_state, kst_now
 import os
 
-# 마이그레이션용 Supabase 매니저 (service_role 키 사용)
-supabase_manager = SupabaseManager(use_service_key=True)
+# 마이그레이션용 Supabase 매니저 (service_role 키 사용) - 첫 사용 시 생성
+def get_manager() -> SupabaseManager:
+    return get_supabase_manager(use_service_key=True)
+
+# ========== 일괄 마이그레이션 ==========
+# SQLite 를 키 순서대로 CHUNK_SIZE 행씩 읽어 Supabase 에 upsert 하고,
+# 앞에서부터 연속으로 끝난 청크까지의 마지막 키를 system_settings 에 체크포인트로 남긴다.
+# 중간에 실패해도 다시 실행하면 체크포인트 다음부터 이어서 진행한다 (upsert 라 겹쳐도 안전).
+CHUNK_SIZE = int(os.getenv("MIGRATE_CHUNK_SIZE", "500"))
+MIGRATE_WORKERS = int(os.getenv("MIGRATE_WORKERS", "4"))
+
+def _created_at(row) -> str:
+    # SQLite 의 CURRENT_TIMESTAMP 는 UTC 라서 시간대 없이 보내면 Supabase(UTC)에서 같은 시각
+    return (row['created_at'] if 'created_at' in row.keys() else None) or kst_now().isoformat()
+
+def _user_row(row) -> dict:
+    return {'email': row['email'], 'name': row['name'], 'created_at': _created_at(row)}
+
+def _task_row(row) -> dict:
+    keys = row.keys()
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'assignee_email': row['assignee_email'],
+        'frequency': row['frequency'],
+        'status': row['status'] or 'pending',
+        'creator_name': row['creator_name'] if 'creator_name' in keys else None,
+        'due_date': row['due_date'] if 'due_date' in keys else None,
+        'last_completed_at': row['last_completed_at'] if 'last_completed_at' in keys else None,
+        # 토큰이 없던 업무는 _send_tasks 가 Supabase 쪽 토큰을 쓰거나 새로 발급
+        'hmac_token': row['hmac_token'] if 'hmac_token' in keys else None,
+        'created_at': _created_at(row),
+    }
+
+def _send_users(manager, rows) -> int:
+    return manager.upsert_rows('users', [_user_row(r) for r in rows], on_conflict='email')
+
+def _send_tasks(manager, rows) -> int:
+    """업무 청크 보내기 - Supabase 에 이미 있는 같은 업무는 그 ID 로 갱신
+
+    두 저장소의 업무 ID 는 따로 발급되므로 ID 만 보고 upsert 하면 다른 업무를 덮어쓰거나
+    hmac_token UNIQUE 에 걸린다. 같은 업무는 hmac_token, 없으면 (제목, 담당자) 로 찾고,
+    어느 쪽에도 없는 새 업무만 로컬 ID 를 쓴다 (그 ID 를 다른 업무가 쓰고 있으면 서버가 발급)."""
+    tasks = [_task_row(r) for r in rows]
+    columns = 'id,title,assignee_email,hmac_token'
+    by_token = {r['hmac_token']: r for r in
+                manager.select_in('tasks', 'hmac_token', [t['hmac_token'] for t in tasks if t['hmac_token']], columns)}
+    # 이 청크의 제목만 조회 (담당자 조건을 더해) - 담당자의 업무 전체를 청크마다 받지 않도록
+    emails = sorted({t['assignee_email'] for t in tasks if t['assignee_email']})
+    by_pair = {(r['title'], r['assignee_email']): r for r in
+               manager.select_in('tasks', 'title', {t['title'] for t in tasks}, columns,
+                                 where=lambda query: query.in_('assignee_email', emails))} if emails else {}
+    taken = {r['id'] for r in manager.select_in('tasks', 'id', [t['id'] for t in tasks], 'id')}
+    remotes = []
+    for task in tasks:
+        remote = by_token.get(task['hmac_token']) or by_pair.get((task['title'], task['assignee_email']))
+        if not task['hmac_token'] and remote and remote['hmac_token']:
+            # 로컬에 토큰이 없으면 이미 보낸 링크가 있는 Supabase 쪽 토큰을 그대로 쓴다
+            task['hmac_token'] = remote['hmac_token']
+        remotes.append(remote)
+    _issue_tokens(manager, tasks)
+
+    keyed, fresh = [], []
+    used = set()   # 한 upsert 안에서 같은 ID 가 두 번 나오지 않도록
+    for task, remote in zip(tasks, remotes):
+        remote_id = remote['id'] if remote else None
+        if remote_id is None and task['id'] not in taken:
+            remote_id = task['id']
+        if remote_id is not None and remote_id not in used:
+            used.add(remote_id)
+            keyed.append({**task, 'id': remote_id})
+        else:
+            fresh.append({k: v for k, v in task.items() if k != 'id'})
+    return manager.upsert_rows('tasks', keyed, on_conflict='id') + manager.insert_rows('tasks', fresh)
+
+def _issue_tokens(manager, tasks):
+    """어느 저장소에도 토큰이 없는 업무에 새 토큰을 발급 (Supabase 에 이미 있는 값이면 다시 발급)
+
+    Supabase 에서 가져오거나 새로 만든 토큰은 SQLite 의 빈 hmac_token 에도 저장해 두 저장소의 행 키를 맞춘다."""
+    missing = [t for t in tasks if not t['hmac_token']]
+    while missing:
+        for task in missing:
+            task['hmac_token'] = make_row_token(task['id'])
+        clash = {r['hmac_token'] for r in
+                 manager.select_in('tasks', 'hmac_token', [t['hmac_token'] for t in missing], 'id,hmac_token')}
+        missing = [t for t in missing if t['hmac_token'] in clash]
+    with get_conn() as conn:
+        conn.executemany("UPDATE OR IGNORE tasks SET hmac_token = ? WHERE id = ? AND hmac_token IS NULL",
+                         [(t['hmac_token'], t['id']) for t in tasks])
+
+# 테이블별 설정: 키 컬럼, 청크 전송 함수, 검증에 쓰는 컬럼 (첫 컬럼으로 두 저장소의 행을 짝지음)
+MIGRATIONS = {
+    'users': {'key': 'email', 'start': '', 'send': _send_users, 'verify': ('email', 'name')},
+    'tasks': {'key': 'id', 'start': 0, 'send': _send_tasks,
+              'verify': ('hmac_token', 'title', 'assignee_email', 'frequency', 'status')},
+}
+
+def _checkpoint_key(table: str) -> str:
+    return f"migration.{table}.last_key"
+
+def _read_chunks(table: str, after, chunk_size: int):
+    """SQLite 에서 키 순서대로 청크 단위로 읽기"""
+    key = MIGRATIONS[table]['key']
+    while True:
+        with get_conn() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?", (after, chunk_size)
+            ).fetchall()
+        if not rows:
+            return
+        yield rows
+        after = rows[-1][key]
+
+def migrate_table(table: str, job=None, chunk_size: int = None, workers: int = None) -> int:
+    """테이블 하나를 청크 단위 병렬 upsert 로 옮기고 옮긴 행 수를 반환"""
+    spec = MIGRATIONS[table]
+    chunk_size = chunk_size or CHUNK_SIZE
+    workers = workers or MIGRATE_WORKERS
+    manager = get_manager()
+    
+    with get_conn() as conn:
+        saved = get_state(conn, _checkpoint_key(table))
+        total = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    after = spec['start'] if saved is None else type(spec['start'])(saved)
+    if saved is not None:
+        print(f"↩️ {table}: 체크포인트 {saved} 다음부터 이어서 진행")
+    
+    def send(rows):
+        spec['send'](manager, rows)
+        return len(rows)
+    
+    migrated = 0
+    finished = {}      # 청크 순번 -> 마지막 키 (완료된 것)
+    next_commit = 0    # 체크포인트에 아직 반영 안 된 첫 청크 순번
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"migrate-{table}") as pool:
+        pending = {}
+        chunks = enumerate(_read_chunks(table, after, chunk_size))
+        exhausted = False
+        while pending or not exhausted:
+            # 동시에 보내는 청크 수를 workers 개로 제한
+            while not exhausted and len(pending) < workers:
+                item = next(chunks, None)
+                if item is None:
+                    exhausted = True
+                    break
+                index, rows = item
+                pending[pool.submit(send, rows)] = (index, rows[-1][spec['key']])
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, last_key = pending.pop(future)
+                migrated += future.result()   # 실패하면 여기서 예외 - 체크포인트는 그대로
+                finished[index] = last_key
+            
+            # 앞에서부터 연속으로 끝난 청크까지만 체크포인트 이동
+            last = None
+            while next_commit in finished:
+                last = finished.pop(next_commit)
+                next_commit += 1
+            if last is not None:
+                with get_conn() as conn:
+                    set_state(conn, _checkpoint_key(table), str(last))
+            if job:
+                job.set_progress(migrated, total, table)
+                job.check_cancelled()
+    
+    print(f"✅ {table} 마이그레이션: {migrated}행 upsert")
+    return migrated
+
+def _checksum(rows, columns) -> str:
+    digest = hashlib.sha256()
+    for row in sorted(rows, key=lambda r: r[columns[0]]):
+        digest.update("\x1f".join(str(row[c] if row[c] is not None else "") for c in columns).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+def verify_table(table: str) -> dict:
+    """로컬 행이 Supabase 에 모두 같은 값으로 있는지 행 수와 체크섬으로 확인"""
+    spec = MIGRATIONS[table]
+    columns = spec['verify']
+    with get_conn() as conn:
+        if table == 'tasks':
+            # 토큰이 없던 업무는 마이그레이션 때 발급한 값과 비교
+            local = [{**dict(r), 'hmac_token': _task_row(r)['hmac_token']}
+                     for r in conn.execute("SELECT * FROM tasks")]
+            local = [{c: r[c] for c in columns} for r in local]
+        else:
+            local = [dict(r) for r in conn.execute(f"SELECT {', '.join(columns)} FROM {table}")]
+    local_keys = {r[columns[0]] for r in local}
+    pages = get_manager().iter_users if table == 'users' else get_manager().iter_tasks
+    remote = [r for r in pages(columns=','.join(columns)) if r[columns[0]] in local_keys]
+    if 'status' in columns:
+        for row in local:
+            row['status'] = row['status'] or 'pending'
+    result = {
+        'local_count': len(local),
+        'remote_count': len(remote),
+        'local_checksum': _checksum(local, columns),
+        'remote_checksum': _checksum(remote, columns),
+    }
+    result['ok'] = (result['local_count'] == result['remote_count']
+                    and result['local_checksum'] == result['remote_checksum'])
+    icon = "✅" if result['ok'] else "❌"
+    print(f"{icon} {table} 검증: 로컬 {result['local_count']}행 / Supabase {result['remote_count']}행, "
+          f"체크섬 {'일치' if result['ok'] else '불일치'}")
+    return result
+
+def migrate_all(job=None) -> dict:
+    """사용자 -> 업무 순서로 옮기고 검증 (업무가 사용자 이메일을 참조)"""
+    report = {}
+    for table in ('users', 'tasks'):
+        report[table] = {'migrated': migrate_table(table, job=job)}
+    # 새 업무는 로컬 ID 로 넣었으므로 Supabase 쪽 ID 시퀀스를 최대값으로 맞춤
+    get_manager().sync_task_id_sequence()
+    for table in ('users', 'tasks'):
+        report[table].update(verify_table(table))
+    if all(r['ok'] for r in report.values()):
+        # 다 끝난 실행의 체크포인트는 지워서 다음 동기화는 처음부터 (upsert 라 중복 없음)
+        with get_conn() as conn:
+            for table in report:
+                conn.execute("DELETE FROM system_settings WHERE key = ?", (_checkpoint_key(table),))
+            set_state(conn, "last_sync_at", get_manager().kst_now().isoformat())
+    return report
 
 def migrate_users_from_sqlite():
     """SQLite에서 사용자 데이터를 Supabase로 마이그레이션"""
@@ -16,26 +240,8 @@ def migrate_users_from_sqlite():
         return False
     
     try:
-        # SQLite 연결
-        conn = sqlite3.connect("reminder.db")
-        conn.row_factory = sqlite3.Row
-        
-        # 사용자 데이터 조회
-        users = conn.execute("SELECT * FROM users").fetchall()
-        
-        migrated_count = 0
-        for user in users:
-            success = supabase_manager.add_user(user['email'], user['name'])
-            if success:
-                migrated_count += 1
-                print(f"✅ 사용자 마이그레이션: {user['name']} ({user['email']})")
-            else:
-                print(f"⚠️ 사용자 마이그레이션 실패: {user['email']}")
-        
-        conn.close()
-        print(f"✅ 사용자 마이그레이션 완료: {migrated_count}명")
-        return True
-        
+        migrate_table('users')
+        return verify_table('users')['ok']
     except Exception as e:
         print(f"❌ 사용자 마이그레이션 오류: {e}")
         return False
@@ -49,48 +255,9 @@ def migrate_tasks_from_sqlite():
         return False
     
     try:
-        # SQLite 연결
-        conn = sqlite3.connect("reminder.db")
-        conn.row_factory = sqlite3.Row
-        
-        # 업무 데이터 조회
-        tasks = conn.execute("SELECT * FROM tasks").fetchall()
-        
-        migrated_count = 0
-        for task in tasks:
-            # Supabase에 업무 추가
-            task_data = {
-                'title': task['title'],
-                'assignee_email': task['assignee_email'],
-                'frequency': task['frequency'],
-                'status': task['status'],
-                'creator_name': task['creator_name'] if 'creator_name' in task.keys() else '',
-                'due_date': task['due_date'] if 'due_date' in task.keys() else None,
-                'last_completed_at': task['last_completed_at'] if 'last_completed_at' in task.keys() else None,
-                'created_at': task['created_at'] if 'created_at' in task.keys() else supabase_manager.kst_now().isoformat()
-            }
-            
-            # HMAC 토큰 생성 (기존 토큰이 없으면)
-            if 'hmac_token' not in task.keys() or not task['hmac_token']:
-                token = make_token(task['id'])
-                task_data['hmac_token'] = token
-            else:
-                task_data['hmac_token'] = task['hmac_token']
-            
-            try:
-                response = supabase_manager.supabase.table('tasks').insert(task_data).execute()
-                if response.data:
-                    migrated_count += 1
-                    print(f"✅ 업무 마이그레이션: {task['title']}")
-                else:
-                    print(f"⚠️ 업무 마이그레이션 실패: {task['title']}")
-            except Exception as e:
-                print(f"⚠️ 업무 마이그레이션 오류 {task['title']}: {e}")
-        
-        conn.close()
-        print(f"✅ 업무 마이그레이션 완료: {migrated_count}개")
-        return True
-        
+        migrate_table('tasks')
+        get_manager().sync_task_id_sequence()
+        return verify_table('tasks')['ok']
     except Exception as e:
         print(f"❌ 업무 마이그레이션 오류: {e}")
         return False
@@ -107,7 +274,7 @@ def create_sample_data():
     ]
     
     for email, name in sample_users:
-        supabase_manager.add_user(email, name)
+        get_manager().add_user(email, name)
     
     # 샘플 업무 추가
     sample_tasks = [
@@ -120,11 +287,11 @@ def create_sample_data():
     
     created_count = 0
     for title, assignee_email, frequency, creator_name in sample_tasks:
-        task_id = supabase_manager.add_task(title, assignee_email, frequency, creator_name)
+        task_id = get_manager().add_task(title, assignee_email, frequency, creator_name)
         if task_id:
             # 토큰 생성 및 업데이트
-            token = make_token(task_id)
-            supabase_manager.update_task_token(task_id, token)
+            token = make_row_token(task_id)
+            get_manager().update_task_token(task_id, token)
             created_count += 1
             print(f"✅ 샘플 업무 생성: {title}")
     
@@ -147,7 +314,7 @@ def main():
     
     try:
         # Supabase 연결 테스트
-        stats = supabase_manager.get_task_statistics()
+        stats = get_manager().get_task_statistics()
         print(f"✅ Supabase 연결 성공 - 현재 업무 수: {stats['total_tasks']}개")
         
         choice = input("\n마이그레이션 옵션을 선택하세요:\n1. SQLite에서 마이그레이션\n2. 새로운 샘플 데이터 생성\n선택 (1 또는 2): ")
@@ -155,8 +322,9 @@ def main():
         if choice == "1":
             # SQLite 마이그레이션
             print("\n📦 SQLite 데이터 마이그레이션 시작...")
-            migrate_users_from_sqlite()
-            migrate_tasks_from_sqlite()
+            report = migrate_all()
+            if not all(r['ok'] for r in report.values()):
+                print("⚠️ 검증 실패 - 다시 실행하면 체크포인트부터 이어서 진행합니다.")
             
         elif choice == "2":
             # 샘플 데이터 생성
@@ -168,7 +336,7 @@ def main():
             return
         
         # 최종 통계
-        final_stats = supabase_manager.get_task_statistics()
+        final_stats = get_manager().get_task_statistics()
         print("\n🎉 마이그레이션 완료!")
         print("=" * 50)
         print(f"📊 최종 통계:")
@@ -0,0 +1,285 @@
+# reconcile.py - SQLite(reminder.db) <-> Supabase 업무 양방향 동기화
+# 웹훅은 SQLite 에 완료를 기록하고 digest.py 는 Supabase 를 읽으므로 두 저장소가 어긋난다.
+# 전체 행을 비교하는 대신 ID 구간별 해시(머클 트리 방식)를 비교해 다른 구간만 쪼개 내려가고,
+# 마지막 구간(LEAF_WIDTH 이하)에서만 행을 받아 updated_at 이 최신인 쪽으로 맞춘다.
+# 삭제는 양쪽의 task_tombstones 로 전파한다.
+#
+# 원격 구간 해시는 supabase_schema.sql 의 task_range_digests RPC 가 아래 task_row_hash 와
+# 같은 방식으로 계산한다 (행 문자열 md5 를 ID 순으로 이어 붙인 뒤 다시 md5).
+import argparse
+import hashlib
+import os
+from bisect import bisect_left
+from datetime import datetime
+from db import get_conn, set_state, kst_now, KST, TOMBSTONE_SCHEMA
+from supabase_client import get_supabase_manager
+
+FANOUT = int(os.getenv("RECONCILE_FANOUT", "16"))
+LEAF_WIDTH = int(os.getenv("RECONCILE_LEAF_WIDTH", "256"))
+
+SYNC_COLUMNS = ("id", "title", "assignee_email", "frequency", "due_date", "status",
+                "hmac_token", "last_completed_at", "updated_at")
+
+def _parse_ts(value):
+    """저장소마다 다른 시각 형식 -> KST aware datetime (시간대 없는 값은 KST 로 간주)"""
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts.replace(tzinfo=KST) if ts.tzinfo is None else ts.astimezone(KST)
+
+def _ts_text(value) -> str:
+    ts = _parse_ts(value)
+    return ts.strftime("%Y-%m-%dT%H:%M:%S") if ts else ""
+
+def task_row_hash(row) -> str:
+    """비교용 행 해시 - task_range_digests RPC 와 같은 컬럼/형식"""
+    text = "|".join([
+        str(row["id"]), row["title"] or "", row["assignee_email"] or "", row["frequency"] or "",
+        row["status"] or "", _ts_text(row["last_completed_at"]),
+    ])
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+def range_digest(hashes) -> str:
+    return hashlib.md5("".join(hashes).encode("ascii")).hexdigest() if hashes else ""
+
+def _changed_at(row):
+    """충돌 해결 기준 시각 - updated_at 과 last_completed_at 중 늦은 것"""
+    times = [t for t in (_parse_ts(row.get("updated_at")), _parse_ts(row.get("last_completed_at"))) if t]
+    return max(times) if times else None
+
+def _split(lo: int, hi: int):
+    width = max(1, -(-(hi - lo) // FANOUT))
+    return [(start, min(start + width, hi)) for start in range(lo, hi, width)]
+
+class LocalSide:
+    """SQLite 쪽 행/해시를 한 번 읽어 두고 구간 해시를 메모리에서 계산"""
+
+    def __init__(self):
+        with get_conn() as conn:
+            conn.executescript(TOMBSTONE_SCHEMA)
+            rows = conn.execute(f"SELECT {', '.join(SYNC_COLUMNS)} FROM tasks ORDER BY id").fetchall()
+            self.tombstones = {r["id"]: r["deleted_at"] for r in conn.execute("SELECT id, deleted_at FROM task_tombstones")}
+        self.rows = {r["id"]: dict(r) for r in rows}
+        self.ids = [r["id"] for r in rows]
+        self.hashes = [task_row_hash(r) for r in rows]
+
+    def max_id(self) -> int:
+        return self.ids[-1] if self.ids else 0
+
+    def digests(self, bounds):
+        result = {}
+        for lo, hi in bounds:
+            a, b = bisect_left(self.ids, lo), bisect_left(self.ids, hi)
+            result[(lo, hi)] = (b - a, range_digest(self.hashes[a:b]))
+        return result
+
+    def rows_in(self, bounds):
+        return {i: self.rows[i] for lo, hi in bounds
+                for i in self.ids[bisect_left(self.ids, lo):bisect_left(self.ids, hi)]}
+
+def _diff_ranges(local: LocalSide, manager, report) -> list:
+    """구간 해시를 비교하며 내려가 다른 말단 구간 목록을 반환"""
+    top = max(local.max_id(), manager.max_task_id() or 0) + 1
+    report["requests"] += 1
+    level = _split(1, top) if top > 1 else []
+    leaves = []
+    while level:
+        remote = manager.task_range_digests(level)
+        report["requests"] += 1
+        mine = local.digests(level)
+        next_level = []
+        for bound in level:
+            if mine[bound] == remote.get(bound, (0, "")):
+                continue
+            if bound[1] - bound[0] <= LEAF_WIDTH:
+                leaves.append(bound)
+            else:
+                next_level.extend(_split(*bound))
+        level = next_level
+    return leaves
+
+def _same_task(mine, theirs) -> bool:
+    """같은 ID 의 두 행이 같은 업무인지 - 양쪽에 hmac_token 이 있으면 토큰, 없으면 제목+담당자로 판단
+
+    두 저장소는 ID 를 따로 발급하므로 ID 가 같아도 다른 업무일 수 있다."""
+    if mine.get("hmac_token") and theirs.get("hmac_token"):
+        return mine["hmac_token"] == theirs["hmac_token"]
+    return (mine["title"], mine["assignee_email"]) == (theirs["title"], theirs["assignee_email"])
+
+def _resolve(row_id, mine, theirs, my_tomb, their_tomb):
+    """-> ('push'|'pull'|'delete_remote'|'delete_local'|'conflict'|None)"""
+    if mine and theirs:
+        if task_row_hash(mine) == task_row_hash(theirs):
+            return None
+        if not _same_task(mine, theirs):
+            # ID 만 겹친 다른 업무 - 어느 쪽도 덮어쓰지 않고 보고만 함
+            return "conflict"
+        mine_at, theirs_at = _changed_at(mine), _changed_at(theirs)
+        if theirs_at and (mine_at is None or theirs_at > mine_at):
+            return "pull"
+        return "push"
+    if mine:
+        # 원격에서 지워졌고 그 뒤로 로컬 변경이 없으면 로컬도 삭제
+        deleted = _parse_ts(their_tomb)
+        changed = _changed_at(mine)
+        if deleted and (changed is None or deleted >= changed):
+            return "delete_local"
+        return "push"
+    if theirs:
+        deleted = _parse_ts(my_tomb)
+        changed = _changed_at(theirs)
+        if deleted and (changed is None or deleted >= changed):
+            return "delete_remote"
+        return "pull"
+    return None
+
+def _remote_row(row) -> dict:
+    data = {c: row[c] for c in SYNC_COLUMNS}
+    # 시간대 없는 로컬 시각이 UTC 로 해석되지 않도록 KST 를 붙여 보냄
+    for c in ("last_completed_at", "updated_at"):
+        ts = _parse_ts(data[c])
+        data[c] = ts.isoformat() if ts else None
+    return data
+
+# Supabase 에만 있는 제약 (supabase_schema.sql 의 tasks 정의) - 올리기 전에 걸러서 보고
+REMOTE_FREQUENCIES = ("daily", "weekly", "monthly")
+REMOTE_STATUSES = ("pending", "done")
+
+def _remote_reject_reason(row):
+    if not row["title"]:
+        return "title 없음"
+    if not row["assignee_email"]:
+        return "assignee_email 없음"
+    if row["frequency"] not in REMOTE_FREQUENCIES:
+        return f"지원하지 않는 주기: {row['frequency']}"
+    if row["status"] is not None and row["status"] not in REMOTE_STATUSES:
+        return f"지원하지 않는 상태: {row['status']}"
+    return None
+
+def _push(manager, rows, report) -> int:
+    """로컬 행을 Supabase 에 올리고 올린 행 수를 반환
+
+    원격 제약에 걸릴 행은 미리 빼서 report["rejected"] 에 남기고, 그래도 묶음 upsert 가
+    실패하면 한 행씩 다시 보내 실패한 행만 건너뛴다."""
+    valid = []
+    for row in rows:
+        reason = _remote_reject_reason(row)
+        if reason:
+            report["rejected"].append({"id": row["id"], "reason": reason})
+        else:
+            valid.append(row)
+    if not valid:
+        return 0
+    # 원격 tasks.assignee_email 이 users 를 참조하므로 담당자를 먼저 올림
+    emails = sorted({r["assignee_email"] for r in valid})
+    with get_conn() as conn:
+        users = [dict(u) for u in conn.execute(
+            f"SELECT email, name FROM users WHERE email IN ({','.join('?' * len(emails))})", emails)]
+    users += [{"email": e, "name": e.split("@")[0]} for e in set(emails) - {u["email"] for u in users}]
+    manager.upsert_rows("users", users, on_conflict="email")
+    report["requests"] += 1
+    try:
+        report["requests"] += 1
+        pushed = manager.upsert_rows("tasks", [_remote_row(r) for r in valid], on_conflict="id")
+    except Exception as e:
+        print(f"[WARNING] ⚠️ 일괄 업로드 실패, 한 행씩 다시 시도: {e}")
+        pushed = 0
+        for row in valid:
+            report["requests"] += 1
+            try:
+                pushed += manager.upsert_rows("tasks", [_remote_row(row)], on_conflict="id")
+            except Exception as e:
+                report["rejected"].append({"id": row["id"], "reason": str(e)})
+    if pushed:
+        # ID 를 지정해 올렸으므로 시퀀스를 맞춰야 다음 일반 추가(웹 UI, add_task)가 겹치지 않음
+        report["requests"] += 1
+        manager.sync_task_id_sequence()
+    return pushed
+
+def _apply_local(pull_rows, delete_ids):
+    columns = SYNC_COLUMNS
+    sql = f"""
+        INSERT INTO tasks ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+        ON CONFLICT(id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in columns[1:])}
+    """
+    skipped = 0
+    with get_conn() as conn:
+        for row in pull_rows:
+            values = [row.get(c) for c in columns]
+            # 원격 시각은 로컬 형식(KST ISO)으로 저장
+            for c in ("last_completed_at", "updated_at"):
+                ts = _parse_ts(row.get(c))
+                values[columns.index(c)] = ts.isoformat() if ts else None
+            try:
+                conn.execute(sql, values)
+            except Exception as e:
+                # 로컬 전용 제약(제목+주기 중복 등)에 걸리는 행은 건너뜀
+                skipped += 1
+                print(f"[WARNING] ⚠️ 로컬 반영 실패 (ID {row['id']}): {e}")
+        if delete_ids:
+            conn.execute(f"DELETE FROM tasks WHERE id IN ({','.join('?' * len(delete_ids))})", list(delete_ids))
+    return skipped
+
+def reconcile(job=None, dry_run: bool = False) -> dict:
+    """두 저장소의 업무를 맞추고 결과 요약을 반환"""
+    manager = get_supabase_manager(use_service_key=True)
+    report = {"requests": 0, "ranges": 0, "pushed": 0, "pulled": 0,
+              "deleted_local": 0, "deleted_remote": 0, "skipped": 0,
+              "conflicts": [], "rejected": []}
+    local = LocalSide()
+    leaves = _diff_ranges(local, manager, report)
+    report["ranges"] = len(leaves)
+    if job:
+        job.check_cancelled()
+        job.set_progress(0, len(leaves), "diff")
+
+    if leaves:
+        theirs = manager.tasks_in_ranges(leaves, columns=",".join(SYNC_COLUMNS))
+        their_tombs = manager.task_tombstones_in_ranges(leaves)
+        report["requests"] += 2
+        mine = local.rows_in(leaves)
+        actions = {"push": [], "pull": [], "delete_local": [], "delete_remote": [], "conflict": []}
+        for row_id in sorted(set(mine) | set(theirs) | set(their_tombs)):
+            action = _resolve(row_id, mine.get(row_id), theirs.get(row_id),
+                              local.tombstones.get(row_id), their_tombs.get(row_id))
+            if action:
+                actions[action].append(row_id)
+
+        report["pushed"] = len(actions["push"])
+        report["pulled"] = len(actions["pull"])
+        report["deleted_local"] = len(actions["delete_local"])
+        report["deleted_remote"] = len(actions["delete_remote"])
+        report["conflicts"] = actions["conflict"]
+        for row_id in actions["conflict"]:
+            print(f"[WARNING] ⚠️ ID {row_id}: 두 저장소의 업무가 다름 "
+                  f"(로컬 '{mine[row_id]['title']}' / 원격 '{theirs[row_id]['title']}') - 건너뜀")
+        if not dry_run:
+            if actions["push"]:
+                report["pushed"] = _push(manager, [mine[i] for i in actions["push"]], report)
+            if actions["delete_remote"]:
+                manager.delete_tasks(actions["delete_remote"])
+                report["requests"] += 1
+            report["skipped"] = _apply_local([theirs[i] for i in actions["pull"]], actions["delete_local"])
+
+    if not dry_run:
+        with get_conn() as conn:
+            set_state(conn, "last_sync_at", kst_now().isoformat())
+    if job:
+        job.set_progress(len(leaves), len(leaves))
+    print(f"✅ 동기화 완료: 요청 {report['requests']}회, 다른 구간 {report['ranges']}개, "
+          f"올림 {report['pushed']} / 내려받음 {report['pulled']} / "
+          f"로컬 삭제 {report['deleted_local']} / 원격 삭제 {report['deleted_remote']}")
+    if report["conflicts"] or report["rejected"]:
+        print(f"[WARNING] ⚠️ ID 충돌 {len(report['conflicts'])}건, 원격 거부 {len(report['rejected'])}건")
+        for item in report["rejected"]:
+            print(f"  - ID {item['id']}: {item['reason']}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite <-> Supabase 업무 양방향 동기화")
+    parser.add_argument("--dry-run", action="store_true", help="변경 없이 차이만 출력")
+    args = parser.parse_args()
+    reconcile(dry_run=args.dry_run)
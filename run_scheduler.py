@@ -1,4 +1,5 @@
-from scheduler import start_scheduler
+from scheduler import start_scheduler, cancel_running
+from leader import LeaderElector
 from datetime import datetime
 from zoneinfo import ZoneInfo
 import time
@@ -7,24 +8,33 @@ kst = ZoneInfo('Asia/Seoul')
 now = datetime.now(kst)
 print(f'현재 시간 (KST): {now.strftime("%Y-%m-%d %H:%M:%S")}')
 
-print('스케줄러 시작...')
-sched = start_scheduler()
+# 웹훅(EMBEDDED_SCHEDULER=1)이나 다른 run_scheduler.py 와 같은 임대를 나눠 쓰므로
+# 여러 개를 띄워도 리더 하나만 메일을 발송한다
+state = {"sched": None}
 
-# 다음 실행 시간 확인
-jobs = sched.get_jobs()
-if jobs:
-    next_run = jobs[0].next_run_time
-    print(f'다음 메일 발송 예정 시간: {next_run.strftime("%Y-%m-%d %H:%M:%S")}')
+def on_elected():
+    print('리더로 선출됨 - 스케줄러 시작...')
+    state["sched"] = start_scheduler()
+    # 다음 실행 시간 확인 (작업 저장소에 남아 있으므로 재시작해도 같은 일정이 이어짐)
+    for job in state["sched"].get_jobs():
+        if job.next_run_time:
+            print(f'다음 실행 예정 ({job.id}): {job.next_run_time.strftime("%Y-%m-%d %H:%M:%S")}')
 
-print('스케줄러가 백그라운드에서 실행 중입니다.')
+def on_revoked():
+    print('리더 임대를 잃음 - 스케줄러 중지')
+    sched, state["sched"] = state["sched"], None
+    if sched is not None:
+        # shutdown(wait=False) 는 이미 도는 작업을 멈추지 않으므로 발송 중인 작업에 먼저 취소 요청
+        cancel_running()
+        sched.shutdown(wait=False)
+
+elector = LeaderElector(on_elected=on_elected, on_revoked=on_revoked).start()
+print(f'리더 선출 대기 중... ({elector.holder})')
 print('Ctrl+C로 종료할 수 있습니다.')
 
 try:
     while True:
-        time.sleep(60)  # 1분마다 체크
-        now = datetime.now(kst)
-        if now.second == 0:  # 매 분의 시작에만 출력
-            print(f'현재 시간: {now.strftime("%H:%M:%S")}')
+        time.sleep(60)
 except KeyboardInterrupt:
     print('\n스케줄러 종료됨')
-    sched.shutdown()
+    elector.stop()
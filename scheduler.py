@@ -1,14 +1,171 @@
 # scheduler.py
+# 예약 작업은 SQLite(reminder.db) 의 APScheduler 작업 저장소에 남으므로 프로세스를 다시 띄워도 유지되고,
+# 09:00 에 꺼져 있었더라도 MISFIRE_GRACE 초 안에 다시 켜지면 놓친 실행을 한 번(coalesce)만 한다.
+# 작업 저장소는 인스턴스마다 따로이므로, 실행 전에 리더 임대와 같은 공유 DB 에 그날 실행 표시를 잡아
+# 리더가 바뀌어도 같은 날 두 번 실행하지 않는다 (leader.py 의 daily_runs).
+# 실행마다 소요 시간/결과/처리 건수를 scheduler_runs 테이블에 기록한다 (/api/scheduler/runs).
+import os
+import time
+import traceback
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.events import EVENT_JOB_MISSED
+from apscheduler.util import ref_to_obj
 from zoneinfo import ZoneInfo
 from datetime import datetime
-from send_digest_supabase import run_daily_digest  # Supabase 버전 사용
+from db import get_conn, record_scheduler_run
+from jobs import Job, JobCancelled
+from mailer import DigestFailed
 
 KST = ZoneInfo("Asia/Seoul")
 
+JOBSTORE_URL = os.getenv("SCHEDULER_JOBSTORE_URL", "sqlite:///reminder.db")
+MISFIRE_GRACE = int(os.getenv("SCHEDULER_MISFIRE_GRACE", str(6 * 3600)))   # 놓친 실행을 허용할 시간(초)
+
+# (작업 ID, 실행할 함수 참조, cron 설정)
+SCHEDULED_JOBS = [
+    # Supabase 버전 사용 - 문자열 참조로 지정해 실행 시점에 모듈을 로드
+    ("daily_all_cycles", "send_digest_supabase:run_daily_digest", {"hour": 9, "minute": 0}),  # 09:00 KST
+]
+
+# 실행 중인 예약 작업 (작업 ID -> jobs.Job) - 리더에서 물러날 때 취소 요청
+_running = {}
+
+def run_job(job_id: str, func_ref: str):
+    """예약 작업 실행 + 실행 기록 (작업 저장소에는 이 함수가 문자열 참조로 저장됨)
+
+    대상 함수에는 jobs.Job 을 넘겨 진행 건수(done/total)와 메시지를 받아 둔다.
+    그날 실행 표시를 다른 인스턴스가 먼저 잡았으면 실행하지 않고 skipped 로 기록한다."""
+    progress = Job(job_id)
+    started = datetime.now(KST)
+    day = started.date().isoformat()
+    t0 = time.perf_counter()
+    outcome, error, result = "failed", None, None
+    claimed = False
+    _running[job_id] = progress
+    try:
+        claimed = _claim_daily_run(job_id, day)
+        if not claimed:
+            outcome = "skipped"
+            progress.set_progress(0, message=f"{day} 실행은 다른 인스턴스가 이미 잡음")
+            print(f"[INFO] ⏭️ 예약 작업 건너뜀: {job_id} ({day} 이미 실행됨)")
+            return None
+        result = ref_to_obj(func_ref)(job=progress)
+        outcome = _outcome(result)
+        return result
+    except JobCancelled:
+        # 리더를 잃어 멈춘 실행 - 표시를 지워 새 리더가 그날 실행을 이어받게 함
+        outcome = "cancelled"
+        if claimed:
+            _release_daily_run(job_id, day)
+        raise
+    except Exception as e:
+        error = f"{e}\n{traceback.format_exc()}"
+        if claimed and (isinstance(e, DigestFailed) or not progress.done):
+            # 한 통도 보내지 못했으면 표시를 지워 유예 시간 안에 다시 시도할 수 있게 함
+            _release_daily_run(job_id, day)
+        raise
+    finally:
+        _running.pop(job_id, None)
+        try:
+            with get_conn() as conn:
+                record_scheduler_run(
+                    conn, job_id, outcome,
+                    started_at=started.isoformat(),
+                    finished_at=datetime.now(KST).isoformat(),
+                    duration_ms=int((time.perf_counter() - t0) * 1000),
+                    done=progress.done, total=progress.total,
+                    message=progress.message, error=error,
+                )
+        except Exception as e:
+            print(f"[WARNING] ⚠️ 스케줄러 실행 기록 실패 ({job_id}): {e}")
+
+def _claim_daily_run(job_id: str, day: str) -> bool:
+    """리더 임대와 같은 공유 DB 에 그날 실행 표시를 잡음 (오류면 예외 - 중복 발송보다 실패 기록이 낫다)"""
+    from leader import lease_backend, HOLDER
+    return lease_backend().claim_daily_run(job_id, day, HOLDER)
+
+def _release_daily_run(job_id: str, day: str):
+    from leader import lease_backend, HOLDER
+    try:
+        lease_backend().release_daily_run(job_id, day, HOLDER)
+    except Exception as e:
+        print(f"[WARNING] ⚠️ 실행 표시 해제 실패 ({job_id}, {day}): {e}")
+
+def cancel_running():
+    """실행 중인 예약 작업에 취소 요청 - 작업 함수가 다음 check_cancelled() 에서 멈춘다"""
+    for progress in list(_running.values()):
+        progress._cancel.set()
+
+def _outcome(result) -> str:
+    """작업 반환값으로 실행 결과 분류 - 건수 dict 는 보낸 것이 없으면 noop, 일부 실패면 partial
+
+    실패는 작업 함수가 예외로 알리므로 여기서는 failed 를 만들지 않는다."""
+    if isinstance(result, dict) and "sent" in result:
+        if not result["sent"] and not result.get("failed"):
+            return "noop"
+        return "partial" if result.get("failed") else "success"
+    return "success" if result is not False else "noop"
+
+def _on_missed(event):
+    """유예 시간을 넘겨 건너뛴 실행도 기록"""
+    try:
+        with get_conn() as conn:
+            record_scheduler_run(conn, event.job_id, "missed",
+                                 scheduled_at=event.scheduled_run_time.isoformat())
+    except Exception as e:
+        print(f"[WARNING] ⚠️ 놓친 실행 기록 실패 ({event.job_id}): {e}")
+    print(f"[WARNING] ⚠️ 예약 작업 놓침: {event.job_id} ({event.scheduled_run_time})")
+
+def create_scheduler() -> BackgroundScheduler:
+    sched = BackgroundScheduler(
+        timezone=str(KST),
+        jobstores={"default": SQLAlchemyJobStore(url=JOBSTORE_URL, tablename="apscheduler_jobs")},
+        job_defaults={"misfire_grace_time": MISFIRE_GRACE, "coalesce": True, "max_instances": 1},
+    )
+    sched.add_listener(_on_missed, EVENT_JOB_MISSED)
+    return sched
+
 def start_scheduler():
-    sched = BackgroundScheduler(timezone=str(KST))
-    sched.add_job(run_daily_digest, "cron", hour=9, minute=0, id="daily_all_cycles")  # 09:00 KST
-    sched.start()
+    sched = create_scheduler()
+    sched.start(paused=True)
+    # 저장소에 이미 있는 작업은 설정만 덮어쓰고 next_run_time 은 유지 (놓친 실행 판단에 필요)
+    for job_id, func_ref, cron in SCHEDULED_JOBS:
+        if sched.get_job(job_id) is None:
+            sched.add_job(run_job, "cron", args=(job_id, func_ref), id=job_id, **cron)
+        else:
+            # 유예 시간/coalesce 는 작업마다 저장되므로 현재 설정으로 갱신
+            sched.modify_job(job_id, func=run_job, args=(job_id, func_ref),
+                             misfire_grace_time=MISFIRE_GRACE, coalesce=True, max_instances=1)
+            if _trigger_changed(sched, job_id, cron):
+                sched.reschedule_job(job_id, trigger="cron", **cron)
+    sched.resume()
     print(f"[{datetime.now(KST)}] Scheduler started.")
     return sched
+
+def _trigger_changed(sched, job_id: str, cron: dict) -> bool:
+    from apscheduler.triggers.cron import CronTrigger
+    return str(sched.get_job(job_id).trigger) != str(CronTrigger(timezone=KST, **cron))
+
+def run_now(job_id: str, func_ref: str = None):
+    """예약 작업을 지금 한 번 실행 (GitHub Actions cron 같은 외부 스케줄러용)
+
+    run_job 을 그대로 거치므로 웹훅/run_scheduler.py 의 스케줄러와 그날 실행 표시를 나눠 쓴다."""
+    refs = {j: ref for j, ref, _ in SCHEDULED_JOBS}
+    if job_id not in refs:
+        raise ValueError(f"알 수 없는 예약 작업: {job_id} (가능: {', '.join(refs)})")
+    return run_job(job_id, func_ref or refs[job_id])
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="예약 작업 즉시 실행 (같은 날 다른 인스턴스가 실행했으면 건너뜀)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="예약 작업 한 번 실행")
+    run.add_argument("job_id", choices=[j for j, _, _ in SCHEDULED_JOBS])
+    run.add_argument("--func", help="실행할 함수 참조 (기본: 예약 작업 설정, 예: digest:run_daily_digest)")
+    args = parser.parse_args()
+    try:
+        run_now(args.job_id, args.func)
+    except Exception as e:
+        print(f"❌ 예약 작업 실패 ({args.job_id}): {e}")
+        raise SystemExit(1)
@@ -15,3 +15,10 @@ CREATE TABLE IF NOT EXISTS users (
   email TEXT PRIMARY KEY,
   name TEXT
 );
+CREATE TABLE IF NOT EXISTS completion_logs (
+  id INTEGER PRIMARY KEY,
+  task_id INTEGER NOT NULL,
+  completed_at TEXT NOT NULL,
+  completion_method TEXT,
+  notes TEXT
+);
@@ -4,8 +4,12 @@ import os
 from datetime import datetime, timedelta
 import yaml
 from contextlib import contextmanager
-from supabase_client import SupabaseManager
-from mailer import make_token, build_task_url, send_email
+from supabase_client import get_supabase_manager, supabase_breaker, is_configured as supabase_configured
+from circuit_breaker import CircuitOpen
+from mailer import make_task_token, make_row_token, row_key, build_task_url, send_email, DigestFailed
+from db import set_state
+from metrics import TimedConnection, digest_run_duration, digest_emails, queue_depth
+from jobs import JobCancelled
 
 # 시간대 설정 - zoneinfo 호환성 처리
 try:
@@ -19,7 +23,7 @@ except ImportError:
 @contextmanager
 def get_sqlite_conn():
     """SQLite 연결 관리"""
-    conn = sqlite3.connect("reminder.db", check_same_thread=False)
+    conn = sqlite3.connect("reminder.db", check_same_thread=False, factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
@@ -98,6 +102,7 @@ def get_users_and_tasks_from_sqlite():
                     }
             
             print(f"[SUCCESS] ✅ SQLite에서 {len(users_tasks)}명의 업무 데이터 조회 성공")
+            backfill_tokens(users_tasks)
             return users_tasks
             
     except Exception as e:
@@ -114,12 +119,16 @@ def get_users_and_tasks():
         return get_users_and_tasks_from_sqlite()
     
     try:
+        # 최근 연속 실패로 회로가 열려 있으면 타임아웃을 기다리지 않고 바로 SQLite 사용
+        if supabase_breaker.is_open:
+            raise CircuitOpen("Supabase 회로가 열려 있습니다")
+        
         # Supabase 시도
         print("[INFO] 🔗 Supabase에서 데이터 조회 시도...")
-        supabase_manager = SupabaseManager(use_service_key=False)
+        supabase_manager = get_supabase_manager(use_service_key=False)
         
         # 사용자 목록 가져오기
-        users = supabase_manager.get_all_users()
+        users = list(supabase_manager.iter_users(columns='email,name'))
         
         # SSL 오류나 연결 오류 시 즉시 fallback
         if not users:
@@ -127,10 +136,12 @@ def get_users_and_tasks():
             
         print(f"[INFO] 📧 Supabase에서 {len(users)}명의 사용자 발견")
         
+        # 모든 사용자의 오늘 할 업무를 한 번에 가져오기
+        tasks_by_email = supabase_manager.active_tasks_for_emails([u['email'] for u in users])
+        
         for user in users:
             email = user['email']
-            # 해당 사용자의 오늘 할 업무 가져오기
-            tasks = supabase_manager.get_tasks_for_today(email)
+            tasks = tasks_by_email.get(email)
             if tasks:
                 users_tasks[email] = {
                     'name': user['name'],
@@ -139,6 +150,7 @@ def get_users_and_tasks():
                 print(f"[INFO] 📋 {email}: {len(tasks)}개 업무")
         
         print(f"[SUCCESS] ✅ Supabase에서 {len(users_tasks)}명의 업무 데이터 조회 성공")
+        backfill_tokens(users_tasks, get_supabase_manager(use_service_key=True))
         return users_tasks
         
     except Exception as e:
@@ -203,6 +215,7 @@ def get_users_and_tasks():
                         }
                 
                 print(f"[SUCCESS] ✅ SQLite에서 {len(users_tasks)}명의 업무 데이터 조회 성공")
+                backfill_tokens(users_tasks)
                 return users_tasks
                 
         except Exception as sqlite_error:
@@ -266,22 +279,43 @@ def filter_tasks_for_today(tasks):
     
     return today_tasks
 
+def backfill_tokens(users_tasks, supabase_manager=None):
+    """hmac_token 이 없는 업무에 새 토큰을 조회한 저장소에 저장 (supabase_manager 가 없으면 SQLite)
+
+    링크의 행 키가 없으면 업무 ID 만으로 찾게 되어, 다른 저장소의 같은 ID 업무가 완료될 수 있다.
+    저장에 실패한 업무는 hmac_token 없이 남고 html_for_tasks 가 링크를 만들지 않는다."""
+    for user_data in users_tasks.values():
+        for t in user_data['tasks']:
+            if t.get('hmac_token'):
+                continue
+            token = make_row_token(t['id'])
+            try:
+                if supabase_manager is not None:
+                    saved = supabase_manager.update_task_token(t['id'], token)
+                else:
+                    with get_sqlite_conn() as conn:
+                        saved = conn.execute(
+                            "UPDATE tasks SET hmac_token = ? WHERE id = ? AND hmac_token IS NULL",
+                            (token, t['id'])
+                        ).rowcount == 1
+            except Exception as e:
+                print(f"[WARNING] ⚠️ 업무 {t['id']} 토큰 저장 오류: {e}")
+                saved = False
+            if saved:
+                t['hmac_token'] = token
+            else:
+                print(f"[WARNING] ⚠️ 업무 {t['id']} 토큰 저장 실패 - 이번 메일에서 제외")
+
 def html_for_tasks(tasks, base_url, dashboard_url=None):
-    """업무 목록을 HTML로 변환"""
+    """업무 목록을 HTML로 변환 (행 키 없는 링크는 만들지 않음 - backfill_tokens 참고)"""
+    tasks = [t for t in tasks if t.get("hmac_token")]
     if not tasks:
         return None
         
     rows = []
     for t in tasks:
-        token = t.get("hmac_token")
-        if not token:
-            token = make_token(t["id"])
-            # 토큰 업데이트 시도
-            try:
-                with get_sqlite_conn() as conn:
-                    conn.execute("UPDATE tasks SET hmac_token = ? WHERE id = ?", (token, t["id"]))
-            except:
-                pass
+        # 업무 ID 와 행 키(hmac_token 앞부분)를 담은 자체 검증 토큰 - 미리 저장해 둘 필요 없음
+        token = make_task_token(t["id"], t["frequency"], key=row_key(t.get("hmac_token")))
         
         url = build_task_url(base_url, token)
         if dashboard_url:
@@ -328,8 +362,8 @@ def html_for_tasks(tasks, base_url, dashboard_url=None):
 def log_email_sent(recipient_email, task_count, status="sent", error_message=None):
     """이메일 발송 기록 저장"""
     try:
-        # Supabase에 저장 시도
-        supabase_manager = SupabaseManager(use_service_key=True)
+        # Supabase에 저장 시도 (프로세스 공용 클라이언트 재사용)
+        supabase_manager = get_supabase_manager(use_service_key=True)
         data = {
             'recipient_email': recipient_email,
             'subject': '[일일 알림] 오늘의 해야할 일 📋',
@@ -338,15 +372,37 @@ def log_email_sent(recipient_email, task_count, status="sent", error_message=Non
             'error_message': error_message,
             'sent_at': datetime.now(KST).isoformat()
         }
-        supabase_manager.supabase.table('email_logs').insert(data).execute()
+        supabase_manager.add_email_log(data)
         print(f"[INFO] 📝 Supabase에 이메일 로그 저장: {recipient_email}")
         
     except Exception as e:
         print(f"[WARNING] ⚠️ Supabase 로그 저장 실패: {e}")
         # SQLite fallback (필요시 구현)
 
-def run_daily_digest():
-    """일일 이메일 발송 실행"""
+def _record_digest_run():
+    """마지막 발송 완료 시각 저장 (/readyz, /status 에서 표시)"""
+    now = datetime.now(KST).isoformat()
+    try:
+        with get_sqlite_conn() as conn:
+            set_state(conn, "last_digest_at", now)
+    except Exception as e:
+        print(f"[WARNING] ⚠️ 발송 시각 기록 실패: {e}")
+    # GitHub Actions 실행의 reminder.db 는 버려지므로 웹훅이 볼 수 있도록 Supabase 에도 기록
+    try:
+        if supabase_configured():
+            get_supabase_manager(use_service_key=True).set_setting("last_digest_at", now)
+    except Exception as e:
+        print(f"[WARNING] ⚠️ 발송 시각 Supabase 기록 실패: {e}")
+
+def run_daily_digest(job=None):
+    """일일 이메일 발송 실행 (전체 소요 시간을 메트릭에 기록)
+
+    job(jobs.Job) 이 주어지면 진행 상황을 기록하고 취소 요청 시 중단한다.
+    대상자/발송/실패 건수를 dict 로 반환하고, 한 통도 보내지 못했으면 DigestFailed 를 던진다."""
+    with digest_run_duration.time():
+        return _run_daily_digest(job)
+
+def _run_daily_digest(job=None):
     try:
         cfg = _load_cfg()
         mail_cfg = cfg["smtp"]  # mail 대신 smtp 사용
@@ -360,12 +416,19 @@ def run_daily_digest():
         
         if not users_tasks:
             print("[WARNING] ⚠️ 발송할 업무가 있는 사용자가 없습니다.")
-            return False
+            return {"recipients": 0, "sent": 0, "failed": 0}
         
         print(f"[INFO] 📧 이메일 발송 시작 - 대상자: {len(users_tasks)}명")
         
-        sent_count = 0
+        sent_count = failed_count = 0
+        remaining = len(users_tasks)
+        queue_depth.set(remaining, queue="digest")
         for email, user_data in users_tasks.items():
+            if job:
+                job.check_cancelled()
+                job.set_progress(len(users_tasks) - remaining, len(users_tasks), email)
+            remaining -= 1
+            queue_depth.set(remaining, queue="digest")
             name = user_data['name']
             tasks = user_data['tasks']
             
@@ -426,30 +489,42 @@ def run_daily_digest():
                         html_body=full_html
                     )
                     sent_count += 1
+                    digest_emails.inc(status="sent")
                     print(f"[SUCCESS] ✅ {email}에게 이메일 발송 성공")
                     
                     # 발송 기록 저장
                     log_email_sent(email, len(tasks))
                     
                 except Exception as e:
+                    failed_count += 1
+                    digest_emails.inc(status="failed")
                     print(f"[ERROR] ❌ {email}에게 이메일 발송 실패: {e}")
                     log_email_sent(email, len(tasks), "failed", str(e))
             else:
                 print(f"[DEBUG] 📭 {email}: 오늘 할 업무가 없음")
         
-        print(f"[SUCCESS] 🎉 총 {sent_count}명에게 이메일 발송 완료")
-        return sent_count > 0
+        print(f"[SUCCESS] 🎉 총 {sent_count}명에게 이메일 발송 완료 (실패 {failed_count}명)")
+        if job:
+            job.set_progress(len(users_tasks), len(users_tasks), f"{sent_count}명 발송, {failed_count}명 실패")
+        if failed_count and not sent_count:
+            raise DigestFailed(f"{failed_count}명 모두 발송 실패")
+        _record_digest_run()
+        return {"recipients": len(users_tasks), "sent": sent_count, "failed": failed_count}
         
+    except JobCancelled:
+        print("[INFO] ⏹️ 이메일 발송 작업이 취소되었습니다")
+        raise
     except Exception as e:
         print(f"[CRITICAL ERROR] ❌ 이메일 발송 시스템 오류: {e}")
         import traceback
         traceback.print_exc()
-        return False
+        raise
 
 if __name__ == "__main__":
     print("🚀 Supabase 기반 일일 알림 이메일 발송 시작...")
-    success = run_daily_digest()
-    if success:
-        print("✅ 이메일 발송 완료!")
-    else:
+    try:
+        result = run_daily_digest()
+    except Exception:
         print("❌ 이메일 발송 실패!")
+        raise SystemExit(1)
+    print(f"✅ 이메일 발송 완료! ({result['sent']}명 발송, {result['failed']}명 실패)")
@@ -0,0 +1,113 @@
+# static_assets.py - 정적 파일 관리 (지문 파일명 + gzip 사전 압축)
+# static/ 아래 파일을 내용 해시가 붙은 이름(dashboard.1a2b3c4d5e.css)으로 제공한다.
+# 내용이 바뀌면 URL도 바뀌므로 브라우저에는 1년짜리 immutable 캐시를 줄 수 있다.
+import argparse
+import gzip
+import hashlib
+import mimetypes
+import os
+import urllib.request
+
+STATIC_DIR = "static"
+STATIC_PREFIX = "/static"
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# CDN 대신 로컬에서 제공할 외부 라이브러리 (python static_assets.py --vendor 로 내려받기)
+VENDOR_ASSETS = {
+    "vendor/chart.umd.min.js": "https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js",
+}
+
+class Asset:
+    __slots__ = ("path", "body", "gz", "media_type", "etag")
+
+    def __init__(self, path, body, gz, media_type, etag):
+        self.path = path
+        self.body = body
+        self.gz = gz
+        self.media_type = media_type
+        self.etag = etag
+
+_assets = {}     # 지문 경로 -> Asset
+_manifest = {}   # 원래 경로 -> 지문 경로
+_loaded = False
+
+def _fingerprint(rel_path: str, digest: str) -> str:
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest}{ext}"
+
+def load(static_dir: str = STATIC_DIR):
+    """static/ 을 읽어 지문 파일명과 gzip 버전을 메모리에 준비"""
+    global _loaded
+    _assets.clear()
+    _manifest.clear()
+    if os.path.isdir(static_dir):
+        for dirpath, _, filenames in os.walk(static_dir):
+            for filename in filenames:
+                if filename.endswith(".gz"):
+                    continue
+                full = os.path.join(dirpath, filename)
+                rel = os.path.relpath(full, static_dir).replace(os.sep, "/")
+                with open(full, "rb") as f:
+                    body = f.read()
+                digest = hashlib.sha256(body).hexdigest()[:10]
+
+                # 미리 만들어 둔 .gz 가 최신이면 그대로 사용, 아니면 여기서 압축
+                gz_path = full + ".gz"
+                if os.path.exists(gz_path) and os.path.getmtime(gz_path) >= os.path.getmtime(full):
+                    with open(gz_path, "rb") as f:
+                        gz = f.read()
+                else:
+                    gz = gzip.compress(body, compresslevel=9, mtime=0)
+                if len(gz) >= len(body):
+                    gz = None
+
+                media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                if media_type.startswith("text/") or media_type.endswith("javascript"):
+                    media_type += "; charset=utf-8"
+                hashed = _fingerprint(rel, digest)
+                _assets[hashed] = Asset(hashed, body, gz, media_type, f'"{digest}"')
+                _manifest[rel] = hashed
+    _loaded = True
+
+def asset_url(rel_path: str, fallback: str = None):
+    """원래 경로 -> /static/<지문 경로> (파일이 없으면 fallback)"""
+    if not _loaded:
+        load()
+    hashed = _manifest.get(rel_path)
+    return f"{STATIC_PREFIX}/{hashed}" if hashed else fallback
+
+def get_asset(hashed_path: str):
+    if not _loaded:
+        load()
+    return _assets.get(hashed_path)
+
+def build(static_dir: str = STATIC_DIR):
+    """배포 전 .gz 파일을 미리 생성"""
+    count = 0
+    for dirpath, _, filenames in os.walk(static_dir):
+        for filename in filenames:
+            if filename.endswith(".gz"):
+                continue
+            full = os.path.join(dirpath, filename)
+            with open(full, "rb") as f:
+                body = f.read()
+            with open(full + ".gz", "wb") as f:
+                f.write(gzip.compress(body, compresslevel=9, mtime=0))
+            count += 1
+    print(f"✅ gzip 파일 생성: {count}개")
+
+def vendor(static_dir: str = STATIC_DIR):
+    """VENDOR_ASSETS 를 static/ 아래로 내려받기"""
+    for rel, url in VENDOR_ASSETS.items():
+        target = os.path.join(static_dir, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        print(f"📥 {url} → {target}")
+        urllib.request.urlretrieve(url, target)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="정적 파일 준비")
+    parser.add_argument("--vendor", action="store_true", help="외부 라이브러리를 static/vendor 로 내려받기")
+    args = parser.parse_args()
+    if args.vendor:
+        vendor()
+    build()
@@ -1,10 +1,15 @@
 # supabase_client.py - Supabase 클라이언트 및 데이터베이스 로직
 import os
-from supabase import create_client, Client
+import time
+import threading
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Iterator, List, Dict, Optional
 from dotenv import load_dotenv
 import logging
+from metrics import supabase_request_duration, supabase_errors
+from circuit_breaker import CircuitBreaker
+from mailer import is_signed_token, verify_task_token
 
 # 시간대 설정 - 호환성 처리
 try:
@@ -15,36 +20,43 @@ except ImportError:
     KST = timezone(timedelta(hours=9))
 
 # SSL 우회는 로컬 환경에서만 (회사 네트워크)
-try:
-    import ssl
-    import urllib3
-    if os.getenv('GITHUB_ACTIONS') != 'true':  # GitHub Actions가 아닐 때만
-        # 더 강력한 SSL 우회 설정
-        ssl._create_default_https_context = ssl._create_unverified_context
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-        os.environ['PYTHONHTTPSVERIFY'] = '0'
-        os.environ['CURL_CA_BUNDLE'] = ''
-        os.environ['REQUESTS_CA_BUNDLE'] = ''
-        
-        # requests 라이브러리도 SSL 검증 우회
-        import requests
-        from requests.adapters import HTTPAdapter
-        from urllib3.util.retry import Retry
-        
-        class InsecureHTTPAdapter(HTTPAdapter):
-            def init_poolmanager(self, *args, **kwargs):
-                kwargs['ssl_context'] = ssl.create_default_context()
-                kwargs['ssl_context'].check_hostname = False
-                kwargs['ssl_context'].verify_mode = ssl.CERT_NONE
-                return super().init_poolmanager(*args, **kwargs)
-        
-        # 기본 세션에 insecure adapter 적용
-        session = requests.Session()
-        session.mount('https://', InsecureHTTPAdapter())
-        requests.sessions.Session = lambda: session
-        
-except ImportError:
-    pass  # urllib3가 없어도 계속 진행
+# 프로세스 전역 설정을 바꾸므로 import 시점이 아니라 첫 클라이언트 생성 시 한 번만 적용
+_ssl_configured = False
+
+def _configure_insecure_ssl():
+    global _ssl_configured
+    if _ssl_configured:
+        return
+    _ssl_configured = True
+    try:
+        import ssl
+        import urllib3
+        if os.getenv('GITHUB_ACTIONS') != 'true':  # GitHub Actions가 아닐 때만
+            # 더 강력한 SSL 우회 설정
+            ssl._create_default_https_context = ssl._create_unverified_context
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            os.environ['PYTHONHTTPSVERIFY'] = '0'
+            os.environ['CURL_CA_BUNDLE'] = ''
+            os.environ['REQUESTS_CA_BUNDLE'] = ''
+            
+            # requests 라이브러리도 SSL 검증 우회
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            class InsecureHTTPAdapter(HTTPAdapter):
+                def init_poolmanager(self, *args, **kwargs):
+                    kwargs['ssl_context'] = ssl.create_default_context()
+                    kwargs['ssl_context'].check_hostname = False
+                    kwargs['ssl_context'].verify_mode = ssl.CERT_NONE
+                    return super().init_poolmanager(*args, **kwargs)
+            
+            # 기본 세션에 insecure adapter 적용
+            session = requests.Session()
+            session.mount('https://', InsecureHTTPAdapter())
+            requests.sessions.Session = lambda: session
+            
+    except ImportError:
+        pass  # urllib3가 없어도 계속 진행
 
 # 환경 변수 로드
 load_dotenv()
@@ -53,6 +65,65 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# ========== 클라이언트 풀 ==========
+# create_client 는 HTTP 세션과 TLS 연결을 새로 만들기 때문에 역할(anon/service)별로
+# 프로세스에서 하나만 만들고 모든 스레드가 공유한다 (httpx 연결 keep-alive 재사용).
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _create_client(key: str):
+    # supabase 패키지는 실제로 클라이언트가 필요할 때만 로드
+    _configure_insecure_ssl()
+    from supabase import create_client
+    try:
+        from supabase import ClientOptions
+        options = ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT)
+        return create_client(os.getenv("SUPABASE_URL"), key, options=options)
+    except ImportError:
+        # ClientOptions 를 내보내지 않는 구버전
+        return create_client(os.getenv("SUPABASE_URL"), key)
+
+def get_client(role: str = "anon"):
+    """역할별 공용 Supabase 클라이언트 ("anon" 또는 "service")"""
+    client = _clients.get(role)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(role)
+        if client is None:
+            env = "SUPABASE_SERVICE_KEY" if role == "service" else "SUPABASE_KEY"
+            key = os.getenv(env)
+            if not os.getenv("SUPABASE_URL") or not key:
+                raise ValueError(f"SUPABASE_URL과 {env}를 .env 파일에 설정해주세요")
+            client = _clients[role] = _create_client(key)
+            logger.info(f"✅ Supabase 클라이언트 초기화 완료 ({role})")
+    return client
+
+# 알림 메일 작성에 필요한 업무 컬럼
+DIGEST_COLUMNS = "id,title,assignee_email,frequency,due_date,status,last_completed_at,hmac_token"
+# 완료 기록 조회 시 함께 가져올 컬럼 (업무는 표시에 필요한 것만)
+COMPLETION_LOG_COLUMNS = "id,task_id,completed_at,completion_method,notes,tasks(id,title,assignee_email,frequency)"
+# PostgREST 기본 최대 응답 행 수(1000)를 넘지 않는 페이지 크기
+PAGE_SIZE = int(os.getenv("SUPABASE_PAGE_SIZE", "1000"))
+
+def _is_outage(exc: Exception) -> bool:
+    """서버가 응답한 PostgREST 오류(APIError)는 장애로 세지 않음"""
+    return type(exc).__name__ != "APIError"
+
+def _is_missing_function(exc: Exception) -> bool:
+    """RPC 함수가 프로젝트에 없어서 난 오류인지 (PGRST202) - 시간 초과/5xx 는 이미 반영됐을 수 있음"""
+    return type(exc).__name__ == "APIError" and getattr(exc, 'code', None) == 'PGRST202'
+
+# Supabase 회로 차단기 - 연속 실패 시 일정 시간 동안 원격 호출 없이 바로 실패
+READ_RETRIES = int(os.getenv("SUPABASE_READ_RETRIES", "2"))
+supabase_breaker = CircuitBreaker(
+    "supabase",
+    failure_threshold=int(os.getenv("SUPABASE_BREAKER_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("SUPABASE_BREAKER_RESET", "30")),
+    is_failure=_is_outage)
+
 class SupabaseManager:
     def __init__(self, use_service_key=False):
         self.url = os.getenv("SUPABASE_URL")
@@ -63,9 +134,24 @@ class SupabaseManager:
             raise ValueError("SUPABASE_URL과 SUPABASE_KEY를 .env 파일에 설정해주세요")
         
         # 마이그레이션 시에는 service_role 키 사용
-        selected_key = self.service_key if use_service_key and self.service_key else self.key
-        self.supabase: Client = create_client(self.url, selected_key)
-        logger.info("✅ Supabase 클라이언트 초기화 완료")
+        role = "service" if use_service_key and self.service_key else "anon"
+        self.supabase = get_client(role)
+    
+    def _execute(self, op: str, query, read: bool = False):
+        """PostgREST 요청 실행 - 소요 시간과 오류를 메트릭에 기록
+
+        모든 요청은 supabase_breaker 를 거치며, 회로가 열려 있으면 CircuitOpen 이
+        바로 발생한다. read=True (멱등 조회)는 장애 시 재시도한다."""
+        def run():
+            start = time.perf_counter()
+            try:
+                return query.execute()
+            except Exception:
+                supabase_errors.inc(op=op)
+                raise
+            finally:
+                supabase_request_duration.observe(time.perf_counter() - start, op=op)
+        return supabase_breaker.call(run, retries=READ_RETRIES if read else 0)
     
     def kst_now(self) -> datetime:
         """현재 한국 시간 반환"""
@@ -83,11 +169,36 @@ class SupabaseManager:
         return d0
     
     # ========== 사용자 관리 ==========
+    def _iter_pages(self, op: str, table: str, columns: str, key: str,
+                    page_size: Optional[int] = None, desc: bool = False, where=None) -> Iterator[Dict]:
+        """key 기준 키셋 페이지네이션으로 행을 하나씩 반환
+
+        PostgREST 는 한 요청에 최대 1000행만 돌려주므로 마지막 key 값 다음부터
+        page_size 행씩 이어서 요청한다. where 는 쿼리에 필터를 더하는 함수."""
+        page_size = page_size or PAGE_SIZE
+        if columns != '*' and key not in [c.strip() for c in columns.split(',')]:
+            columns = f"{key},{columns}"
+        last = None
+        while True:
+            query = self.supabase.table(table).select(columns)
+            if where is not None:
+                query = where(query)
+            if last is not None:
+                query = query.lt(key, last) if desc else query.gt(key, last)
+            rows = self._execute(op, query.order(key, desc=desc).limit(page_size), read=True).data
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last = rows[-1][key]
+    
+    def iter_users(self, columns: str = '*', page_size: Optional[int] = None) -> Iterator[Dict]:
+        """사용자를 이메일 순으로 페이지 단위 조회"""
+        return self._iter_pages('iter_users', 'users', columns, 'email', page_size)
+    
     def get_all_users(self) -> List[Dict]:
         """모든 사용자 조회"""
         try:
-            response = self.supabase.table('users').select('*').execute()
-            return response.data
+            return list(self.iter_users())
         except Exception as e:
             logger.error(f"사용자 조회 오류: {e}")
             return []
@@ -100,7 +211,7 @@ class SupabaseManager:
                 'name': name,
                 'created_at': self.kst_now().isoformat()
             }
-            response = self.supabase.table('users').insert(data).execute()
+            response = self._execute('add_user', self.supabase.table('users').insert(data))
             logger.info(f"✅ 사용자 추가: {name} ({email})")
             return True
         except Exception as e:
@@ -109,15 +220,135 @@ class SupabaseManager:
     
     def get_all_recipients(self) -> List[str]:
         """이메일 발송 대상자 목록"""
-        users = self.get_all_users()
-        return [user['email'] for user in users]
+        try:
+            return [user['email'] for user in self.iter_users(columns='email')]
+        except Exception as e:
+            logger.error(f"사용자 조회 오류: {e}")
+            return []
+    
+    def upsert_rows(self, table: str, rows: List[Dict], on_conflict: str) -> int:
+        """여러 행을 한 요청으로 upsert (마이그레이션/동기화용, 실패 시 예외)"""
+        if not rows:
+            return 0
+        query = self.supabase.table(table).upsert(rows, on_conflict=on_conflict)
+        self._execute(f'upsert_{table}', query)
+        return len(rows)
+    
+    def insert_rows(self, table: str, rows: List[Dict]) -> int:
+        """여러 행을 한 요청으로 추가 (키를 서버가 정하는 새 행용, 실패 시 예외)"""
+        if not rows:
+            return 0
+        self._execute(f'insert_{table}', self.supabase.table(table).insert(rows))
+        return len(rows)
+    
+    def select_in(self, table: str, column: str, values, columns: str = '*',
+                  key: str = 'id', chunk_size: int = 100, where=None) -> List[Dict]:
+        """column 값이 values 중 하나인 행 조회 (마이그레이션/동기화용, 실패 시 예외)
+
+        URL 길이 때문에 값은 chunk_size 개씩 나눠 보내고, 각 묶음은 key 키셋 페이지로 끝까지 읽는다.
+        where(query) 가 있으면 조건을 더한다."""
+        values = list(values)
+        rows = []
+        for i in range(0, len(values), chunk_size):
+            chunk = values[i:i + chunk_size]
+            def page_where(query, chunk=chunk):
+                query = query.in_(column, chunk)
+                return where(query) if where else query
+            rows.extend(self._iter_pages(f'select_{table}', table, columns, key, where=page_where))
+        return rows
     
     # ========== 업무 관리 ==========
+    def sync_task_id_sequence(self) -> bool:
+        """ID 를 지정해 넣은 뒤 tasks.id 시퀀스를 최대값으로 맞춤"""
+        try:
+            self._execute('sync_task_id_sequence', self.supabase.rpc('sync_task_id_sequence', {}))
+            return True
+        except Exception as e:
+            logger.warning(f"업무 ID 시퀀스 갱신 실패: {e}")
+            return False
+    
+    # ========== 시스템 상태 (마지막 발송 시각 등) ==========
+    def set_setting(self, key: str, value: str):
+        """system_settings 에 값 저장 - GitHub Actions 처럼 로컬 DB 가 버려지는 실행의 상태를 남김"""
+        row = {'key': key, 'value': value, 'updated_at': self.kst_now().isoformat()}
+        self._execute('set_setting', self.supabase.table('system_settings').upsert(row, on_conflict='key'))
+
+    def get_settings(self, keys) -> Dict:
+        query = self.supabase.table('system_settings').select('key,value').in_('key', list(keys))
+        return {r['key']: r['value'] for r in self._execute('get_settings', query, read=True).data or []}
+
+    # ========== 리더 선출 (leader.py) ==========
+    def try_acquire_lease(self, name: str, holder: str, ttl_seconds: int) -> bool:
+        """임대를 잡거나 연장 (실패 시 예외 - 호출하는 쪽이 리더에서 물러남)"""
+        params = {'p_name': name, 'p_holder': holder, 'p_ttl_seconds': int(ttl_seconds)}
+        return bool(self._execute('try_acquire_lease', self.supabase.rpc('try_acquire_lease', params)).data)
+
+    def release_lease(self, name: str, holder: str) -> bool:
+        params = {'p_name': name, 'p_holder': holder}
+        return bool(self._execute('release_lease', self.supabase.rpc('release_lease', params)).data)
+
+    def claim_daily_run(self, name: str, day: str, holder: str) -> bool:
+        """그날 예약 작업 실행 표시를 잡음 (다른 인스턴스가 먼저 잡았으면 False)"""
+        params = {'p_name': name, 'p_day': day, 'p_holder': holder}
+        return bool(self._execute('claim_daily_run', self.supabase.rpc('claim_daily_run', params)).data)
+
+    def release_daily_run(self, name: str, day: str, holder: str) -> bool:
+        params = {'p_name': name, 'p_day': day, 'p_holder': holder}
+        return bool(self._execute('release_daily_run', self.supabase.rpc('release_daily_run', params)).data)
+
+    # ========== 양방향 동기화 (reconcile.py) ==========
+    def max_task_id(self) -> int:
+        query = self.supabase.table('tasks').select('id').order('id', desc=True).limit(1)
+        data = self._execute('max_task_id', query, read=True).data
+        return data[0]['id'] if data else 0
+    
+    def task_range_digests(self, bounds) -> Dict:
+        """[(lo, hi), ...] -> {(lo, hi): (행 수, 해시)} - RPC 한 번"""
+        params = {'p_lo': [lo for lo, _ in bounds], 'p_hi': [hi for _, hi in bounds]}
+        data = self._execute('task_range_digests', self.supabase.rpc('task_range_digests', params), read=True).data
+        return {(r['lo'], r['hi']): (r['row_count'], r['digest'] or "") for r in data or []}
+    
+    def _range_batches(self, bounds):
+        # 구간 폭의 합이 PAGE_SIZE 를 넘지 않게 묶어 응답 행 수 제한에 걸리지 않도록 함
+        batch, width = [], 0
+        for lo, hi in bounds:
+            if batch and width + (hi - lo) > PAGE_SIZE:
+                yield batch
+                batch, width = [], 0
+            batch.append((lo, hi))
+            width += hi - lo
+        if batch:
+            yield batch
+    
+    def _in_ranges(self, op: str, table: str, columns: str, bounds) -> List[Dict]:
+        rows = []
+        for batch in self._range_batches(bounds):
+            ranges = ",".join(f"and(id.gte.{lo},id.lt.{hi})" for lo, hi in batch)
+            query = self.supabase.table(table).select(columns).or_(ranges).order('id')
+            rows.extend(self._execute(op, query, read=True).data)
+        return rows
+    
+    def tasks_in_ranges(self, bounds, columns: str = '*') -> Dict[int, Dict]:
+        return {r['id']: r for r in self._in_ranges('tasks_in_ranges', 'tasks', columns, bounds)}
+    
+    def task_tombstones_in_ranges(self, bounds) -> Dict[int, str]:
+        rows = self._in_ranges('task_tombstones_in_ranges', 'task_tombstones', 'id,deleted_at', bounds)
+        return {r['id']: r['deleted_at'] for r in rows}
+    
+    def delete_tasks(self, task_ids: List[int]) -> int:
+        if not task_ids:
+            return 0
+        self._execute('delete_tasks', self.supabase.table('tasks').delete().in_('id', list(task_ids)))
+        return len(task_ids)
+    
+    def iter_tasks(self, columns: str = '*', page_size: Optional[int] = None) -> Iterator[Dict]:
+        """업무를 ID 순으로 페이지 단위 조회"""
+        return self._iter_pages('iter_tasks', 'tasks', columns, 'id', page_size)
+    
     def get_all_tasks(self) -> List[Dict]:
         """모든 업무 조회"""
         try:
-            response = self.supabase.table('tasks').select('*').order('id').execute()
-            return response.data
+            return list(self.iter_tasks())
         except Exception as e:
             logger.error(f"업무 조회 오류: {e}")
             return []
@@ -133,7 +364,7 @@ class SupabaseManager:
                 'creator_name': creator_name,
                 'created_at': self.kst_now().isoformat()
             }
-            response = self.supabase.table('tasks').insert(data).execute()
+            response = self._execute('add_task', self.supabase.table('tasks').insert(data))
             task_id = response.data[0]['id']
             logger.info(f"✅ 업무 추가: {title} (ID: {task_id})")
             return task_id
@@ -141,99 +372,163 @@ class SupabaseManager:
             logger.error(f"업무 추가 오류: {e}")
             return None
     
+    def _due_filter(self, now: datetime) -> str:
+        """주기별 '이번 주기에 아직 완료 안 함' 조건을 PostgREST or 필터 하나로 표현"""
+        clauses = []
+        for frequency in ("daily", "weekly", "monthly"):
+            cs = self.cycle_start(frequency, now).isoformat()
+            clauses.append(
+                f'and(frequency.eq.{frequency},'
+                f'or(last_completed_at.is.null,last_completed_at.lt."{cs}"))')
+        return ",".join(clauses)
+
+    def active_tasks_for_emails(self, emails: List[str], columns: str = DIGEST_COLUMNS,
+                                chunk_size: int = 100) -> Dict[str, List[Dict]]:
+        """여러 담당자의 오늘 할 업무를 한 번에 조회 (담당자 이메일 -> 업무 목록)
+
+        daily/weekly/monthly 조건을 하나의 필터로 묶어 chunk_size 명씩 ID 키셋 페이지로 읽는다
+        (한 요청 1000행 제한에 잘리지 않도록). 조회 오류는 그대로 올려 호출자가 SQLite 로
+        대체하게 한다 - 일부만 읽은 결과로 메일을 보내지 않도록."""
+        result = {email: [] for email in emails}
+        if not emails:
+            return result
+        due = self._due_filter(self.kst_now())
+        for i in range(0, len(emails), chunk_size):
+            chunk = emails[i:i + chunk_size]
+            where = lambda query, chunk=chunk: query.in_('assignee_email', chunk).or_(due)
+            for task in self._iter_pages('active_tasks_for_today', 'tasks', columns, 'id', where=where):
+                result.setdefault(task['assignee_email'], []).append(task)
+        for tasks in result.values():
+            tasks.sort(key=lambda t: (t['frequency'], t['id']))
+        return result
+
     def active_tasks_for_today(self, email: str) -> List[Dict]:
         """오늘 해야 할 활성 업무 조회"""
-        now = self.kst_now()
-        cs_daily = self.cycle_start("daily", now).isoformat()
-        cs_weekly = self.cycle_start("weekly", now).isoformat()
-        cs_monthly = self.cycle_start("monthly", now).isoformat()
-        
         try:
-            # 각 주기별로 미완료 업무 조회
-            daily_tasks = self.supabase.table('tasks').select('*').match({
-                'assignee_email': email,
-                'frequency': 'daily'
-            }).or_(f'last_completed_at.is.null,last_completed_at.lt.{cs_daily}').execute()
-            
-            weekly_tasks = self.supabase.table('tasks').select('*').match({
-                'assignee_email': email,
-                'frequency': 'weekly'
-            }).or_(f'last_completed_at.is.null,last_completed_at.lt.{cs_weekly}').execute()
-            
-            monthly_tasks = self.supabase.table('tasks').select('*').match({
-                'assignee_email': email,
-                'frequency': 'monthly'
-            }).or_(f'last_completed_at.is.null,last_completed_at.lt.{cs_monthly}').execute()
-            
-            # 모든 결과 합치기
-            all_tasks = []
-            all_tasks.extend(daily_tasks.data)
-            all_tasks.extend(weekly_tasks.data)
-            all_tasks.extend(monthly_tasks.data)
-            
-            logger.info(f"📋 {email}의 오늘 업무: {len(all_tasks)}개")
-            return all_tasks
-            
+            tasks = self.active_tasks_for_emails([email]).get(email, [])
         except Exception as e:
             logger.error(f"활성 업무 조회 오류: {e}")
             return []
+        logger.info(f"📋 {email}의 오늘 업무: {len(tasks)}개")
+        return tasks
     
-    def mark_task_completed(self, task_id: int) -> bool:
-        """업무를 완료 상태로 변경"""
-        try:
-            now_iso = self.kst_now().isoformat()
-            data = {
-                'status': 'done',
-                'last_completed_at': now_iso,
-                'updated_at': now_iso
-            }
-            response = self.supabase.table('tasks').update(data).eq('id', task_id).execute()
-            
-            if response.data:
-                logger.info(f"✅ 업무 완료: ID {task_id}")
-                
-                # 완료 기록 추가
-                self.add_completion_log(task_id, now_iso)
-                return True
+    def complete_tasks(self, tokens: List[str] = (), task_ids: List[int] = (),
+                       method: str = 'email', notes: Optional[str] = None) -> List[Dict]:
+        """토큰/업무 ID 목록을 RPC 한 번으로 완료 처리하고 완료된 업무 목록을 반환
+
+        상태 변경과 완료 기록 추가는 complete_tasks 함수 안에서 한 트랜잭션으로 처리된다.
+        자체 검증 토큰(v1./v2.)은 여기서 서명을 확인해 업무 ID 로 바꿔 보낸다.
+        RPC 가 없는 프로젝트에서만 테이블 갱신으로 대체하고, 그 밖의 오류는 그대로 던진다."""
+        ids = list(task_ids)
+        legacy = []
+        keyed = []
+        for token in tokens:
+            if is_signed_token(token):
+                claims = verify_task_token(token)
+                if claims is None:
+                    continue
+                if claims['row_key']:
+                    keyed.append((claims['task_id'], claims['row_key']))
+                else:
+                    ids.append(claims['task_id'])
             else:
-                logger.warning(f"⚠️ 업무 완료 실패: ID {task_id} (업무를 찾을 수 없음)")
-                return False
-                
+                legacy.append(token)
+        
+        try:
+            ids.extend(self._resolve_keyed_ids(keyed))
+            if not ids and not legacy:
+                return []
+            params = {'p_task_ids': ids, 'p_tokens': legacy, 'p_method': method, 'p_notes': notes}
+            try:
+                response = self._execute('complete_tasks', self.supabase.rpc('complete_tasks', params))
+                completed = response.data or []
+            except Exception as e:
+                # 함수가 없을 때만 대체 - 시간 초과/5xx 는 RPC 가 이미 커밋했을 수 있어 다시 하면 완료 기록이 두 번 남음
+                if not _is_missing_function(e):
+                    raise
+                logger.warning(f"complete_tasks RPC 없음, 테이블 갱신으로 대체: {e}")
+                completed = self._complete_tasks_by_table(ids, legacy, method, notes)
+            logger.info(f"✅ 업무 완료: {len(completed)}개 (요청 {len(ids) + len(legacy)}개)")
+            return completed
         except Exception as e:
             logger.error(f"업무 완료 처리 오류: {e}")
-            return False
+            raise
+    
+    def _complete_tasks_by_table(self, ids: List[int], tokens: List[str],
+                                 method: str, notes: Optional[str]) -> List[Dict]:
+        """업무 완료 처리 (complete_tasks RPC 가 없는 프로젝트용 - 상태 변경 후 완료 기록 추가)
+
+        RPC 와 같이 진행 중(pending)인 업무만 바꾸지만 두 요청이 한 트랜잭션으로 묶이지는 않는다."""
+        now_iso = self.kst_now().isoformat()
+        data = {'status': 'done', 'last_completed_at': now_iso, 'updated_at': now_iso}
+        completed = []
+        for column, values in (('id', ids), ('hmac_token', tokens)):
+            if values:
+                query = self.supabase.table('tasks').update(data).in_(column, list(values)).eq('status', 'pending')
+                completed.extend(self._execute('complete_tasks', query).data or [])
+        if completed:
+            logs = [{'task_id': task['id'], 'completed_at': now_iso,
+                     'completion_method': method, 'notes': notes} for task in completed]
+            self._execute('complete_tasks', self.supabase.table('completion_logs').insert(logs))
+        return completed
+    
+    def _resolve_keyed_ids(self, keyed: List[tuple]) -> List[int]:
+        """(업무 ID, 행 키) 목록을 이 저장소의 업무 ID 로 변환
+
+        토큰이 SQLite 의 업무 ID 로 만들어졌을 수 있으므로 hmac_token 앞부분이 행 키와 같은지 확인하고,
+        다르면 행 키로 다시 찾는다 (하나로 정해지지 않으면 제외)."""
+        if not keyed:
+            return []
+        query = self.supabase.table('tasks').select('id,hmac_token').in_('id', [task_id for task_id, _ in keyed])
+        tokens = {row['id']: row.get('hmac_token') or ''
+                  for row in self._execute('resolve_keyed_ids', query, read=True).data}
+        ids = []
+        for task_id, key in keyed:
+            if tokens.get(task_id, '').startswith(key):
+                ids.append(task_id)
+                continue
+            query = self.supabase.table('tasks').select('id').like('hmac_token', f'{key}*').limit(2)
+            rows = self._execute('resolve_keyed_ids', query, read=True).data
+            if len(rows) == 1:
+                ids.append(rows[0]['id'])
+        return ids
+    
+    def mark_task_completed(self, task_id: int) -> bool:
+        """업무를 완료 상태로 변경"""
+        return bool(self.complete_tasks(task_ids=[task_id]))
     
     def mark_task_completed_by_token(self, token: str) -> bool:
         """토큰으로 업무 완료 처리"""
-        try:
-            # 토큰으로 업무 찾기
-            response = self.supabase.table('tasks').select('*').eq('hmac_token', token).execute()
-            
-            if not response.data:
-                logger.warning(f"⚠️ 토큰에 해당하는 업무 없음: {token}")
-                return False
-            
-            task = response.data[0]
-            return self.mark_task_completed(task['id'])
-            
-        except Exception as e:
-            logger.error(f"토큰 기반 업무 완료 오류: {e}")
-            return False
+        return bool(self.complete_tasks(tokens=[token]))
     
     def get_task_by_token(self, token: str) -> Optional[Dict]:
-        """토큰으로 업무 조회"""
+        """토큰으로 업무 조회 (자체 검증 토큰은 기본키 조회, 행 키가 있으면 확인)"""
         try:
-            response = self.supabase.table('tasks').select('*').eq('hmac_token', token).execute()
+            if is_signed_token(token):
+                claims = verify_task_token(token)
+                if claims is None:
+                    return None
+                task_id = claims['task_id']
+                if claims['row_key']:
+                    resolved = self._resolve_keyed_ids([(task_id, claims['row_key'])])
+                    if not resolved:
+                        return None
+                    task_id = resolved[0]
+                query = self.supabase.table('tasks').select('*').eq('id', task_id)
+            else:
+                query = self.supabase.table('tasks').select('*').eq('hmac_token', token)
+            response = self._execute('get_task_by_token', query, read=True)
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"토큰 기반 업무 조회 오류: {e}")
             return None
     
     def update_task_token(self, task_id: int, token: str) -> bool:
-        """업무에 토큰 추가"""
+        """토큰이 없는 업무에 토큰 추가 (이미 있으면 바꾸지 않고 False - 보낸 링크가 깨지지 않도록)"""
         try:
             data = {'hmac_token': token}
-            response = self.supabase.table('tasks').update(data).eq('id', task_id).execute()
+            query = self.supabase.table('tasks').update(data).eq('id', task_id).is_('hmac_token', 'null')
+            response = self._execute('update_task_token', query)
             return len(response.data) > 0
         except Exception as e:
             logger.error(f"토큰 업데이트 오류: {e}")
@@ -248,46 +543,69 @@ class SupabaseManager:
                 'completed_at': completed_at,
                 'created_at': self.kst_now().isoformat()
             }
-            response = self.supabase.table('completion_logs').insert(data).execute()
+            response = self._execute('add_completion_log', self.supabase.table('completion_logs').insert(data))
             logger.info(f"📝 완료 기록 추가: Task ID {task_id}")
             return True
         except Exception as e:
             logger.error(f"완료 기록 추가 오류: {e}")
             return False
     
+    def iter_completion_logs(self, task_id: Optional[int] = None, columns: str = COMPLETION_LOG_COLUMNS,
+                             page_size: Optional[int] = None, since: Optional[str] = None) -> Iterator[Dict]:
+        """완료 기록을 최신순(ID 역순)으로 페이지 단위 조회 (since: 이 시각 이후 완료분만)"""
+        def where(query):
+            if task_id:
+                query = query.eq('task_id', task_id)
+            if since:
+                query = query.gte('completed_at', since)
+            return query
+        return self._iter_pages('iter_completion_logs', 'completion_logs', columns, 'id',
+                                page_size, desc=True, where=where)
+    
+    def add_email_log(self, data: Dict) -> bool:
+        """메일 발송 기록 추가"""
+        self._execute('add_email_log', self.supabase.table('email_logs').insert(data))
+        return True
+    
     def get_completion_logs(self, task_id: Optional[int] = None, limit: int = 100) -> List[Dict]:
         """완료 기록 조회"""
         try:
-            query = self.supabase.table('completion_logs').select('*, tasks(*)')
-            
-            if task_id:
-                query = query.eq('task_id', task_id)
-            
-            response = query.order('completed_at', desc=True).limit(limit).execute()
-            return response.data
+            logs = self.iter_completion_logs(task_id, page_size=min(limit, PAGE_SIZE))
+            return list(islice(logs, limit))
         except Exception as e:
             logger.error(f"완료 기록 조회 오류: {e}")
             return []
     
     # ========== 통계 및 분석 ==========
     def get_task_statistics(self) -> Dict:
-        """업무 통계 조회"""
+        """업무 통계 조회 - 트리거로 유지되는 카운터를 RPC 한 번으로 읽음"""
+        try:
+            today = self.kst_now().date().isoformat()
+            response = self._execute('get_task_statistics', self.supabase.rpc('get_task_statistics', {'p_day': today}), read=True)
+            if response.data:
+                return response.data
+        except Exception as e:
+            logger.warning(f"통계 RPC 조회 실패, 개별 카운트로 대체: {e}")
+        return self._count_task_statistics()
+    
+    def _count_task_statistics(self) -> Dict:
+        """업무 통계 조회 (카운터 RPC가 없는 프로젝트용 - COUNT 요청 4회)"""
         try:
             # 전체 업무 수
-            total_response = self.supabase.table('tasks').select('id', count='exact').execute()
+            total_response = self._execute('count_task_statistics', self.supabase.table('tasks').select('id', count='exact'), read=True)
             total_count = total_response.count
             
             # 완료된 업무 수
-            completed_response = self.supabase.table('tasks').select('id', count='exact').eq('status', 'done').execute()
+            completed_response = self._execute('count_task_statistics', self.supabase.table('tasks').select('id', count='exact').eq('status', 'done'), read=True)
             completed_count = completed_response.count
             
             # 진행 중 업무 수
-            pending_response = self.supabase.table('tasks').select('id', count='exact').eq('status', 'pending').execute()
+            pending_response = self._execute('count_task_statistics', self.supabase.table('tasks').select('id', count='exact').eq('status', 'pending'), read=True)
             pending_count = pending_response.count
             
-            # 오늘 완료된 업무 수
-            today = self.kst_now().date().isoformat()
-            today_completed_response = self.supabase.table('completion_logs').select('id', count='exact').gte('completed_at', today).execute()
+            # 오늘 완료된 업무 수 (last_completed_at 이 오늘(KST)인 업무 - SQLite 통계와 같은 정의)
+            today = self.kst_now().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+            today_completed_response = self._execute('count_task_statistics', self.supabase.table('tasks').select('id', count='exact').gte('last_completed_at', today), read=True)
             today_completed_count = today_completed_response.count
             
             return {
@@ -305,5 +623,25 @@ class SupabaseManager:
                 'today_completed': 0
             }
 
-# 글로벌 인스턴스
-supabase_manager = SupabaseManager()
+# 글로벌 인스턴스 - 첫 사용 시 생성 (SQLite 전용 실행에서는 만들지 않음)
+_managers = {}
+_managers_lock = threading.Lock()
+
+def get_supabase_manager(use_service_key: bool = False) -> SupabaseManager:
+    manager = _managers.get(use_service_key)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(use_service_key)
+            if manager is None:
+                manager = _managers[use_service_key] = SupabaseManager(use_service_key=use_service_key)
+    return manager
+
+def is_configured() -> bool:
+    """Supabase 환경 변수 설정 여부 (클라이언트를 만들지 않고 확인)"""
+    return bool(os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY"))
+
+def __getattr__(name):
+    # 기존 코드의 `from supabase_client import supabase_manager` 호환
+    if name == "supabase_manager":
+        return get_supabase_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
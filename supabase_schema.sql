@@ -96,6 +96,7 @@ CREATE INDEX IF NOT EXISTS idx_completion_logs_task_id ON completion_logs(task_i
 CREATE INDEX IF NOT EXISTS idx_completion_logs_completed_at ON completion_logs(completed_at);
 CREATE INDEX IF NOT EXISTS idx_email_logs_recipient ON email_logs(recipient_email);
 CREATE INDEX IF NOT EXISTS idx_email_logs_sent_at ON email_logs(sent_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee_due ON tasks(assignee_email, frequency, last_completed_at);
 
 -- 기본 시스템 설정 데이터 삽입
 INSERT INTO system_settings (key, value, description) VALUES
@@ -183,3 +184,236 @@ JOIN tasks t ON cl.task_id = t.id
 WHERE cl.completed_at >= CURRENT_DATE - INTERVAL '30 days'
 GROUP BY DATE(cl.completed_at)
 ORDER BY completion_date DESC;
+
+-- 통계 카운터: 트리거로 증분 유지하여 통계 조회를 단일 행 읽기로 처리
+CREATE TABLE IF NOT EXISTS task_counters (
+    id SMALLINT PRIMARY KEY CHECK (id = 1),
+    total BIGINT NOT NULL DEFAULT 0,
+    done BIGINT NOT NULL DEFAULT 0,
+    pending BIGINT NOT NULL DEFAULT 0
+);
+
+-- 일자별(KST) 완료 업무 수 - 마지막 완료 시각(last_completed_at)이 그날인 업무 수
+-- (SQLite db.py 의 task_daily_completions 와 같은 정의)
+CREATE TABLE IF NOT EXISTS task_daily_completions (
+    day DATE PRIMARY KEY,
+    count BIGINT NOT NULL DEFAULT 0
+);
+
+-- 기존 데이터로 초기값 채우기 (최초 1회)
+INSERT INTO task_counters (id, total, done, pending)
+SELECT 1, COUNT(*),
+       COUNT(*) FILTER (WHERE status = 'done'),
+       COUNT(*) FILTER (WHERE status = 'pending')
+FROM tasks
+ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO task_daily_completions (day, count)
+SELECT (last_completed_at AT TIME ZONE 'Asia/Seoul')::date, COUNT(*)
+FROM tasks
+WHERE last_completed_at IS NOT NULL
+GROUP BY 1
+ON CONFLICT (day) DO NOTHING;
+
+ALTER TABLE task_counters ENABLE ROW LEVEL SECURITY;
+ALTER TABLE task_daily_completions ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Task counters are viewable by everyone" ON task_counters FOR SELECT USING (true);
+CREATE POLICY "Daily completions are viewable by everyone" ON task_daily_completions FOR SELECT USING (true);
+
+-- 함수: tasks 변경 시 카운터 갱신 (RLS와 무관하게 갱신되도록 SECURITY DEFINER)
+CREATE OR REPLACE FUNCTION update_task_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE task_counters
+           SET total = total + 1,
+               done = done + (NEW.status = 'done')::int,
+               pending = pending + (NEW.status = 'pending')::int
+         WHERE id = 1;
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE task_counters
+           SET done = done + (NEW.status = 'done')::int - (OLD.status = 'done')::int,
+               pending = pending + (NEW.status = 'pending')::int - (OLD.status = 'pending')::int
+         WHERE id = 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE task_counters
+           SET total = total - 1,
+               done = done - (OLD.status = 'done')::int,
+               pending = pending - (OLD.status = 'pending')::int
+         WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- 함수: 업무의 last_completed_at 변경 시 일자별 완료 업무 수 갱신
+CREATE OR REPLACE FUNCTION update_daily_completions()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.last_completed_at IS NOT NULL THEN
+        UPDATE task_daily_completions SET count = count - 1
+         WHERE day = (OLD.last_completed_at AT TIME ZONE 'Asia/Seoul')::date;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.last_completed_at IS NOT NULL THEN
+        INSERT INTO task_daily_completions (day, count)
+        VALUES ((NEW.last_completed_at AT TIME ZONE 'Asia/Seoul')::date, 1)
+        ON CONFLICT (day) DO UPDATE SET count = task_daily_completions.count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER update_task_counters_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF status ON tasks
+    FOR EACH ROW EXECUTE FUNCTION update_task_counters();
+
+CREATE TRIGGER update_daily_completions_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF last_completed_at ON tasks
+    FOR EACH ROW EXECUTE FUNCTION update_daily_completions();
+
+-- RPC: 업무 통계 (SupabaseManager.get_task_statistics)
+CREATE OR REPLACE FUNCTION get_task_statistics(p_day DATE DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')::date)
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'total_tasks', c.total,
+        'completed_tasks', c.done,
+        'pending_tasks', c.pending,
+        'today_completed', COALESCE((SELECT d.count FROM task_daily_completions d WHERE d.day = p_day), 0)
+    )
+    FROM task_counters c
+    WHERE c.id = 1;
+$$ LANGUAGE sql STABLE;
+
+-- RPC: 토큰/업무 ID 일괄 완료 (SupabaseManager.complete_tasks)
+-- 업무 상태 변경과 완료 기록 추가를 한 트랜잭션에서 처리하고 완료된 업무를 반환
+-- 진행 중(pending)인 업무만 바꾸므로 같은 링크를 다시 눌러도 완료 기록이 중복되지 않는다
+CREATE OR REPLACE FUNCTION complete_tasks(
+    p_task_ids BIGINT[] DEFAULT '{}',
+    p_tokens TEXT[] DEFAULT '{}',
+    p_method TEXT DEFAULT 'email',
+    p_notes TEXT DEFAULT NULL
+)
+RETURNS SETOF tasks AS $$
+    WITH done AS (
+        UPDATE tasks
+           SET status = 'done',
+               last_completed_at = NOW(),
+               updated_at = NOW()
+         WHERE status = 'pending'
+           AND (id = ANY(p_task_ids) OR hmac_token = ANY(p_tokens))
+        RETURNING *
+    ), logged AS (
+        INSERT INTO completion_logs (task_id, completed_at, completion_method, notes)
+        SELECT id, last_completed_at, p_method, p_notes FROM done
+    )
+    SELECT * FROM done;
+$$ LANGUAGE sql VOLATILE SECURITY DEFINER;
+
+-- RPC: ID 를 지정해 옮긴 뒤 tasks.id 시퀀스를 최대값으로 맞춤 (migrate_to_supabase.py)
+CREATE OR REPLACE FUNCTION sync_task_id_sequence()
+RETURNS BIGINT AS $$
+    SELECT setval(pg_get_serial_sequence('tasks', 'id'), COALESCE(MAX(id), 1)) FROM tasks;
+$$ LANGUAGE sql VOLATILE SECURITY DEFINER;
+
+-- 삭제 기록(툼스톤) - 양방향 동기화(reconcile.py)에서 삭제를 로컬 SQLite 로 전파
+CREATE TABLE IF NOT EXISTS task_tombstones (
+    id BIGINT PRIMARY KEY,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+ALTER TABLE task_tombstones ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Task tombstones are viewable by everyone" ON task_tombstones FOR SELECT USING (true);
+
+CREATE OR REPLACE FUNCTION record_task_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO task_tombstones (id, deleted_at) VALUES (OLD.id, NOW())
+    ON CONFLICT (id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER record_task_tombstone_trigger
+    AFTER DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION record_task_tombstone();
+
+-- RPC: ID 구간별 행 수와 해시 (reconcile.task_row_hash 와 같은 형식)
+-- 행 문자열: id|title|assignee_email|frequency|status|last_completed_at(KST, 초 단위)
+CREATE OR REPLACE FUNCTION task_range_digests(p_lo BIGINT[], p_hi BIGINT[])
+RETURNS TABLE (lo BIGINT, hi BIGINT, row_count BIGINT, digest TEXT) AS $$
+    SELECT b.lo, b.hi, COUNT(t.id),
+           COALESCE(md5(string_agg(md5(
+               t.id::text || '|' || t.title || '|' || t.assignee_email || '|' || t.frequency || '|' ||
+               COALESCE(t.status, '') || '|' ||
+               COALESCE(to_char(t.last_completed_at AT TIME ZONE 'Asia/Seoul', 'YYYY-MM-DD"T"HH24:MI:SS'), '')
+           ), '' ORDER BY t.id)), '')
+    FROM unnest(p_lo, p_hi) AS b(lo, hi)
+    LEFT JOIN tasks t ON t.id >= b.lo AND t.id < b.hi
+    GROUP BY b.lo, b.hi;
+$$ LANGUAGE sql STABLE;
+
+-- 리더 선출용 임대(lease) - 여러 웹훅 인스턴스 중 하나만 예약 작업을 실행 (leader.py)
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL,
+    acquired_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+ALTER TABLE leases ENABLE ROW LEVEL SECURITY;
+
+-- RPC: 비어 있거나 만료됐거나 이미 내 것이면 임대를 잡거나 연장하고 TRUE
+CREATE OR REPLACE FUNCTION try_acquire_lease(p_name TEXT, p_holder TEXT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+    WITH taken AS (
+        INSERT INTO leases AS l (name, holder, expires_at, acquired_at)
+        VALUES (p_name, p_holder, NOW() + make_interval(secs => p_ttl_seconds), NOW())
+        ON CONFLICT (name) DO UPDATE
+           SET holder = EXCLUDED.holder,
+               expires_at = EXCLUDED.expires_at,
+               acquired_at = CASE WHEN l.holder = EXCLUDED.holder THEN l.acquired_at ELSE NOW() END
+         WHERE l.holder = EXCLUDED.holder OR l.expires_at < NOW()
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM taken);
+$$ LANGUAGE sql VOLATILE SECURITY DEFINER;
+
+-- RPC: 내가 가진 임대 반납 (정상 종료 시 바로 다른 인스턴스가 넘겨받도록)
+CREATE OR REPLACE FUNCTION release_lease(p_name TEXT, p_holder TEXT)
+RETURNS BOOLEAN AS $$
+    WITH gone AS (
+        DELETE FROM leases WHERE name = p_name AND holder = p_holder RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM gone);
+$$ LANGUAGE sql VOLATILE SECURITY DEFINER;
+
+-- 예약 작업의 하루 한 번 실행 표시 - 리더가 바뀌어도 같은 날 메일이 두 번 나가지 않도록 (leader.py)
+CREATE TABLE IF NOT EXISTS daily_runs (
+    name TEXT NOT NULL,
+    day DATE NOT NULL,
+    holder TEXT NOT NULL,
+    claimed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (name, day)
+);
+ALTER TABLE daily_runs ENABLE ROW LEVEL SECURITY;
+
+-- RPC: 그날 실행 표시가 없거나 이미 내 것이면 잡고 TRUE
+CREATE OR REPLACE FUNCTION claim_daily_run(p_name TEXT, p_day DATE, p_holder TEXT)
+RETURNS BOOLEAN AS $$
+    WITH taken AS (
+        INSERT INTO daily_runs AS d (name, day, holder)
+        VALUES (p_name, p_day, p_holder)
+        ON CONFLICT (name, day) DO UPDATE
+           SET claimed_at = NOW()
+         WHERE d.holder = EXCLUDED.holder
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM taken);
+$$ LANGUAGE sql VOLATILE SECURITY DEFINER;
+
+-- RPC: 한 통도 보내지 못한 실행의 표시를 지워 다른 인스턴스가 다시 시도할 수 있게 함
+CREATE OR REPLACE FUNCTION release_daily_run(p_name TEXT, p_day DATE, p_holder TEXT)
+RETURNS BOOLEAN AS $$
+    WITH gone AS (
+        DELETE FROM daily_runs WHERE name = p_name AND day = p_day AND holder = p_holder RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM gone);
+$$ LANGUAGE sql VOLATILE SECURITY DEFINER;
@@ -0,0 +1,56 @@
+# tests/conftest.py - 공용 픽스처
+# 모든 모듈이 현재 디렉터리의 reminder.db / schema.sql / config.yaml 을 쓰므로
+# 테스트마다 임시 디렉터리로 옮겨 새 DB 를 만든다.
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import db
+import mailer
+import supabase_client
+from fake_supabase import FakeClient
+from local_postgrest import LocalPostgrest
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """schema.sql 과 테스트용 config.yaml 이 있는 임시 디렉터리에 빈 reminder.db 를 만든다"""
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(ROOT / "schema.sql", tmp_path / "schema.sql")
+    (tmp_path / "config.yaml").write_text(
+        "secret: test-secret\nbase_url: http://testserver\ndashboard_url: http://testserver/dashboard\n",
+        encoding="utf-8")
+    mailer._load_secret.cache_clear()
+    mailer._load_keys.cache_clear()
+    db.init_schema()
+    yield tmp_path
+    mailer._load_secret.cache_clear()
+    mailer._load_keys.cache_clear()
+
+@pytest.fixture
+def add_task(workdir):
+    """tasks 에 한 행 넣고 ID 를 반환하는 함수"""
+    def add(title="업무", assignee_email="kim@example.com", frequency="daily", status="pending", **fields):
+        columns = {"title": title, "assignee_email": assignee_email, "frequency": frequency,
+                   "status": status, **fields}
+        with db.get_conn() as conn:
+            cur = conn.execute(
+                f"INSERT INTO tasks ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                list(columns.values()))
+            return cur.lastrowid
+    return add
+
+@pytest.fixture
+def remote(workdir, monkeypatch):
+    """SupabaseManager 가 로컬 PostgREST 대역(LocalPostgrest)을 쓰도록 설정하고 대역을 반환"""
+    client = FakeClient(LocalPostgrest(str(workdir / "remote.db")))
+    monkeypatch.setenv("SUPABASE_URL", "http://local")
+    monkeypatch.setenv("SUPABASE_KEY", "local.anon.key")
+    monkeypatch.setenv("SUPABASE_SERVICE_KEY", "local.service.key")
+    monkeypatch.setattr(supabase_client, "_clients", {"anon": client, "service": client})
+    monkeypatch.setattr(supabase_client, "_managers", {})
+    return client.api
@@ -0,0 +1,122 @@
+# tests/fake_supabase.py - supabase 패키지 없이 SupabaseManager 를 시험하기 위한 클라이언트 대역
+# supabase-py 쿼리 빌더처럼 필터를 모아 PostgREST 파라미터로 바꾼 뒤 local_postgrest.LocalPostgrest 에 넘긴다.
+from types import SimpleNamespace
+
+from local_postgrest import PostgrestError
+
+class APIError(Exception):
+    """postgrest-py 의 APIError 와 같은 이름/속성 (supabase 패키지 없이 테스트)"""
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+def _quote(value):
+    return '"' + str(value).replace('"', '\\"') + '"'
+
+class FakeQuery:
+    """supabase-py 쿼리 빌더 흉내 - 모은 PostgREST 파라미터를 LocalPostgrest 에 그대로 넘긴다"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.params = []
+        self.method = "select"
+        self.body = None
+
+    def select(self, columns="*", count=None):
+        self.params.append(("select", columns))
+        return self
+
+    def update(self, data):
+        self.method, self.body = "update", data
+        return self
+
+    def insert(self, rows):
+        self.method, self.body = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict="id"):
+        self.method, self.body = "upsert", rows
+        self.params.append(("on_conflict", on_conflict))
+        return self
+
+    def delete(self):
+        self.method = "delete"
+        return self
+
+    def in_(self, column, values):
+        self.params.append((column, "in.(" + ",".join(_quote(v) for v in values) + ")"))
+        return self
+
+    def or_(self, expr):
+        self.params.append(("or", f"({expr})"))
+        return self
+
+    def _op(self, op, column, value):
+        self.params.append((column, f"{op}.{value}"))
+        return self
+
+    def eq(self, column, value):
+        return self._op("eq", column, value)
+
+    def gt(self, column, value):
+        return self._op("gt", column, value)
+
+    def gte(self, column, value):
+        return self._op("gte", column, value)
+
+    def lt(self, column, value):
+        return self._op("lt", column, value)
+
+    def like(self, column, value):
+        return self._op("like", column, value)
+
+    def order(self, column, desc=False):
+        self.params.append(("order", f"{column}.{'desc' if desc else 'asc'}"))
+        return self
+
+    def limit(self, n):
+        self.params.append(("limit", str(n)))
+        return self
+
+    def execute(self):
+        api = self.client.api
+        api.delay()
+        if self.method == "update":
+            return SimpleNamespace(data=api.update(self.table, self.params, self.body))
+        if self.method == "insert":
+            return SimpleNamespace(data=api.insert(self.table, self.params, "", self.body))
+        if self.method == "upsert":
+            return SimpleNamespace(data=api.insert(self.table, self.params, "resolution=merge-duplicates", self.body))
+        if self.method == "delete":
+            return SimpleNamespace(data=api.delete(self.table, self.params))
+        return SimpleNamespace(data=api.select(self.table, self.params, "")[0])
+
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self.client, self.name, self.params = client, name, params
+
+    def execute(self):
+        self.client.api.delay()
+        try:
+            return SimpleNamespace(data=self.client.api.rpc(self.name, self.params))
+        except PostgrestError as e:
+            raise APIError(str(e), e.code)
+
+class FakeClient:
+    def __init__(self, api):
+        self.api = api
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        return FakeRpc(self, name, params)
+
+def seed(api, table, rows):
+    """대역 DB 에 행을 직접 넣음 (dict 마다 컬럼이 달라도 됨)"""
+    with api.connect() as conn:
+        for row in rows:
+            conn.execute(f"INSERT INTO {table} ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                         list(row.values()))
@@ -0,0 +1,33 @@
+import bootstrap_from_supabase
+import db
+from db import get_conn, get_state, record_scheduler_run, recent_scheduler_runs
+from fake_supabase import seed
+
+def test_bootstrap_replaces_synced_tables_and_keeps_local_ones(remote, add_task):
+    add_task("오래된 로컬 업무")
+    with get_conn() as conn:
+        record_scheduler_run(conn, "daily_all_cycles", "success")
+        conn.execute("CREATE TABLE local_notes (id INTEGER PRIMARY KEY, body TEXT)")
+        conn.execute("CREATE INDEX idx_local_notes_body ON local_notes(body)")
+        conn.execute("INSERT INTO local_notes (body) VALUES ('유지')")
+    now = db.kst_now()
+    seed(remote, "users", [{"email": "kim@example.com", "name": "Kim"}])
+    seed(remote, "tasks", [
+        {"id": 7, "title": "원격 업무", "assignee_email": "kim@example.com", "frequency": "daily",
+         "status": "done", "hmac_token": "tok-7", "last_completed_at": now.isoformat()},
+        {"id": 8, "title": "원격 업무2", "assignee_email": "kim@example.com", "frequency": "weekly"},
+    ])
+    seed(remote, "completion_logs", [{"task_id": 7, "completed_at": now.isoformat()}])
+
+    result = bootstrap_from_supabase.bootstrap()
+
+    assert (result["users"], result["tasks"], result["completion_logs"]) == (1, 2, 1)
+    assert {"scheduler_runs", "local_notes", "system_settings"} <= set(result["carried"])
+    with get_conn() as conn:
+        assert [r["title"] for r in conn.execute("SELECT title FROM tasks ORDER BY id")] == ["원격 업무", "원격 업무2"]
+        assert [r["outcome"] for r in recent_scheduler_runs(conn)] == ["success"]
+        assert conn.execute("SELECT body FROM local_notes").fetchone()[0] == "유지"
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_local_notes_body'").fetchone()
+        assert get_state(conn, "last_bootstrap_at")
+        stats = db.get_task_stats(conn, day=now.date().isoformat())
+    assert (stats["total_tasks"], stats["completed_tasks"], stats["today_completed"]) == (2, 1, 1)
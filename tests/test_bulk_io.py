@@ -0,0 +1,66 @@
+import json
+
+import bulk_io
+import db
+
+def _write(path, text, encoding="utf-8"):
+    path.write_bytes(text.encode(encoding) if isinstance(text, str) else text)
+    return str(path)
+
+def _task(task_id):
+    with db.get_conn() as conn:
+        return dict(conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone())
+
+def test_partial_column_import_keeps_other_columns(add_task, workdir):
+    task_id = add_task("보고서", status="done", hmac_token="keep-this-token", assignee="김")
+    path = _write(workdir / "tasks.csv", f"id,title,frequency\n{task_id},주간 보고서,weekly\n")
+
+    report = bulk_io.import_file("tasks", path)
+
+    assert report["written"] == 1
+    task = _task(task_id)
+    assert (task["title"], task["frequency"]) == ("주간 보고서", "weekly")
+    # 파일에 없는 컬럼은 그대로
+    assert (task["status"], task["assignee"], task["hmac_token"]) == ("done", "김", "keep-this-token")
+
+def test_new_rows_get_ids_and_tokens(workdir):
+    path = _write(workdir / "tasks.jsonl", "\n".join(json.dumps(r, ensure_ascii=False) for r in [
+        {"title": "새 업무", "frequency": "daily", "assignee_email": "kim@example.com"},
+        {"title": "또 다른 업무", "frequency": "monthly", "hmac_token": None},
+    ]) + "\n")
+    report = bulk_io.import_file("tasks", path)
+    assert report["written"] == 2
+    with db.get_conn() as conn:
+        rows = conn.execute("SELECT id, status, hmac_token FROM tasks ORDER BY id").fetchall()
+    assert [r["status"] for r in rows] == ["pending", "pending"]
+    assert all(r["hmac_token"] for r in rows)
+
+def test_bad_lines_are_reported_not_fatal(workdir):
+    lines = [
+        json.dumps({"email": "kim@example.com", "name": "Kim"}).encode(),
+        b"{not json",
+        json.dumps({"email": "no-at-sign"}).encode(),
+        b'{"email": "lee@example.com", "name": "\xff\xfe"}',
+        json.dumps({"email": "park@example.com"}).encode(),
+    ]
+    report = bulk_io.import_file("users", _write(workdir / "users.jsonl", b"\n".join(lines) + b"\n"))
+    assert report["written"] == 2
+    assert report["invalid"] == 3
+    assert sorted(e["line"] for e in report["errors"]) == [2, 3, 4]
+
+def test_constraint_failure_retries_row_by_row(add_task, workdir):
+    add_task("기존", hmac_token="taken")
+    path = _write(workdir / "tasks.csv",
+                  "title,frequency,hmac_token\n첫째,daily,t1\n충돌,daily,taken\n셋째,daily,t3\n")
+    report = bulk_io.import_file("tasks", path)
+    assert report["written"] == 2
+    assert report["failed"] == 1
+    assert report["errors"][0]["line"] == 3
+
+def test_export_pages_by_key(add_task):
+    for i in range(5):
+        add_task(f"업무{i}")
+    chunks = list(bulk_io.iter_export("tasks", "jsonl", batch_rows=2))
+    rows = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert [r["title"] for r in rows] == [f"업무{i}" for i in range(5)]
+    assert len(chunks) >= 3
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from circuit_breaker import CircuitBreaker, CircuitOpen, CLOSED, OPEN, HALF_OPEN
+
+def _fail():
+    raise ConnectionError("timeout")
+
+def test_opens_after_threshold_and_rejects_fast():
+    breaker = CircuitBreaker("test-open", failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+    assert breaker.state == OPEN
+    calls = []
+    with pytest.raises(CircuitOpen):
+        breaker.call(calls.append, 1)
+    assert calls == []
+
+def test_half_open_probe_closes_on_success():
+    breaker = CircuitBreaker("test-probe", failure_threshold=1, reset_timeout=0.01)
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    time.sleep(0.02)
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+def test_server_errors_do_not_count():
+    breaker = CircuitBreaker("test-filter", failure_threshold=1, is_failure=lambda e: not isinstance(e, ValueError))
+
+    def reject():
+        raise ValueError("제약 조건 위반")
+
+    with pytest.raises(ValueError):
+        breaker.call(reject)
+    assert breaker.state == CLOSED
+
+def test_retries_idempotent_reads():
+    breaker = CircuitBreaker("test-retry", failure_threshold=5)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert breaker.call(flaky, retries=2, backoff=0.001) == "ok"
+    assert len(attempts) == 3
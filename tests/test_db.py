@@ -0,0 +1,53 @@
+import sqlite3
+
+import db
+
+def test_stats_counters_follow_task_changes(add_task):
+    first = add_task("보고서", last_completed_at=None)
+    add_task("점검", status="done", last_completed_at="2026-10-19T09:00:00+09:00")
+    with db.get_conn() as conn:
+        conn.execute("UPDATE tasks SET status = 'done', last_completed_at = ? WHERE id = ?",
+                     ("2026-10-19T10:00:00+09:00", first))
+        stats = db.get_task_stats(conn, day="2026-10-19")
+    assert stats == {"total_tasks": 2, "completed_tasks": 2, "pending_tasks": 0, "today_completed": 2}
+
+    with db.get_conn() as conn:
+        conn.execute("DELETE FROM tasks WHERE id = ?", (first,))
+        stats = db.get_task_stats(conn, day="2026-10-19")
+    assert stats["total_tasks"] == 1
+    assert stats["today_completed"] == 1
+
+def test_stats_schema_ready_is_tracked_per_database(workdir, tmp_path_factory):
+    other = tmp_path_factory.mktemp("other") / "other.db"
+    conn = sqlite3.connect(other)
+    conn.executescript(open("schema.sql", encoding="utf-8").read())
+    conn.execute("INSERT INTO tasks (title, frequency, status) VALUES ('x', 'daily', 'pending')")
+    conn.commit()
+    # 첫 번째 DB 가 준비됐다고 두 번째 DB 의 카운터 생성을 건너뛰면 안 됨
+    with db.get_conn() as main:
+        db.get_task_stats(main)
+    assert db.get_task_stats(conn)["total_tasks"] == 1
+    conn.close()
+
+def test_scheduler_run_history_does_not_commit_callers_transaction(workdir):
+    conn = sqlite3.connect("reminder.db")
+    conn.row_factory = sqlite3.Row
+    conn.execute("INSERT INTO users (email, name) VALUES ('a@example.com', 'A')")
+    db.record_scheduler_run(conn, "daily_all_cycles", "success", done=3, total=3)
+    conn.rollback()
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+
+    db.record_scheduler_run(conn, "daily_all_cycles", "noop")
+    conn.commit()
+    runs = db.recent_scheduler_runs(conn)
+    assert [r["outcome"] for r in runs] == ["noop"]
+    conn.close()
+
+def test_find_task_by_id_falls_back_to_row_key(add_task):
+    local = add_task("보고서", hmac_token="abcdefghijkl-rest")
+    add_task("다른 업무", hmac_token="zzzzzzzzzzzz-rest")
+    with db.get_conn() as conn:
+        # Supabase 쪽 ID(999)로 만든 토큰이어도 행 키로 같은 업무를 찾음
+        assert db.find_task_by_id(conn, 999, "abcdefghijkl")["id"] == local
+        assert db.find_task_by_id(conn, local, "zzzzzzzzzzzz")["title"] == "다른 업무"
+        assert db.find_task_by_id(conn, 999, "nomatch00000") is None
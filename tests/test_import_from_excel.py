@@ -0,0 +1,75 @@
+import pandas as pd
+
+import import_from_excel
+from db import get_conn
+
+def _workbook(path, **sheets):
+    with pd.ExcelWriter(path) as writer:
+        for name, rows in sheets.items():
+            pd.DataFrame(rows).to_excel(writer, sheet_name=name, index=False)
+    return str(path)
+
+def _tasks():
+    with get_conn() as conn:
+        return {r["title"]: dict(r) for r in conn.execute("SELECT * FROM tasks")}
+
+ROWS = [
+    {"제목": "보고서", "담당자": "김철수", "주기": "매일", "이메일": "kim@example.com"},
+    {"제목": "점검", "담당자": "이영희", "주기": "weekly", "이메일": None},
+    {"제목": "보고서", "담당자": "김철수", "주기": "매일", "이메일": "kim@example.com"},
+]
+
+def test_write_tasks_dedupes_and_resolves_emails(add_task):
+    add_task("점검", assignee_email="lee@example.com")
+    with get_conn() as conn:
+        conn.execute("INSERT INTO users (email, name) VALUES ('lee@example.com', '이영희')")
+    frame = import_from_excel.normalize_tasks(pd.DataFrame(ROWS + [
+        {"제목": "정리", "담당자": "Park Minsu", "주기": "월간", "이메일": None}]))
+    with get_conn() as conn:
+        result = import_from_excel.write_tasks(conn, frame)
+
+    # 시트 안의 반복 행 1개 + 이름으로 찾은 이메일이 같은 기존 업무 1개
+    assert result == {"imported": 2, "duplicates": 2, "users": 3}
+    tasks = _tasks()
+    assert tasks["보고서"]["frequency"] == "daily"
+    assert tasks["정리"]["assignee_email"] == "park.minsu@company.com"
+    assert tasks["보고서"]["hmac_token"] and tasks["정리"]["hmac_token"]
+
+def test_streaming_import_reads_every_sheet(workdir):
+    path = _workbook(workdir / "big.xlsx",
+                     첫시트=ROWS, 둘째=[{"제목": f"업무{i}", "담당자": "최", "주기": "daily"} for i in range(5)],
+                     메모=[{"내용": "필수 컬럼 없음"}])
+    result = import_from_excel.import_tasks_streaming(path, chunk_size=2)
+    assert result["sheets"] == ["첫시트", "둘째"]
+    assert result["skipped_sheets"] == ["메모"]
+    assert (result["imported"], result["duplicates"]) == (7, 1)
+    assert len(_tasks()) == 7
+
+def test_import_all_excel_in_worker_processes(workdir):
+    first = _workbook(workdir / "a.xlsx", 업무=ROWS)
+    second = _workbook(workdir / "b.xlsx", 업무=[{"제목": "점검", "담당자": "이영희", "주기": "weekly"},
+                                               {"제목": "새 업무", "담당자": "최", "주기": "monthly"}])
+    broken = workdir / "broken.xlsx"
+    broken.write_bytes(b"not a workbook")
+
+    report = import_from_excel.import_all_excel([first, second, str(broken)], workers=2, chunk_size=1)
+
+    assert report["failed"] == [str(broken)]
+    assert report["imported"] == 3
+    assert sorted(_tasks()) == ["보고서", "새 업무", "점검"]
+
+def test_sync_updates_only_changed_rows_and_retires_removed(workdir):
+    path = workdir / "sync.xlsx"
+    _workbook(path, 업무=ROWS[:2])
+    first = import_from_excel.sync_tasks_from_excel(str(path))
+    assert first["inserted"] == 2
+    report_id = _tasks()["보고서"]["id"]
+
+    assert import_from_excel.sync_tasks_from_excel(str(path))["unchanged"] == 2
+
+    _workbook(path, 업무=[{**ROWS[0], "주기": "weekly"}])
+    result = import_from_excel.sync_tasks_from_excel(str(path), retire=True)
+    assert (result["updated"], result["retired"], result["inserted"]) == (1, 1, 0)
+    tasks = _tasks()
+    assert list(tasks) == ["보고서"]
+    assert (tasks["보고서"]["id"], tasks["보고서"]["frequency"]) == (report_id, "weekly")
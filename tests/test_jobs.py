@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from jobs import JobRunner, JobQueueFull, SUCCEEDED, FAILED, CANCELLED
+
+def _wait(job):
+    job._future.result(timeout=5)
+    return job
+
+def test_job_result_and_progress():
+    runner = JobRunner(max_workers=1)
+
+    def work(job, n):
+        for i in range(n):
+            job.set_progress(i + 1, n)
+        return {"count": n}
+
+    job = _wait(runner.submit("count", work, 3))
+    assert job.status == SUCCEEDED
+    assert job.to_dict()["progress"] == {"done": 3, "total": 3}
+    assert job.result == {"count": 3}
+
+def test_failed_job_keeps_error():
+    runner = JobRunner(max_workers=1)
+
+    def boom(job):
+        raise RuntimeError("SMTP 연결 실패")
+
+    job = _wait(runner.submit("digest", boom))
+    assert job.status == FAILED
+    assert "SMTP" in job.error
+
+def test_running_job_stops_at_next_check():
+    runner = JobRunner(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow(job):
+        started.set()
+        release.wait(5)
+        job.check_cancelled()
+        return "끝까지 실행됨"
+
+    job = runner.submit("slow", slow)
+    started.wait(5)
+    assert runner.cancel(job.id)
+    release.set()
+    assert _wait(job).status == CANCELLED
+
+def test_queue_limit():
+    runner = JobRunner(max_workers=1, max_queued=1)
+    release = threading.Event()
+    runner.submit("block", lambda job: release.wait(5))
+    try:
+        # 첫 작업이 실행을 시작하기 전이라도 대기 작업은 한 개까지만
+        with pytest.raises(JobQueueFull):
+            for _ in range(3):
+                runner.submit("extra", lambda job: None)
+    finally:
+        release.set()
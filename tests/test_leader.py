@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+import leader
+from db import get_conn
+from leader import LeaderElector, SqliteLeases
+
+@pytest.fixture
+def leases(workdir):
+    return SqliteLeases()
+
+def test_lease_is_exclusive_until_it_expires(leases):
+    assert leases.try_acquire_lease("scheduler", "a", 0.05)
+    assert not leases.try_acquire_lease("scheduler", "b", 0.05)
+    assert leases.try_acquire_lease("scheduler", "a", 0.05)   # 연장
+    time.sleep(0.06)
+    assert leases.try_acquire_lease("scheduler", "b", 30)
+
+def test_release_only_by_holder(leases):
+    leases.try_acquire_lease("scheduler", "a", 30)
+    assert not leases.release_lease("scheduler", "b")
+    assert leases.release_lease("scheduler", "a")
+    assert leases.try_acquire_lease("scheduler", "b", 30)
+
+def test_daily_run_claim_and_release(leases):
+    assert leases.claim_daily_run("daily", "2026-10-19", "a")
+    assert leases.claim_daily_run("daily", "2026-10-19", "a")       # 같은 인스턴스는 다시 잡을 수 있음
+    assert not leases.claim_daily_run("daily", "2026-10-19", "b")
+    assert leases.claim_daily_run("daily", "2026-10-20", "b")       # 다음 날은 별개
+    assert not leases.release_daily_run("daily", "2026-10-19", "b")
+    assert leases.release_daily_run("daily", "2026-10-19", "a")
+    assert leases.claim_daily_run("daily", "2026-10-19", "b")
+
+def test_elector_steps_down_when_lease_is_taken(leases):
+    events = []
+    a = LeaderElector(ttl=30, backend=leases, holder="a",
+                      on_elected=lambda: events.append("elected"), on_revoked=lambda: events.append("revoked"))
+    b = LeaderElector(ttl=30, backend=leases, holder="b")
+    a.tick()
+    b.tick()
+    assert a.is_leader and not b.is_leader
+
+    # 임대가 만료되어 다른 인스턴스가 잡으면 다음 연장에서 물러남
+    with get_conn() as conn:
+        conn.execute("UPDATE leases SET expires_at = 0")
+    b.tick()
+    a.tick()
+    assert b.is_leader and not a.is_leader
+    assert events == ["elected", "revoked"]
+
+def test_stop_releases_lease(leases):
+    a = LeaderElector(ttl=30, backend=leases, holder="a")
+    a.tick()
+    a.stop()
+    assert leases.try_acquire_lease(leader.LEASE_NAME, "b", 30)
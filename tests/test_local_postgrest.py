@@ -0,0 +1,63 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from local_postgrest import LocalPostgrest, PostgrestError, build_where, start_background
+
+@pytest.fixture
+def api(tmp_path):
+    api = LocalPostgrest(str(tmp_path / "remote.db"), max_rows=2)
+    with api.connect() as conn:
+        conn.execute("INSERT INTO users (email, name) VALUES ('kim@example.com', 'Kim')")
+        conn.executemany(
+            "INSERT INTO tasks (id, title, assignee_email, frequency, status) VALUES (?, ?, 'kim@example.com', ?, ?)",
+            [(1, "A", "daily", "pending"), (2, "B", "weekly", "done"), (3, "C", "daily", "done")])
+    return api
+
+def test_nested_logic_filters(api):
+    params = [("select", "id"), ("status", "eq.done"),
+              ("or", '(frequency.eq.weekly,and(id.gt.2,title.in.("B","C")))')]
+    rows, _, _ = api.select("tasks", params, "")
+    assert [r["id"] for r in rows] == [2, 3]
+    where, args = build_where([("status", "not.in.(done)")])
+    assert where == " WHERE (NOT ([status] IN (?)))"
+    assert args == ["done"]
+
+def test_select_is_capped_at_max_rows(api):
+    rows, total, _ = api.select("tasks", [("select", "id"), ("order", "id.desc"), ("limit", "10")],
+                                "count=exact")
+    assert [r["id"] for r in rows] == [3, 2]
+    assert total == 3
+
+def test_upsert_and_embed(api):
+    api.insert("tasks", [("on_conflict", "id")], "resolution=merge-duplicates",
+               [{"id": 1, "title": "A2", "assignee_email": "kim@example.com", "frequency": "daily"}])
+    rows, _, _ = api.select("tasks", [("select", "title,users(name)"), ("id", "eq.1")], "")
+    assert rows == [{"title": "A2", "users": {"name": "Kim"}}]
+
+def test_rpc_complete_tasks_and_missing_function(api):
+    completed = api.rpc("complete_tasks", {"p_task_ids": [1, 2]})
+    assert [r["id"] for r in completed] == [1]   # 이미 done 인 업무는 건너뜀
+    with pytest.raises(PostgrestError) as exc:
+        api.rpc("no_such_function", {})
+    assert exc.value.code == "PGRST202"
+
+def test_http_server(tmp_path):
+    server = start_background(str(tmp_path / "http.db"))
+    try:
+        request = urllib.request.Request(
+            f"{server.url}/rest/v1/users", method="POST",
+            data=json.dumps({"email": "lee@example.com", "name": "Lee"}).encode(),
+            headers={"Content-Type": "application/json", "Prefer": "return=representation"})
+        with urllib.request.urlopen(request) as response:
+            assert response.status == 201
+        with urllib.request.urlopen(f"{server.url}/rest/v1/users?select=email&email=eq.lee@example.com") as response:
+            assert json.loads(response.read()) == [{"email": "lee@example.com"}]
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(f"{server.url}/rest/v1/users?select=nope")
+        assert json.loads(exc.value.read())["code"] == "42703"
+    finally:
+        server.shutdown()
+        server.server_close()
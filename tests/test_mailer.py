@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+import mailer
+from db import kst_now
+
+def test_task_token_roundtrip_and_tampering(workdir):
+    token = mailer.make_task_token(42, "weekly", key="abcdefghijkl")
+    claims = mailer.verify_task_token(token)
+    assert claims["task_id"] == 42
+    assert claims["row_key"] == "abcdefghijkl"
+
+    forged = token.replace(".42.", ".43.")
+    assert mailer.verify_task_token(forged) is None
+
+def test_task_token_expires_with_its_cycle(workdir):
+    now = kst_now()
+    token = mailer.make_task_token(7, "daily", now=now)
+    assert mailer.verify_task_token(token, now=now)["row_key"] is None
+    assert mailer.verify_task_token(token, now=now + timedelta(days=1)) is None
+
+def test_row_tokens_differ_for_same_id(workdir):
+    # 두 저장소의 같은 ID 업무가 같은 hmac_token 을 받지 않도록
+    assert mailer.make_row_token(5) != mailer.make_row_token(5)
+
+def test_batch_token_roundtrip(workdir):
+    expires = kst_now() + timedelta(hours=1)
+    token = mailer.make_batch_token([105, 100, 101], expires, {100: "k100", 105: "k105"})
+    assert mailer.verify_batch_token(token) == [(100, "k100"), (101, None), (105, "k105")]
+    assert mailer.verify_batch_token(token[:-2] + "xx") is None
+    assert mailer.verify_batch_token(mailer.make_batch_token([1], kst_now() - timedelta(seconds=1))) is None
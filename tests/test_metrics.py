@@ -0,0 +1,20 @@
+import metrics
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_duration_seconds", "테스트", ("route",), buckets=(0.1, 1))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    text = histogram.render()
+    assert 'test_duration_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_duration_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_duration_seconds_bucket{route="/a",le="+Inf"} 2' in text
+    assert 'test_duration_seconds_count{route="/a"} 2' in text
+
+def test_counter_and_gauge_labels():
+    counter = metrics.Counter("test_events_total", "테스트", ("kind",))
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    gauge = metrics.Gauge("test_depth", "테스트", ("queue",))
+    gauge.set_function(lambda: 7, queue="jobs")
+    assert 'test_events_total{kind="a"} 3' in counter.render()
+    assert 'test_depth{queue="jobs"} 7' in gauge.render()
@@ -0,0 +1,56 @@
+import pytest
+
+import migrate_to_supabase
+from db import get_conn, get_state
+from fake_supabase import seed
+
+def _local(sql, params=()):
+    with get_conn() as conn:
+        return [dict(r) for r in conn.execute(sql, params)]
+
+def test_migrate_matches_existing_remote_tasks(remote, add_task):
+    with get_conn() as conn:
+        conn.execute("INSERT INTO users (email, name) VALUES ('kim@example.com', 'Kim')")
+    report_id = add_task("보고서")                      # 원격에 다른 ID 로 이미 있음
+    add_task("점검", hmac_token="local-token")
+    tidy_id = add_task("정리")                          # 원격에서 다른 업무가 같은 ID 를 씀
+    seed(remote, "users", [{"email": "kim@example.com", "name": "Kim"}])
+    seed(remote, "tasks", [
+        {"id": 50, "title": "보고서", "assignee_email": "kim@example.com", "frequency": "daily",
+         "hmac_token": "remote-token"},
+        {"id": tidy_id, "title": "다른 업무", "assignee_email": "lee@example.com", "frequency": "weekly",
+         "hmac_token": "other-token"},
+    ])
+
+    report = migrate_to_supabase.migrate_all()
+
+    assert report["tasks"]["ok"] and report["users"]["ok"]
+    with remote.connect() as conn:
+        remote_tasks = {r["title"]: dict(r) for r in conn.execute("SELECT * FROM tasks")}
+    assert remote_tasks["보고서"]["id"] == 50
+    assert remote_tasks["다른 업무"]["hmac_token"] == "other-token"
+    assert remote_tasks["정리"]["id"] != tidy_id
+    # 이미 보낸 링크가 있는 원격 토큰을 로컬에도 저장해 두 저장소의 행 키를 맞춤
+    assert _local("SELECT hmac_token FROM tasks WHERE id = ?", (report_id,))[0]["hmac_token"] == "remote-token"
+    assert remote_tasks["정리"]["hmac_token"] == _local("SELECT hmac_token FROM tasks WHERE id = ?", (tidy_id,))[0]["hmac_token"]
+
+def test_failed_chunk_resumes_from_checkpoint(remote, monkeypatch):
+    with get_conn() as conn:
+        conn.executemany("INSERT INTO users (email, name) VALUES (?, ?)",
+                         [(f"{c}@example.com", c) for c in "abcd"])
+    send = migrate_to_supabase.MIGRATIONS["users"]["send"]
+
+    def failing(manager, rows):
+        if rows[0]["email"] == "c@example.com":
+            raise ConnectionError("네트워크 오류")
+        return send(manager, rows)
+
+    monkeypatch.setitem(migrate_to_supabase.MIGRATIONS["users"], "send", failing)
+    with pytest.raises(ConnectionError):
+        migrate_to_supabase.migrate_table("users", chunk_size=1, workers=1)
+    with get_conn() as conn:
+        assert get_state(conn, "migration.users.last_key") == "b@example.com"
+
+    monkeypatch.setitem(migrate_to_supabase.MIGRATIONS["users"], "send", send)
+    assert migrate_to_supabase.migrate_table("users", chunk_size=1, workers=1) == 2
+    assert migrate_to_supabase.verify_table("users")["ok"]
@@ -0,0 +1,57 @@
+import reconcile
+from db import get_conn
+from fake_supabase import seed
+
+def _task(task_id, title, **fields):
+    return {"id": task_id, "title": title, "assignee_email": "kim@example.com", "frequency": "daily",
+            "status": "pending", "hmac_token": f"tok-{task_id}", **fields}
+
+def _insert_local(rows):
+    with get_conn() as conn:
+        for row in rows:
+            conn.execute(f"INSERT INTO tasks ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                         list(row.values()))
+
+def _states(rows):
+    return {r["id"]: (r["title"], r["status"]) for r in rows}
+
+def test_two_way_sync(remote):
+    seed(remote, "users", [{"email": "kim@example.com", "name": "Kim"}])
+    synced_at = "2026-10-01T09:00:00+09:00"
+    shared = [_task(1, "공통", updated_at=synced_at), _task(2, "로컬에서 완료", updated_at=synced_at)]
+    _insert_local(shared)
+    seed(remote, "tasks", shared)
+    with get_conn() as conn:
+        conn.execute("UPDATE tasks SET status = 'done', last_completed_at = '2026-10-19T09:00:00+09:00', "
+                     "updated_at = '2026-10-19T09:00:00+09:00' WHERE id = 2")
+    _insert_local([_task(3, "로컬 새 업무"), _task(5, "분기 업무", frequency="quarterly")])
+    seed(remote, "tasks", [_task(4, "원격 새 업무", updated_at="2026-10-18T09:00:00+09:00")])
+
+    report = reconcile.reconcile()
+
+    assert (report["pushed"], report["pulled"]) == (2, 1)
+    assert [r["id"] for r in report["rejected"]] == [5]   # Supabase 는 quarterly 를 받지 않음
+    with get_conn() as conn:
+        local = _states(conn.execute("SELECT * FROM tasks"))
+    with remote.connect() as conn:
+        theirs = _states(conn.execute("SELECT * FROM tasks"))
+    assert theirs == {i: local[i] for i in (1, 2, 3, 4)}
+    assert theirs[2] == ("로컬에서 완료", "done")
+    assert local[4] == ("원격 새 업무", "pending")
+
+def test_push_syncs_remote_id_sequence(remote):
+    calls = []
+    manager = reconcile.get_supabase_manager(use_service_key=True)
+    manager.sync_task_id_sequence = lambda: calls.append("sync") or True
+    report = {"requests": 0, "rejected": []}
+    rows = [{**_task(9, "ID 지정 업무"), "due_date": None, "last_completed_at": None, "updated_at": None}]
+    assert reconcile._push(manager, rows, report) == 1
+    assert calls == ["sync"]
+
+def test_unchanged_stores_need_no_row_requests(remote):
+    rows = [_task(i, f"업무{i}") for i in range(1, 40)]
+    _insert_local(rows)
+    seed(remote, "tasks", rows)
+    report = reconcile.reconcile(dry_run=True)
+    assert report["ranges"] == 0
+    assert report["requests"] == 2   # 최대 ID + 최상위 구간 해시
@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+
+import leader
+import scheduler
+from db import get_conn, recent_scheduler_runs
+from jobs import JobCancelled
+from mailer import DigestFailed
+
+# run_job 이 문자열 참조로 부르는 작업 함수들
+calls = []
+
+def send_ok(job):
+    calls.append("ok")
+    job.set_progress(2, 2)
+    return {"recipients": 2, "sent": 2, "failed": 0}
+
+def send_none(job):
+    return {"recipients": 0, "sent": 0, "failed": 0}
+
+def send_fails(job):
+    raise DigestFailed("메일을 한 통도 보내지 못함")
+
+def send_cancelled(job):
+    scheduler.cancel_running()
+    job.check_cancelled()
+
+@pytest.fixture(autouse=True)
+def sqlite_leases(workdir, monkeypatch):
+    monkeypatch.setattr(leader, "LEADER_BACKEND", "sqlite")
+    calls.clear()
+
+def _runs():
+    with get_conn() as conn:
+        return [r["outcome"] for r in recent_scheduler_runs(conn)]
+
+def _claims():
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM daily_runs").fetchone()[0]
+
+def test_same_day_runs_once():
+    assert scheduler.run_job("daily", "test_scheduler:send_ok")["sent"] == 2
+    # 다른 인스턴스(다른 HOLDER)가 같은 날 다시 실행하려 하면 건너뜀
+    with get_conn() as conn:
+        conn.execute("UPDATE daily_runs SET holder = 'other-instance'")
+    assert scheduler.run_job("daily", "test_scheduler:send_ok") is None
+    assert calls == ["ok"]
+    assert _runs() == ["skipped", "success"]
+
+def test_failed_run_releases_claim_for_retry():
+    with pytest.raises(DigestFailed):
+        scheduler.run_job("daily", "test_scheduler:send_fails")
+    assert _claims() == 0
+    scheduler.run_job("daily", "test_scheduler:send_ok")
+    assert _runs() == ["success", "failed"]
+
+def test_cancelled_run_releases_claim():
+    with pytest.raises(JobCancelled):
+        scheduler.run_job("daily", "test_scheduler:send_cancelled")
+    assert _claims() == 0
+    assert _runs() == ["cancelled"]
+
+def test_outcome_from_digest_counts():
+    assert scheduler._outcome({"recipients": 0, "sent": 0, "failed": 0}) == "noop"
+    assert scheduler._outcome({"recipients": 3, "sent": 2, "failed": 1}) == "partial"
+    assert scheduler._outcome({"recipients": 3, "sent": 3, "failed": 0}) == "success"
+    scheduler.run_job("daily", "test_scheduler:send_none")
+    assert _runs() == ["noop"]
+
+def test_run_now_rejects_unknown_job():
+    with pytest.raises(ValueError):
+        scheduler.run_now("no_such_job")
+
+def test_jobstore_keeps_next_run_time_across_restarts(monkeypatch):
+    monkeypatch.setattr(scheduler, "SCHEDULED_JOBS", [("daily", "test_scheduler:send_ok", {"hour": 9, "minute": 0})])
+    sched = scheduler.start_scheduler()
+    first = sched.get_job("daily").next_run_time
+    sched.shutdown(wait=False)
+
+    sched = scheduler.start_scheduler()
+    try:
+        assert sched.get_job("daily").next_run_time == first
+    finally:
+        sched.shutdown(wait=False)
+    conn = sqlite3.connect("reminder.db")
+    assert conn.execute("SELECT COUNT(*) FROM apscheduler_jobs").fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,79 @@
+import threading
+from datetime import timedelta
+
+import pytest
+
+import supabase_client
+from fake_supabase import APIError, seed
+from local_postgrest import PostgrestError
+from supabase_client import SupabaseManager
+
+def test_client_is_created_once_per_role(monkeypatch):
+    created = []
+    monkeypatch.setenv("SUPABASE_URL", "http://local")
+    monkeypatch.setenv("SUPABASE_KEY", "anon.key")
+    monkeypatch.setattr(supabase_client, "_clients", {})
+    monkeypatch.setattr(supabase_client, "_create_client", lambda key: created.append(key) or object())
+
+    threads = [threading.Thread(target=supabase_client.get_client) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert created == ["anon.key"]
+    assert supabase_client.get_client() is supabase_client.get_client("anon")
+
+def test_iter_users_pages_past_row_limit(remote):
+    seed(remote, "users", [{"email": f"user{i}@example.com", "name": f"U{i}"} for i in range(7)])
+    manager = SupabaseManager()
+    emails = [u["email"] for u in manager.iter_users(columns="email", page_size=3)]
+    assert emails == sorted(f"user{i}@example.com" for i in range(7))
+    assert remote.request_count == 3
+
+def test_active_tasks_for_emails_filters_due_tasks_in_one_query(remote):
+    manager = SupabaseManager()
+    now = manager.kst_now()
+    seed(remote, "users", [{"email": "kim@example.com", "name": "Kim"}, {"email": "lee@example.com", "name": "Lee"}])
+    seed(remote, "tasks", [
+        {"title": "일일 미완료", "assignee_email": "kim@example.com", "frequency": "daily"},
+        {"title": "오늘 완료", "assignee_email": "kim@example.com", "frequency": "daily",
+         "last_completed_at": now.isoformat()},
+        {"title": "지난달 완료", "assignee_email": "lee@example.com", "frequency": "monthly",
+         "last_completed_at": (manager.cycle_start("monthly", now) - timedelta(days=1)).isoformat()},
+    ])
+    result = manager.active_tasks_for_emails(["kim@example.com", "lee@example.com", "park@example.com"])
+    assert [t["title"] for t in result["kim@example.com"]] == ["일일 미완료"]
+    assert [t["title"] for t in result["lee@example.com"]] == ["지난달 완료"]
+    assert result["park@example.com"] == []
+    assert remote.request_count == 1
+
+def test_complete_tasks_uses_rpc(remote):
+    seed(remote, "users", [{"email": "kim@example.com", "name": "Kim"}])
+    seed(remote, "tasks", [
+        {"id": 1, "title": "A", "assignee_email": "kim@example.com", "frequency": "daily", "hmac_token": "tok-a"},
+        {"id": 2, "title": "B", "assignee_email": "kim@example.com", "frequency": "daily"},
+    ])
+    completed = SupabaseManager().complete_tasks(tokens=["tok-a"], task_ids=[2])
+    assert sorted(t["id"] for t in completed) == [1, 2]
+    with remote.connect() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM completion_logs").fetchone()[0] == 2
+
+def _failing_rpc(code, message):
+    def rpc(name, body):
+        raise PostgrestError(message, status=404 if code == "PGRST202" else 500, code=code)
+    return rpc
+
+def test_complete_tasks_falls_back_only_when_rpc_is_missing(remote, monkeypatch):
+    manager = SupabaseManager()
+    fallback = []
+    monkeypatch.setattr(manager, "_complete_tasks_by_table",
+                        lambda ids, tokens, method, notes: fallback.append(ids) or [{"id": i} for i in ids])
+
+    monkeypatch.setattr(remote, "rpc", _failing_rpc("PGRST202", "함수 없음"))
+    assert manager.complete_tasks(task_ids=[5]) == [{"id": 5}]
+
+    # 시간 초과/서버 오류는 RPC 가 이미 반영했을 수 있으므로 다시 하지 않음
+    monkeypatch.setattr(remote, "rpc", _failing_rpc("57014", "canceling statement due to statement timeout"))
+    with pytest.raises(APIError):
+        manager.complete_tasks(task_ids=[6])
+    assert fallback == [[5]]
@@ -0,0 +1,27 @@
+import time
+
+from token_cache import TokenCache, COMPLETED, INVALID
+
+def test_completed_and_invalid_entries():
+    cache = TokenCache(maxsize=10, invalid_ttl=60)
+    cache.mark_completed("done-token", "daily")
+    cache.mark_invalid("bad-token")
+    assert cache.get("done-token") == COMPLETED
+    assert cache.get("bad-token") == INVALID
+    assert cache.get("unknown") is None
+
+def test_invalid_entries_expire():
+    cache = TokenCache(invalid_ttl=0.01)
+    cache.mark_invalid("bad-token")
+    time.sleep(0.02)
+    assert cache.get("bad-token") is None
+    assert len(cache) == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TokenCache(maxsize=2)
+    cache.mark_completed("a", "daily")
+    cache.mark_completed("b", "daily")
+    cache.get("a")
+    cache.mark_completed("c", "daily")
+    assert cache.get("b") is None
+    assert cache.get("a") == COMPLETED
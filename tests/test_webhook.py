@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import static_assets
+import webhook
+from db import get_conn, kst_now, record_scheduler_run, set_state
+from mailer import make_batch_token, make_task_token, row_key
+from token_cache import token_cache, COMPLETED, INVALID
+
+@pytest.fixture
+def client(workdir):
+    token_cache.clear()
+    with TestClient(webhook.app) as client:
+        yield client
+    token_cache.clear()
+    static_assets.load()
+
+def _status(task_id):
+    with get_conn() as conn:
+        return conn.execute("SELECT status FROM tasks WHERE id = ?", (task_id,)).fetchone()[0]
+
+def test_probes(client):
+    assert client.get("/livez").json() == {"status": "ok"}
+    with get_conn() as conn:
+        set_state(conn, "last_digest_at", "2026-10-19T09:00:00+09:00")
+    ready = client.get("/readyz").json()
+    assert ready["status"] == "ready"
+    assert ready["last_digest_at"] == "2026-10-19T09:00:00+09:00"
+
+def test_signed_link_completes_task_by_row_key_and_is_cached(client, add_task):
+    add_task("다른 업무", hmac_token="zzzzzzzzzzzzzzzz")
+    task_id = add_task("보고서", hmac_token="abcdefghijklmnop")
+    # Supabase 쪽 ID(999)로 만든 링크도 행 키로 같은 업무를 찾음
+    token = make_task_token(999, "daily", key=row_key("abcdefghijklmnop"))
+    response = client.get("/complete", params={"token": token}, follow_redirects=False)
+    assert response.status_code == 303
+    assert _status(task_id) == "done"
+    assert token_cache.get(token) == COMPLETED
+
+    bad = token[:-3] + "xyz"
+    assert client.get("/complete", params={"token": bad}).status_code == 400
+    assert token_cache.get(bad) == INVALID
+
+def test_batch_link_caches_only_when_every_task_completed(client, add_task):
+    first = add_task("A", hmac_token="aaaaaaaaaaaaaaaa")
+    second = add_task("B", frequency="weekly", hmac_token="bbbbbbbbbbbbbbbb")
+    expires = kst_now() + timedelta(hours=1)
+    token = make_batch_token([first, second], expires, {first: "aaaaaaaaaaaa", second: "bbbbbbbbbbbb"})
+    assert client.get("/complete-batch", params={"t": token}, follow_redirects=False).status_code == 303
+    assert (_status(first), _status(second)) == ("done", "done")
+    assert token_cache.get(token) == COMPLETED
+
+    third = add_task("C", hmac_token="cccccccccccccccc")
+    with get_conn() as conn:
+        conn.execute("UPDATE tasks SET status = 'pending' WHERE id = ?", (first,))
+    partial = make_batch_token([first, second, third], expires)
+    client.get("/complete-batch", params={"t": partial}, follow_redirects=False)
+    assert (_status(first), _status(third)) == ("done", "done")
+    # 이미 완료된 업무가 섞여 있으면 캐시하지 않음 (다음 주기에 다시 쓸 수 있도록)
+    assert token_cache.get(partial) is None
+
+def test_static_assets_are_fingerprinted_and_precompressed(client, workdir):
+    (workdir / "static").mkdir()
+    (workdir / "static" / "app.css").write_text("body { color: #333; }\n" * 200, encoding="utf-8")
+    static_assets.load()
+    url = static_assets.asset_url("app.css")
+    assert url.startswith("/static/app.") and url.endswith(".css")
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == static_assets.CACHE_CONTROL
+    assert response.text.startswith("body {")
+    etag = response.headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/static/app.0000000000.css").status_code == 404
+
+def test_large_json_responses_are_gzipped(client, add_task):
+    for i in range(30):
+        add_task(f"업무 {i}")
+    response = client.get("/api/tasks", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["count"] == 30
+    assert client.get("/livez", headers={"Accept-Encoding": "gzip"}).headers.get("content-encoding") is None
+
+def test_metrics_record_route_latency(client):
+    client.get("/livez")
+    text = client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/livez",status="200"}' in text
+    assert "sqlite_query_duration_seconds_bucket" in text
+
+def test_stats_and_scheduler_runs_api(client, add_task):
+    add_task("A")
+    add_task("B", status="done")
+    with get_conn() as conn:
+        record_scheduler_run(conn, "daily_all_cycles", "missed")
+    stats = client.get("/api/stats").json()["data"]
+    assert (stats["total_tasks"], stats["completed_tasks"], stats["pending_tasks"]) == (2, 1, 1)
+    runs = client.get("/api/scheduler/runs").json()
+    assert [r["outcome"] for r in runs["data"]] == ["missed"]
+
+def test_unknown_job_kind(client):
+    assert client.post("/api/jobs/nope").status_code == 404
+
+def test_import_does_not_load_heavy_packages(workdir):
+    code = "import sys, webhook; print(sorted(m for m in ('supabase', 'pandas') if m in sys.modules))"
+    env = {**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parent.parent)}
+    out = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
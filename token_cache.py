@@ -0,0 +1,71 @@
+# token_cache.py - 최근 완료/무효 토큰 캐시
+# 메일 보안 스캐너의 링크 사전 조회나 더블 클릭으로 같은 /complete?token=... 이
+# 여러 번 들어오므로, 직전에 처리한 결과를 메모리에서 바로 돌려준다.
+import threading
+import time
+from collections import OrderedDict
+from db import kst_now, next_cycle_start
+from metrics import Counter
+
+COMPLETED = "completed"
+INVALID = "invalid"
+
+token_cache_lookups = Counter(
+    "token_cache_lookups_total", "완료 토큰 캐시 조회 결과", ("result",))
+
+class TokenCache:
+    """TTL 이 있는 LRU 캐시 (토큰 -> COMPLETED / INVALID)
+
+    완료된 토큰은 해당 업무 주기가 바뀌는 시점(next_cycle_start)까지만 유효하고,
+    무효 토큰은 invalid_ttl 초 또는 다음 날짜 전환 중 빠른 시점까지만 유효하다."""
+
+    def __init__(self, maxsize: int = 4096, invalid_ttl: float = 60):
+        self.maxsize = maxsize
+        self.invalid_ttl = invalid_ttl
+        self._entries = OrderedDict()   # token -> (state, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                token_cache_lookups.inc(result="miss")
+                return None
+            state, expires_at = entry
+            if expires_at <= now:
+                del self._entries[token]
+                token_cache_lookups.inc(result="expired")
+                return None
+            self._entries.move_to_end(token)
+        token_cache_lookups.inc(result=state)
+        return state
+
+    def _put(self, token: str, state: str, expires_at: float):
+        with self._lock:
+            self._entries[token] = (state, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def mark_completed(self, token: str, frequency: str):
+        rollover = next_cycle_start(frequency, kst_now()).timestamp()
+        self._put(token, COMPLETED, rollover)
+
+    def mark_invalid(self, token: str):
+        rollover = next_cycle_start("daily", kst_now()).timestamp()
+        self._put(token, INVALID, min(time.time() + self.invalid_ttl, rollover))
+
+    def discard(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+# 웹훅 프로세스 공용 인스턴스
+token_cache = TokenCache()
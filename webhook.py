@@ -1,6 +1,10 @@
 # webhook.py - Supabase 버전
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI, Form, Request
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from typing import List, Optional
 import yaml
 from urllib.parse import urlparse
@@ -9,6 +13,16 @@ import os
 import logging
 import sqlite3
 from contextlib import contextmanager
+from functools import lru_cache
+from db import get_task_stats, get_state, find_task, find_task_by_id, ensure_stats_schema, recent_scheduler_runs, kst_now, next_cycle_start
+import static_assets
+from static_assets import asset_url, get_asset, CACHE_CONTROL
+import metrics
+from metrics import TimedConnection
+from token_cache import token_cache, COMPLETED, INVALID
+from mailer import verify_batch_token, verify_task_token, is_signed_token, _load_keys
+from jobs import job_runner, JobQueueFull
+from supabase_client import is_configured as supabase_configured, supabase_breaker
 
 # 로컬 SQLite 우선 사용을 위한 설정
 USE_SQLITE_FIRST = True
@@ -16,7 +30,7 @@ USE_SQLITE_FIRST = True
 @contextmanager
 def get_sqlite_conn():
     """SQLite 연결 관리"""
-    conn = sqlite3.connect("reminder.db", check_same_thread=False)
+    conn = sqlite3.connect("reminder.db", check_same_thread=False, factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
@@ -24,14 +38,38 @@ def get_sqlite_conn():
     finally:
         conn.close()
 
-# Supabase는 선택적으로만 사용
-try:
-    from supabase_client import SupabaseManager
-    supabase_manager = SupabaseManager()
-    print("Supabase 연결 성공")
-except Exception as e:
-    print(f"Supabase 연결 실패, SQLite 모드로 실행: {e}")
-    supabase_manager = None
+# Supabase는 선택적으로만 사용 - 처음 필요할 때 연결 (실패 시 SQLite 모드)
+_supabase = {"manager": None, "tried": False}
+
+def get_supabase():
+    # 회로가 열려 있으면(최근 연속 실패) Supabase 를 건너뛰고 SQLite 로 처리
+    if supabase_breaker.is_open:
+        return None
+    if not _supabase["tried"]:
+        _supabase["tried"] = True
+        try:
+            from supabase_client import get_supabase_manager
+            _supabase["manager"] = get_supabase_manager()
+            print("Supabase 연결 성공")
+        except Exception as e:
+            print(f"Supabase 연결 실패, SQLite 모드로 실행: {e}")
+    return _supabase["manager"]
+
+# 예약 작업(매일 메일 발송)을 웹훅 안에서 실행 - 인스턴스가 여러 개여도 임대를 잡은 리더 하나만 실행
+EMBEDDED_SCHEDULER = os.getenv("EMBEDDED_SCHEDULER", "").lower() in ("1", "true", "yes")
+_embedded = {"elector": None, "scheduler": None}
+
+def _start_embedded_scheduler():
+    from scheduler import start_scheduler
+    _embedded["scheduler"] = start_scheduler()
+
+def _stop_embedded_scheduler():
+    sched, _embedded["scheduler"] = _embedded["scheduler"], None
+    if sched is not None:
+        # shutdown(wait=False) 는 이미 도는 작업을 멈추지 않으므로 발송 중인 메일 작업에 먼저 취소 요청
+        from scheduler import cancel_running
+        cancel_running()
+        sched.shutdown(wait=False)
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -39,34 +77,198 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="해야할일 관리 시스템", version="2.0.0")
 
+# 대시보드 HTML, /api/tasks JSON 등 동적 응답 압축 (작은 응답은 그대로)
+GZIP_MINIMUM_SIZE = 1024
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """라우트별 응답 시간 기록 (라벨은 경로 템플릿 기준)"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.http_request_duration.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status)
+        )
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus 수집용 메트릭"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# 시작 시 설정/DB/정적 파일을 미리 준비 (첫 요청 지연 제거) - 단계별 소요 시간은 /status 에 표시
+startup_report = {}
+
+@app.on_event("startup")
+def warm_up():
+    started = time.perf_counter()
+    steps = {"import_ms": round((started - _IMPORT_STARTED) * 1000, 1)}
+
+    t = time.perf_counter()
+    _cfg()
+    _load_keys()
+    steps["config_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    t = time.perf_counter()
+    try:
+        with get_sqlite_conn() as conn:
+            ensure_stats_schema(conn)
+            conn.execute("SELECT 1").fetchone()
+    except Exception as e:
+        logger.error(f"SQLite 준비 실패: {e}")
+    steps["database_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    t = time.perf_counter()
+    static_assets.load()
+    steps["templates_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    # SQLite 우선 모드가 아니면 Supabase 클라이언트도 미리 생성
+    if not USE_SQLITE_FIRST and supabase_configured():
+        t = time.perf_counter()
+        get_supabase()
+        steps["supabase_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    if EMBEDDED_SCHEDULER:
+        from leader import LeaderElector
+        _embedded["elector"] = LeaderElector(on_elected=_start_embedded_scheduler,
+                                             on_revoked=_stop_embedded_scheduler).start()
+
+    steps["total_ms"] = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
+    startup_report.update(steps)
+    logger.info(f"🚀 시작 준비 완료: {startup_report}")
+
+@app.on_event("shutdown")
+def stop_embedded_scheduler():
+    # 임대를 반납해 다른 인스턴스가 TTL 을 기다리지 않고 넘겨받게 함
+    if _embedded["elector"] is not None:
+        _embedded["elector"].stop()
+
 # favicon.ico 404 오류 방지
 @app.get("/favicon.ico")
 def favicon():
-    from fastapi.responses import Response
     return Response(status_code=204)
 
+@app.get("/static/{path:path}")
+def static_file(path: str, request: Request):
+    """지문 파일명 정적 파일 - 장기 캐시 + 사전 압축된 gzip 버전 제공"""
+    asset = get_asset(path)
+    if asset is None:
+        return Response(status_code=404)
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": asset.etag, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == asset.etag:
+        return Response(status_code=304, headers=headers)
+    if asset.gz is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(asset.gz, media_type=asset.media_type, headers=headers)
+    return Response(asset.body, media_type=asset.media_type, headers=headers)
+
 # 헬스체크 엔드포인트
+# Railway/Render 프로브가 자주 호출하므로 DB 부하가 없도록 단계별로 분리
+# - /livez   : 프로세스 생존 여부 (DB 접근 없음)
+# - /readyz  : DB 접근 가능 여부 + 마지막 발송/동기화 시각
+# - /status  : 사람용 상세 상태 (STATUS_CACHE_SECONDS 동안 캐시)
+STATUS_CACHE_SECONDS = 10
+_status_cache = {"at": 0.0, "data": None}
+
+@app.get("/livez")
+def livez():
+    """프로세스 생존 확인 - 상수 시간"""
+    return {"status": "ok"}
+
+# GitHub Actions 로 발송하면 마지막 발송 시각은 Supabase system_settings 에만 남는다
+# 프로브마다 원격 요청을 하지 않도록 REMOTE_STATE_SECONDS 동안 캐시
+REMOTE_STATE_SECONDS = 60
+_remote_state = {"at": 0.0, "data": {}}
+
+def _remote_states() -> dict:
+    now = time.monotonic()
+    if now - _remote_state["at"] < REMOTE_STATE_SECONDS or not supabase_configured() or supabase_breaker.is_open:
+        return _remote_state["data"]
+    _remote_state["at"] = now
+    try:
+        from supabase_client import get_supabase_manager
+        _remote_state["data"] = get_supabase_manager().get_settings(("last_digest_at", "last_sync_at"))
+    except Exception as e:
+        logger.warning(f"원격 상태 조회 실패: {e}")
+    return _remote_state["data"]
+
+def _latest(local, remote):
+    """두 ISO 시각 중 늦은 것 (시간대 포함 문자열 비교를 피하려고 파싱)"""
+    values = [v for v in (local, remote) if v]
+    if len(values) < 2:
+        return values[0] if values else None
+    try:
+        return max(values, key=lambda v: datetime.fromisoformat(v.replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return local
+
+@app.get("/readyz")
+def readyz():
+    """요청 처리 준비 여부 - 가벼운 쿼리로 DB 접근 확인"""
+    try:
+        with get_sqlite_conn() as conn:
+            conn.execute("SELECT 1").fetchone()
+            last_digest_at = get_state(conn, "last_digest_at")
+            last_sync_at = get_state(conn, "last_sync_at")
+        remote = _remote_states()
+        last_digest_at = _latest(last_digest_at, remote.get("last_digest_at"))
+        last_sync_at = _latest(last_sync_at, remote.get("last_sync_at"))
+        return {
+            "status": "ready",
+            "database": "sqlite_connected",
+            "last_digest_at": last_digest_at,
+            "last_sync_at": last_sync_at
+        }
+    except Exception as e:
+        logger.error(f"Readiness check failed: {e}")
+        return JSONResponse({"status": "unavailable", "message": str(e)}, status_code=503)
+
 @app.get("/")
 @app.get("/health")
+@app.get("/status")
 def health_check():
-    """서버 상태 확인 - SQLite 우선"""
+    """서버 상세 상태 - SQLite 우선, 짧은 시간 캐시"""
+    now = time.monotonic()
+    if _status_cache["data"] is not None and now - _status_cache["at"] < STATUS_CACHE_SECONDS:
+        return _status_cache["data"]
     try:
         # SQLite 기본 상태 확인
         with get_sqlite_conn() as conn:
-            task_count = conn.execute("SELECT COUNT(*) as count FROM tasks").fetchone()
-            sqlite_tasks = task_count["count"] if task_count else 0
+            sqlite_tasks = get_task_stats(conn)["total_tasks"]
+            last_digest_at = get_state(conn, "last_digest_at")
+            last_sync_at = get_state(conn, "last_sync_at")
+        remote = _remote_states()
+        last_digest_at = _latest(last_digest_at, remote.get("last_digest_at"))
+        last_sync_at = _latest(last_sync_at, remote.get("last_sync_at"))
         
-        return {
+        data = {
             "status": "ok", 
             "database": "sqlite_connected",
+            "supabase": "configured" if supabase_configured() else "disabled",
+            "supabase_circuit": supabase_breaker.state,
+            "scheduler_leader": _embedded["elector"].to_dict() if _embedded["elector"] else None,
+            "startup": startup_report,
             "total_tasks": sqlite_tasks,
+            "last_digest_at": last_digest_at,
+            "last_sync_at": last_sync_at,
             "message": "웹훅 서버가 정상 실행 중입니다",
             "timestamp": datetime.now().isoformat()
         }
+        _status_cache.update(at=now, data=data)
+        return data
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return {"status": "error", "message": str(e), "timestamp": datetime.now().isoformat()}
 
+@lru_cache(maxsize=1)
 def _cfg():
     try:
         with open("config.yaml", "r", encoding="utf-8") as f:
@@ -87,17 +289,12 @@ def generate_sqlite_dashboard():
     """SQLite 데이터로 대시보드 HTML 생성"""
     try:
         with get_sqlite_conn() as conn:
-            # 기본 통계
-            total_tasks = conn.execute("SELECT COUNT(*) as count FROM tasks").fetchone()["count"]
-            completed_tasks = conn.execute("SELECT COUNT(*) as count FROM tasks WHERE status = 'done'").fetchone()["count"]
-            pending_tasks = conn.execute("SELECT COUNT(*) as count FROM tasks WHERE status = 'pending'").fetchone()["count"]
-            
-            # 오늘 완료된 업무 (예시로 최근 24시간)
-            today_completed = conn.execute("""
-                SELECT COUNT(*) as count FROM tasks 
-                WHERE status = 'done' AND 
-                datetime(last_completed_at) > datetime('now', '-1 day')
-            """).fetchone()["count"]
+            # 기본 통계 (트리거로 유지되는 카운터 테이블)
+            stats = get_task_stats(conn)
+            total_tasks = stats['total_tasks']
+            completed_tasks = stats['completed_tasks']
+            pending_tasks = stats['pending_tasks']
+            today_completed = stats['today_completed']
             
             # 업무 목록 조회
             all_tasks = conn.execute("""
@@ -123,29 +320,7 @@ def generate_sqlite_dashboard():
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>📋 해야할일 관리 대시보드 (SQLite)</title>
-    <style>
-        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; margin: 0; padding: 20px; background: #f5f7fa; }}
-        .container {{ max-width: 1200px; margin: 0 auto; }}
-        .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 10px; margin-bottom: 30px; text-align: center; }}
-        .stats-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 20px; margin-bottom: 30px; }}
-        .stat-card {{ background: white; padding: 25px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); text-align: center; }}
-        .stat-number {{ font-size: 2.5em; font-weight: bold; margin-bottom: 10px; }}
-        .stat-label {{ color: #666; font-size: 1.1em; }}
-        .section {{ background: white; padding: 25px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); margin-bottom: 20px; }}
-        .section h2 {{ margin-top: 0; color: #333; border-bottom: 3px solid #667eea; padding-bottom: 10px; }}
-        .task-list {{ list-style: none; padding: 0; }}
-        .task-item {{ padding: 15px; border: 1px solid #e1e5e9; border-radius: 8px; margin-bottom: 10px; display: flex; justify-content: space-between; align-items: center; }}
-        .task-item.daily {{ border-left: 5px solid #28a745; }}
-        .task-item.weekly {{ border-left: 5px solid #ffc107; }}
-        .task-item.monthly {{ border-left: 5px solid #dc3545; }}
-        .task-title {{ font-weight: 600; flex-grow: 1; }}
-        .task-meta {{ font-size: 0.9em; color: #666; margin-left: 10px; }}
-        .completion-log {{ background: #f8f9fa; padding: 10px; border-radius: 5px; margin-bottom: 10px; border-left: 4px solid #28a745; }}
-        .timestamp {{ color: #666; font-size: 0.9em; }}
-        .refresh-btn {{ background: #667eea; color: white; padding: 10px 20px; border: none; border-radius: 5px; cursor: pointer; }}
-        .api-links {{ margin-top: 20px; text-align: center; }}
-        .api-links a {{ color: #667eea; text-decoration: none; margin: 0 10px; }}
-    </style>
+    <link rel="stylesheet" href="{asset_url('dashboard.css')}">
     <script>
         function refreshDashboard() {{ location.reload(); }}
         setInterval(refreshDashboard, 30000); // 30초마다 자동 새로고침
@@ -174,7 +349,7 @@ def generate_sqlite_dashboard():
             </div>
             <div class="stat-card">
                 <div class="stat-number" style="color: #dc3545;">{today_completed}</div>
-                <div class="stat-label">최근 24시간 완료</div>
+                <div class="stat-label">오늘 완료</div>
             </div>
         </div>
 
@@ -237,7 +412,7 @@ def generate_supabase_dashboard(stats, all_tasks, recent_completions):
     weekly_tasks = [t for t in pending_tasks if t['frequency'] == 'weekly']
     monthly_tasks = [t for t in pending_tasks if t['frequency'] == 'monthly']
     
-    current_time = supabase_manager.kst_now().strftime("%Y-%m-%d %H:%M:%S KST")
+    current_time = get_supabase().kst_now().strftime("%Y-%m-%d %H:%M:%S KST")
     
     return f"""
     <!DOCTYPE html>
@@ -246,29 +421,7 @@ def generate_supabase_dashboard(stats, all_tasks, recent_completions):
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>📋 해야할일 관리 대시보드 (Supabase)</title>
-        <style>
-            body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; margin: 0; padding: 20px; background: #f5f7fa; }}
-            .container {{ max-width: 1200px; margin: 0 auto; }}
-            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 10px; margin-bottom: 30px; text-align: center; }}
-            .stats-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 20px; margin-bottom: 30px; }}
-            .stat-card {{ background: white; padding: 25px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); text-align: center; }}
-            .stat-number {{ font-size: 2.5em; font-weight: bold; margin-bottom: 10px; }}
-            .stat-label {{ color: #666; font-size: 1.1em; }}
-            .section {{ background: white; padding: 25px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); margin-bottom: 20px; }}
-            .section h2 {{ margin-top: 0; color: #333; border-bottom: 3px solid #667eea; padding-bottom: 10px; }}
-            .task-list {{ list-style: none; padding: 0; }}
-            .task-item {{ padding: 15px; border: 1px solid #e1e5e9; border-radius: 8px; margin-bottom: 10px; display: flex; justify-content: between; align-items: center; }}
-            .task-item.daily {{ border-left: 5px solid #28a745; }}
-            .task-item.weekly {{ border-left: 5px solid #ffc107; }}
-            .task-item.monthly {{ border-left: 5px solid #dc3545; }}
-            .task-title {{ font-weight: 600; flex-grow: 1; }}
-            .task-meta {{ font-size: 0.9em; color: #666; margin-left: 10px; }}
-            .completion-log {{ background: #f8f9fa; padding: 10px; border-radius: 5px; margin-bottom: 10px; border-left: 4px solid #28a745; }}
-            .timestamp {{ color: #666; font-size: 0.9em; }}
-            .refresh-btn {{ background: #667eea; color: white; padding: 10px 20px; border: none; border-radius: 5px; cursor: pointer; }}
-            .api-links {{ margin-top: 20px; text-align: center; }}
-            .api-links a {{ color: #667eea; text-decoration: none; margin: 0 10px; }}
-        </style>
+        <link rel="stylesheet" href="{asset_url('dashboard.css')}">
         <script>
             function refreshDashboard() {{ location.reload(); }}
             setInterval(refreshDashboard, 30000); // 30초마다 자동 새로고침
@@ -339,43 +492,45 @@ def generate_supabase_dashboard(stats, all_tasks, recent_completions):
     </html>
     """
 
-@app.get("/health")
-def health():
-    """서버 상태 확인 - 별도 엔드포인트"""
-    return health_check()
+INVALID_TOKEN_HTML = """
+    <html><body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+        <h2>⚠️ 처리할 수 없습니다</h2>
+        <p>이미 완료되었거나 토큰이 유효하지 않습니다.</p>
+        <p><a href="/dashboard" style="color: #007bff;">📊 대시보드 보기</a></p>
+    </body></html>
+"""
 
 @app.get("/complete")
 def complete_task(token: str, next: Optional[str] = None, request: Request = None):
     """이메일에서 업무 완료 처리 - SQLite 우선"""
+    # 링크 사전 조회/더블 클릭으로 반복된 요청은 DB 접근 없이 응답
+    cached = token_cache.get(token)
+    if cached == COMPLETED:
+        return RedirectResponse(url="/dashboard", status_code=303)
+    if cached == INVALID:
+        return HTMLResponse(INVALID_TOKEN_HTML, status_code=400)
     try:
         # SQLite로 업무 완료 처리
         with get_sqlite_conn() as conn:
             # 토큰으로 업무 찾기
-            task = conn.execute(
-                "SELECT * FROM tasks WHERE hmac_token = ? AND status = 'pending'", 
-                (token,)
-            ).fetchone()
+            task = find_task(conn, token, pending_only=True)
             
             if task:
-                # 업무 완료 처리
-                now = datetime.now().isoformat()
+                # 업무 완료 처리 (다른 경로/Supabase 와 같은 KST ISO 형식)
+                now = kst_now().isoformat()
                 conn.execute(
-                    "UPDATE tasks SET status = 'done', last_completed_at = ? WHERE id = ?",
-                    (now, task['id'])
+                    "UPDATE tasks SET status = 'done', last_completed_at = ?, updated_at = ? WHERE id = ?",
+                    (now, now, task['id'])
                 )
                 logger.info(f"✅ 업무 완료: {task['title']} (ID: {task['id']})")
+                token_cache.mark_completed(token, task['frequency'])
                 
                 # 대시보드로 리다이렉트
                 return RedirectResponse(url="/dashboard", status_code=303)
             else:
                 logger.warning(f"⚠️ 업무 완료 실패: 토큰 {token}")
-                return HTMLResponse(f"""
-                    <html><body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-                        <h2>⚠️ 처리할 수 없습니다</h2>
-                        <p>이미 완료되었거나 토큰이 유효하지 않습니다.</p>
-                        <p><a href="/dashboard" style="color: #007bff;">📊 대시보드 보기</a></p>
-                    </body></html>
-                """, status_code=400)
+                token_cache.mark_invalid(token)
+                return HTMLResponse(INVALID_TOKEN_HTML, status_code=400)
             
     except Exception as e:
         logger.error(f"❌ 업무 완료 처리 오류: {e}")
@@ -413,25 +568,30 @@ async def complete_tasks_get(request: Request):
     if tokens:
         completed, failed = 0, 0
         for token in tokens:
+            cached = token_cache.get(token)
+            if cached is not None:
+                completed += cached == COMPLETED
+                failed += cached == INVALID
+                continue
             try:
                 with get_sqlite_conn() as conn:
-                    task = conn.execute(
-                        "SELECT * FROM tasks WHERE hmac_token = ? AND status = 'pending'",
-                        (token,)
-                    ).fetchone()
+                    task = find_task(conn, token, pending_only=True)
                     if task:
+                        now = kst_now().isoformat()
                         conn.execute(
                             """
                             UPDATE tasks
                             SET status = 'done',
-                                last_completed_at = datetime('now', 'localtime'),
-                                updated_at = datetime('now', 'localtime')
+                                last_completed_at = ?,
+                                updated_at = ?
                             WHERE id = ?
                             """,
-                            (task['id'],)
+                            (now, now, task['id'])
                         )
+                        token_cache.mark_completed(token, task['frequency'])
                         completed += 1
                     else:
+                        token_cache.mark_invalid(token)
                         failed += 1
             except Exception as e:
                 logger.error(f"❌ GET 다중 완료 처리 오류 (토큰 {token}): {e}")
@@ -495,27 +655,61 @@ async def complete_tasks_get(request: Request):
     """
     return HTMLResponse(html_content)
 
+@app.get("/complete-batch")
+def complete_batch(t: str):
+    """일괄 완료 토큰 하나로 여러 업무를 한 트랜잭션에서 완료"""
+    cached = token_cache.get(t)
+    if cached == COMPLETED:
+        return RedirectResponse(url="/dashboard", status_code=303)
+    entries = verify_batch_token(t) if cached is None else None
+    if not entries:
+        token_cache.mark_invalid(t)
+        return HTMLResponse(INVALID_TOKEN_HTML, status_code=400)
+    try:
+        now = kst_now().isoformat()
+        with get_sqlite_conn() as conn:
+            # 토큰의 업무 ID 는 Supabase 기준일 수 있으므로 행 키로 확인한 SQLite 업무 ID 로 갱신
+            frequencies = []   # 실제로 완료한 업무의 주기
+            for task_id, key in entries:
+                task = find_task_by_id(conn, task_id, key, pending_only=True)
+                if task is None:
+                    continue
+                cur = conn.execute(
+                    """
+                    UPDATE tasks
+                    SET status = 'done', last_completed_at = ?, updated_at = ?
+                    WHERE id = ? AND status = 'pending'
+                    """,
+                    (now, now, task["id"])
+                )
+                if cur.rowcount == 1:
+                    frequencies.append(task["frequency"])
+        completed = len(frequencies)
+        if completed == len(entries):
+            # 전부 완료했을 때만 캐시 - 주기가 가장 먼저 바뀌는 업무에 맞춰 만료
+            now_kst = kst_now()
+            token_cache.mark_completed(t, min(frequencies, key=lambda f: next_cycle_start(f, now_kst)))
+        logger.info(f"✅ 일괄 완료 처리 - 요청: {len(entries)}개, 완료: {completed}개")
+        return RedirectResponse(url="/dashboard", status_code=303)
+    except Exception as e:
+        logger.error(f"❌ 일괄 완료 처리 오류: {e}")
+        return HTMLResponse(f"""
+            <html><body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+                <h2>❌ 오류 발생</h2>
+                <p>업무 완료 처리 중 오류가 발생했습니다: {str(e)}</p>
+                <p><a href="/dashboard" style="color: #007bff;">📊 대시보드 보기</a></p>
+            </body></html>
+        """, status_code=500)
+
 @app.post("/complete-tasks")
 async def complete_multiple_tasks(request: Request):
     """이메일 폼에서 다중 업무 완료 처리 (SQLite 우선)"""
-    
-    print("🚀 /complete-tasks 엔드포인트 시작")  # 기본 print도 추가
-    logger.info("🚀 /complete-tasks 엔드포인트 진입")
-    
     try:
-        print("📝 Form 데이터 파싱 시작")
         form_data = await request.form()
         task_tokens = form_data.getlist("task")  # 체크박스에서 선택된 모든 토큰
-        
-        print(f"📋 받은 토큰 개수: {len(task_tokens)}")
-        logger.info(f"🔍 받은 Form 데이터: {dict(form_data)}")
         logger.info(f"📝 다중 업무 완료 요청: {len(task_tokens)}개 토큰")
-        for i, token in enumerate(task_tokens):
-            print(f"  토큰 {i+1}: {token[:15]}...")
-            logger.info(f"  토큰 {i+1}: {token[:15]}...")
         
         if not task_tokens:
-            print("⚠️ 선택된 토큰이 없음")
             logger.warning("⚠️ 선택된 토큰이 없음")
             return HTMLResponse("""
                 <html><body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
@@ -527,75 +721,78 @@ async def complete_multiple_tasks(request: Request):
         
         completed_tasks = []
         failed_tokens = []
+        supabase_tokens = []
+        supabase_manager = None if USE_SQLITE_FIRST else get_supabase()
+        use_sqlite = USE_SQLITE_FIRST or supabase_manager is None
         
         for token in task_tokens:
             try:
                 logger.info(f"🔍 처리 중인 토큰: {token[:10]}...")
                 
-                # SQLite 우선 처리
-                if USE_SQLITE_FIRST:
+                cached = token_cache.get(token)
+                if cached == COMPLETED:
+                    continue
+                if cached == INVALID:
+                    failed_tokens.append(token)
+                    continue
+                
+                # SQLite 우선 처리 (Supabase 를 쓸 수 없을 때도)
+                if use_sqlite:
                     with get_sqlite_conn() as conn:
-                        # 토큰으로 업무 조회 (hmac_token 컬럼 사용)
-                        task = conn.execute("""
-                            SELECT * FROM tasks 
-                            WHERE hmac_token = ? AND status = 'pending'
-                        """, (token,)).fetchone()
+                        # 토큰으로 업무 조회 (서명 토큰은 기본키 + 행 키 확인, 기존 토큰은 hmac_token)
+                        task = find_task(conn, token, pending_only=True)
                         
                         if task:
                             logger.info(f"✅ 업무 발견: {task['title']}")
                             
                             # 업무 완료 처리
+                            now = kst_now().isoformat()
                             conn.execute("""
                                 UPDATE tasks 
                                 SET status = 'done', 
-                                    last_completed_at = datetime('now', 'localtime'),
-                                    updated_at = datetime('now', 'localtime')
+                                    last_completed_at = ?,
+                                    updated_at = ?
                                 WHERE id = ?
-                            """, (task['id'],))
+                            """, (now, now, task['id']))
                             
                             completed_tasks.append(task['title'])
+                            token_cache.mark_completed(token, task['frequency'])
                             logger.info(f"✅ SQLite 완료: {task['title']}")
                         else:
                             failed_tokens.append(token)
+                            token_cache.mark_invalid(token)
                             logger.warning(f"⚠️ SQLite 완료 실패: 토큰 {token[:10]}... (업무 없음 또는 이미 완료됨)")
                 
-                # Supabase 백업 처리 (SQLite 실패 시)
-                elif supabase_manager and len(completed_tasks) == 0:
-                    task = supabase_manager.get_task_by_token(token)
-                    if task and supabase_manager.mark_task_completed_by_token(token):
-                        completed_tasks.append(task['title'])
-                        
-                        # 상세 완료 기록 저장
-                        completion_data = {
-                            'task_id': task['id'],
-                            'completed_at': supabase_manager.kst_now().isoformat(),
-                            'completion_method': 'email',
-                            'user_agent': 'unknown',
-                            'ip_address': 'unknown',
-                            'notes': f"이메일 폼을 통한 일괄 완료"
-                        }
-                        supabase_manager.supabase.table('completion_logs').insert(completion_data).execute()
-                        logger.info(f"✅ Supabase 완료: {task['title']}")
-                    else:
-                        failed_tokens.append(token)
-                        logger.warning(f"⚠️ Supabase 완료 실패: 토큰 {token}")
+                # Supabase 처리는 모아서 RPC 한 번으로
+                elif supabase_manager:
+                    supabase_tokens.append(token)
                         
             except Exception as e:
                 failed_tokens.append(token)
                 logger.error(f"❌ 토큰 처리 오류 {token}: {e}")
         
-        print(f"🎉 처리 완료: 성공 {len(completed_tasks)}개, 실패 {len(failed_tokens)}개")
-        logger.info(f"🎉 완료된 업무: {len(completed_tasks)}개, 실패: {len(failed_tokens)}개")
-        
-        # Request 객체에서 base URL 가져오기 (개별 완료와 완전히 동일한 방식)
-        base_url = str(request.base_url).rstrip("/")
-        dashboard_url = f"{base_url}/dashboard"
-        
-        print(f"🔗 Base URL: {base_url}")
-        print(f"🔗 Dashboard URL: {dashboard_url}")
-        print(f"� 대시보드로 리다이렉트 (개별 완료와 동일한 로직)")
-        logger.info(f"� 대시보드로 리다이렉트: {dashboard_url}")
+        if supabase_tokens:
+            rows = supabase_manager.complete_tasks(
+                tokens=supabase_tokens, notes="이메일 폼을 통한 일괄 완료")
+            by_id = {row['id']: row for row in rows}
+            by_token = {row['hmac_token']: row for row in rows if row.get('hmac_token')}
+            for token in supabase_tokens:
+                claims = verify_task_token(token) if is_signed_token(token) else None
+                if claims and claims['row_key']:
+                    # 행 키로 다시 찾은 업무는 토큰의 ID 와 다를 수 있음
+                    task = next((row for row in rows
+                                 if (row.get('hmac_token') or '').startswith(claims['row_key'])), None)
+                else:
+                    task = by_id.get(claims['task_id']) if claims else by_token.get(token)
+                if task:
+                    completed_tasks.append(task['title'])
+                    token_cache.mark_completed(token, task['frequency'])
+                    logger.info(f"✅ Supabase 완료: {task['title']}")
+                else:
+                    failed_tokens.append(token)
+                    logger.warning(f"⚠️ Supabase 완료 실패: 토큰 {token[:10]}...")
         
+        logger.info(f"🎉 완료된 업무: {len(completed_tasks)}개, 실패: {len(failed_tokens)}개")
         return RedirectResponse(url="/dashboard", status_code=303)
         
     except Exception as e:
@@ -638,36 +835,91 @@ async def serve_dashboard():
             </body></html>
         """, status_code=500)
 
+# ========== 백그라운드 작업 ==========
+# 오래 걸리는 작업은 jobs.job_runner 에서 실행하고 요청은 작업 ID 만 돌려준다.
+
+def _job_digest(job):
+    from digest import run_daily_digest
+    return run_daily_digest(job=job)
+
+def _job_import(job):
+    from import_from_excel import import_all_excel
+    return import_all_excel(job=job)
+
+def _job_sync(job):
+    from migrate_to_supabase import migrate_all
+    return migrate_all(job=job)
+
+def _job_reconcile(job):
+    from reconcile import reconcile
+    return reconcile(job=job)
+
+JOB_KINDS = {
+    "digest": _job_digest,
+    "import": _job_import,
+    "sync": _job_sync,
+    "reconcile": _job_reconcile,
+}
+
 @app.get("/send-test-email")
-async def send_test_email():
-    """Supabase 기반 이메일 발송 테스트"""
+def send_test_email():
+    """Supabase 기반 이메일 발송 테스트 - 백그라운드 작업으로 실행"""
     try:
-        from digest import run_daily_digest
-        
-        logger.info("📧 Supabase 기반 이메일 발송 시작...")
-        result = run_daily_digest()
+        job = job_runner.submit("digest", _job_digest)
+        logger.info(f"📧 Supabase 기반 이메일 발송 작업 등록: {job.id}")
         
         return HTMLResponse(f"""
         <html><body style="font-family: Arial, sans-serif; padding: 20px;">
             <h2>📧 Supabase 이메일 발송 테스트</h2>
-            <p>✅ 이메일 발송 완료!</p>
-            <p>📬 이메일을 확인하세요. 모든 완료 기록이 Supabase에 실시간으로 저장됩니다.</p>
+            <p>✅ 이메일 발송 작업이 시작되었습니다. (작업 ID: {job.id})</p>
+            <p>📬 진행 상황: <a href="/api/jobs/{job.id}" style="color: #007bff;">/api/jobs/{job.id}</a></p>
             <p>📊 <a href="/dashboard" style="color: #007bff;">실시간 대시보드 보기</a></p>
             <p>🔗 <a href="/api/stats" style="color: #007bff;">API 통계 보기</a></p>
         </body></html>
-        """)
+        """, status_code=202)
         
     except Exception as e:
         logger.error(f"❌ 이메일 발송 오류: {e}")
-        import traceback
-        traceback.print_exc()
         return HTMLResponse(f"""
         <html><body style="font-family: Arial, sans-serif; padding: 20px;">
             <h2>❌ 이메일 발송 실패</h2>
             <p>오류: {str(e)}</p>
             <p><a href="/dashboard" style="color: #007bff;">📊 대시보드 보기</a></p>
         </body></html>
-        """, status_code=500)
+        """, status_code=503 if isinstance(e, JobQueueFull) else 500)
+
+@app.post("/api/jobs/{kind}")
+def submit_job(kind: str):
+    """백그라운드 작업 등록 (digest / import / sync)"""
+    fn = JOB_KINDS.get(kind)
+    if fn is None:
+        return JSONResponse({"success": False, "error": f"알 수 없는 작업: {kind}"}, status_code=404)
+    try:
+        job = job_runner.submit(kind, fn)
+    except JobQueueFull as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=503)
+    return JSONResponse({"success": True, "data": job.to_dict()}, status_code=202)
+
+@app.get("/api/jobs")
+def list_jobs():
+    """작업 목록 (최근 순)"""
+    jobs = [job.to_dict() for job in job_runner.list()]
+    return {"success": True, "data": jobs, "count": len(jobs)}
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    """작업 상태 및 진행 상황"""
+    job = job_runner.get(job_id)
+    if job is None:
+        return JSONResponse({"success": False, "error": "작업을 찾을 수 없습니다."}, status_code=404)
+    return {"success": True, "data": job.to_dict()}
+
+@app.post("/api/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """작업 취소 요청 (실행 중인 작업은 다음 확인 지점에서 중단)"""
+    if not job_runner.cancel(job_id):
+        return JSONResponse({"success": False, "error": "취소할 수 없는 작업입니다."}, status_code=409)
+    return {"success": True, "data": job_runner.get(job_id).to_dict()}
 
 # ========== API 엔드포인트 ==========
 
@@ -676,22 +928,7 @@ def get_statistics():
     """업무 통계 API - SQLite 우선"""
     try:
         with get_sqlite_conn() as conn:
-            total_tasks = conn.execute("SELECT COUNT(*) as count FROM tasks").fetchone()["count"]
-            completed_tasks = conn.execute("SELECT COUNT(*) as count FROM tasks WHERE status = 'done'").fetchone()["count"]
-            pending_tasks = total_tasks - completed_tasks
-            
-            today = datetime.now().strftime('%Y-%m-%d')
-            today_completed = conn.execute(
-                "SELECT COUNT(*) as count FROM tasks WHERE DATE(last_completed_at) = ?", 
-                (today,)
-            ).fetchone()["count"]
-            
-            stats = {
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'pending_tasks': pending_tasks,
-                'today_completed': today_completed
-            }
+            stats = get_task_stats(conn)
             
         return {"success": True, "data": stats}
     except Exception as e:
@@ -720,18 +957,40 @@ def get_all_tasks():
 def get_completion_logs(limit: int = 50):
     """완료 기록 조회 API"""
     try:
-        logs = supabase_manager.get_completion_logs(limit=limit)
+        logs = get_supabase().get_completion_logs(limit=limit)
         return {"success": True, "data": logs, "count": len(logs)}
     except Exception as e:
         logger.error(f"API 완료 기록 조회 오류: {e}")
         return {"success": False, "error": str(e)}
 
+@app.get("/api/scheduler/runs")
+def get_scheduler_runs(limit: int = 50, job_id: Optional[str] = None):
+    """예약 작업 실행 기록 (소요 시간, 결과, 처리 건수, 놓친 실행)"""
+    try:
+        with get_sqlite_conn() as conn:
+            runs = recent_scheduler_runs(conn, min(max(limit, 1), 500), job_id)
+        return {"success": True, "data": runs, "count": len(runs)}
+    except Exception as e:
+        logger.error(f"API 스케줄러 기록 조회 오류: {e}")
+        return {"success": False, "error": str(e)}
+
+@app.get("/api/export/{table}")
+def export_table(table: str, format: str = "csv", since: Optional[str] = None):
+    """users/tasks/completion_logs 를 CSV 또는 JSON Lines 로 스트리밍 내보내기"""
+    from bulk_io import TABLES, FORMATS, iter_export
+    if table not in TABLES or format not in FORMATS:
+        return JSONResponse({"success": False, "error": f"테이블({', '.join(TABLES)})과 형식({', '.join(FORMATS)})을 확인하세요."},
+                            status_code=400)
+    filename = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(iter_export(table, format, since), media_type=FORMATS[format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 @app.post("/api/tasks")
 def create_task(title: str = Form(...), assignee_email: str = Form(...), 
                 frequency: str = Form(...), creator_name: str = Form(...)):
     """새 업무 생성 API"""
     try:
-        task_id = supabase_manager.add_task(title, assignee_email, frequency, creator_name)
+        task_id = get_supabase().add_task(title, assignee_email, frequency, creator_name)
         if task_id:
             return {"success": True, "task_id": task_id, "message": "업무가 생성되었습니다."}
         else: